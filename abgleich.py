@@ -0,0 +1,121 @@
+"""
+Abgleich — Delta-Sync für Offline-Clients
+=========================================
+Trigger schreiben jede Änderung an TABELLEN ins aenderungsjournal
+(seq, tabelle, zeilen_id, aktion I/U/D). Pro Zeile bleibt nur der jüngste
+Eintrag — der Trigger löscht den vorigen, das Journal kompaktiert sich
+beim Schreiben selbst und wächst nur mit der Zahl geänderter Zeilen.
+
+GET /api/sync?since=<seq> liefert:
+
+  since=0 oder älter als die Kompaktierung → Vollabzug aller Zeilen
+  sonst → nur seit `since` geänderte Zeilen + Tombstones (gelöschte ids)
+
+Soft-Deletes (aktiv=0) gehen als Tombstone raus. kompaktiere() entfernt
+Lösch-Einträge älter als TOMBSTONE_TAGE; wer länger offline war, bekommt
+danach einen Vollabzug.
+
+messwerte/messreihen sind nicht dabei — Importe mit 100k Zeilen würden sonst
+ebenso viele Journal-Einträge schreiben. Dafür gibt es /api/messwerte/verlauf.
+"""
+
+import time
+
+TABELLEN       = ("personen", "dokumente", "medikamente", "ereignisse", "policen")
+MIT_AKTIV      = {"personen", "medikamente", "policen"}     # Soft-Delete über aktiv=0
+TOMBSTONE_TAGE = 90
+SEITE          = 2000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS aenderungsjournal (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    tabelle TEXT NOT NULL, zeilen_id INTEGER NOT NULL, aktion TEXT NOT NULL,
+    zeit TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_journal_zeile ON aenderungsjournal(tabelle, zeilen_id);
+INSERT OR IGNORE INTO config VALUES ('sync_kompaktiert_bis', '0');
+""" + "".join(
+    f"CREATE TRIGGER IF NOT EXISTS trg_{t}_journal_{op.lower()} AFTER {op} ON {t} BEGIN "
+    f"DELETE FROM aenderungsjournal WHERE tabelle = '{t}' AND zeilen_id = {ref}.id; "
+    f"INSERT INTO aenderungsjournal (tabelle, zeilen_id, aktion) VALUES ('{t}', {ref}.id, '{op[0]}'); END;\n"
+    for t in TABELLEN
+    for op, ref in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")))
+
+_letzte_kompaktierung = None
+
+def aktuelle_seq(db) -> int:
+    row = db.execute("SELECT seq FROM sqlite_sequence WHERE name='aenderungsjournal'").fetchone()
+    return row[0] if row else 0
+
+def kompaktiert_bis(db) -> int:
+    row = db.execute("SELECT value FROM config WHERE key='sync_kompaktiert_bis'").fetchone()
+    return int(row[0]) if row else 0
+
+def kompaktiere(db, tage: int = TOMBSTONE_TAGE) -> int:
+    """Alte Lösch-Einträge entfernen → Anzahl; merkt sich die höchste entfernte seq"""
+    global _letzte_kompaktierung
+    _letzte_kompaktierung = time.monotonic()
+    grenze = db.execute("SELECT MAX(seq) FROM aenderungsjournal WHERE aktion='D' "
+                        "AND zeit < datetime('now', ?)", (f"-{tage} days",)).fetchone()[0]
+    if not grenze:
+        return 0
+    n = db.execute("DELETE FROM aenderungsjournal WHERE aktion='D' AND seq <= ?", (grenze,)).rowcount
+    db.execute("UPDATE config SET value=? WHERE key='sync_kompaktiert_bis' AND CAST(value AS INTEGER) < ?",
+               (str(grenze), grenze))
+    db.commit()
+    return n
+
+def kompaktiere_taeglich(db) -> None:
+    if _letzte_kompaktierung is None or time.monotonic() - _letzte_kompaktierung > 86400:
+        kompaktiere(db)
+
+def _zeilen(db, tabelle: str, ids: list) -> list:
+    rows = []
+    for i in range(0, len(ids), 500):
+        teil = ids[i:i + 500]
+        rows += db.execute(f"SELECT * FROM {tabelle} WHERE id IN ({','.join('?' * len(teil))})",
+                           teil).fetchall()
+    return rows
+
+def _aufteilen(tabelle: str, rows) -> tuple:
+    """→ (aktive Zeilen als dicts, soft-gelöschte ids)"""
+    if tabelle not in MIT_AKTIV:
+        return [dict(r) for r in rows], []
+    return [dict(r) for r in rows if r["aktiv"]], [r["id"] for r in rows if not r["aktiv"]]
+
+def abgleich(db, since: int = 0, tabellen: tuple = TABELLEN) -> dict:
+    """
+    Änderungen seit `since` → {"seq", "voll", "mehr", "aenderungen": {t: [zeilen]},
+                               "geloescht": {t: [ids]}}
+
+    Der Client merkt sich "seq" und fragt bei "mehr" sofort erneut an.
+    db sollte in einer Lesetransaktion sein (alle Abfragen derselbe Stand).
+    """
+    aenderungen, geloescht = {}, {}
+    if since <= 0 or since < kompaktiert_bis(db):
+        seq = aktuelle_seq(db)
+        for t in tabellen:
+            aenderungen[t], weg = _aufteilen(t, db.execute(f"SELECT * FROM {t}").fetchall())
+            if weg: geloescht[t] = weg
+        return {"seq": seq, "voll": True, "mehr": False,
+                "aenderungen": aenderungen, "geloescht": geloescht}
+
+    platz = ",".join("?" * len(tabellen))
+    journal = db.execute(f"SELECT seq, tabelle, zeilen_id, aktion FROM aenderungsjournal "
+                         f"WHERE seq > ? AND tabelle IN ({platz}) ORDER BY seq LIMIT ?",
+                         (since, *tabellen, SEITE + 1)).fetchall()
+    mehr = len(journal) > SEITE
+    journal = journal[:SEITE]
+    pro_tabelle = {}
+    for j in journal:
+        pro_tabelle.setdefault(j["tabelle"], []).append(j["zeilen_id"])
+    for t, ids in pro_tabelle.items():
+        rows = _zeilen(db, t, ids)
+        aktiv, weg = _aufteilen(t, rows)
+        vorhanden = {r["id"] for r in rows}
+        weg += [i for i in ids if i not in vorhanden]          # hart gelöscht
+        if aktiv: aenderungen[t] = aktiv
+        if weg: geloescht[t] = weg
+    seq = journal[-1]["seq"] if mehr else max(aktuelle_seq(db), since)
+    return {"seq": seq, "voll": False, "mehr": mehr,
+            "aenderungen": aenderungen, "geloescht": geloescht}
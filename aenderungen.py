@@ -0,0 +1,103 @@
+"""
+Änderungen — Live-Feed über Server-Sent Events
+==============================================
+Schreibende Endpoints melden jede Änderung kompakt:
+
+  melde("dokumente", "CREATE", 42)     → {"seq", "tabelle", "aktion", "id"}
+  melde("messwerte", "BULK", anzahl=900)
+
+GET /api/events streamt die Meldungen an alle verbundenen Geräte; die SPA
+holt dann nur die betroffenen Zeilen (/api/zeilen/...) statt ganze Listen.
+
+Jede Meldung trägt die SSE-id "<boot>-<seq>". Die letzten PUFFER Meldungen
+bleiben im Speicher: ein Client, der mit Last-Event-ID neu verbindet,
+bekommt die verpassten nachgeliefert. Ist die Lücke zu groß, der Server
+neu gestartet oder die Warteschlange eines langsamen Clients übergelaufen,
+kommt stattdessen ein "reset" — der Client lädt dann einmal komplett.
+
+melde() ist threadsicher (Apple-Import läuft im Executor).
+"""
+
+import asyncio, itertools, json, secrets, threading
+from collections import deque
+
+PUFFER      = 500
+QUEUE_MAX   = 1000
+HEARTBEAT   = 25      # Sekunden — hält Proxies/VPN-Verbindungen offen
+
+_boot   = secrets.token_hex(4)
+_seq    = itertools.count(1)
+_lock   = threading.Lock()
+_puffer = deque(maxlen=PUFFER)
+_abos   = set()       # (loop, queue)
+
+def melde(tabelle: str, aktion: str, id_: int | None = None, **extra) -> dict:
+    with _lock:
+        meldung = {"seq": next(_seq), "tabelle": tabelle, "aktion": aktion, "id": id_, **extra}
+        _puffer.append(meldung)
+        abos = list(_abos)
+    for loop, q in abos:
+        try:
+            loop.call_soon_threadsafe(_einreihen, q, meldung)
+        except RuntimeError:
+            pass                # Loop schon beendet
+    return meldung
+
+def _einreihen(q: asyncio.Queue, meldung: dict) -> None:
+    try:
+        q.put_nowait(meldung)
+    except asyncio.QueueFull:
+        while not q.empty():
+            q.get_nowait()
+        q.put_nowait({"seq": meldung["seq"], "reset": True})
+
+def _sse(meldung: dict) -> str:
+    if meldung.get("reset"):
+        return f"id: {_boot}-{meldung['seq']}\nevent: reset\ndata: {{}}\n\n"
+    return (f"id: {_boot}-{meldung['seq']}\nevent: aenderung\n"
+            f"data: {json.dumps(meldung, ensure_ascii=False)}\n\n")
+
+def _nachzuliefern(letzte_id: str | None) -> list | None:
+    """Verpasste Meldungen seit Last-Event-ID → Liste, None = Lücke (reset nötig)"""
+    if not letzte_id:
+        return []
+    boot, _, seq = letzte_id.partition("-")
+    if boot != _boot or not seq.isdigit():
+        return None
+    seq = int(seq)
+    with _lock:
+        if _puffer and _puffer[0]["seq"] > seq + 1:
+            return None
+        return [m for m in _puffer if m["seq"] > seq]
+
+async def strom(letzte_id: str | None = None):
+    """Async-Generator mit SSE-Text — endet, wenn der Client trennt (Cancel)"""
+    loop = asyncio.get_running_loop()
+    q = asyncio.Queue(maxsize=QUEUE_MAX)
+    abo = (loop, q)
+    with _lock:
+        _abos.add(abo)
+    try:
+        yield "retry: 3000\n\n"
+        zuletzt = 0
+        verpasst = _nachzuliefern(letzte_id)
+        if verpasst is None:
+            with _lock:
+                zuletzt = _puffer[-1]["seq"] if _puffer else 0
+            yield _sse({"seq": zuletzt, "reset": True})
+        for m in verpasst or []:
+            zuletzt = m["seq"]
+            yield _sse(m)
+        while True:
+            try:
+                m = await asyncio.wait_for(q.get(), HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if m["seq"] <= zuletzt and not m.get("reset"):
+                continue        # schon per Nachlieferung gesendet
+            zuletzt = m["seq"]
+            yield _sse(m)
+    finally:
+        with _lock:
+            _abos.discard(abo)
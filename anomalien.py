@@ -0,0 +1,155 @@
+"""
+Anomalien — Ausreißer beim Einfügen erkennen
+============================================
+Pro Person + Reihe + Feld (wert/wert2) liegt in messwerte_laufend ein kleiner
+Zustand, der bei jedem Insert in O(1) fortgeschrieben wird:
+
+  Welford   n, mittel, m2          → Langzeit-Mittel und -Streuung
+  EWMA      ewma, ewm_var (α=0.1)  → jüngerer Verlauf (Sprünge)
+
+Vor dem Update wird die neue Messung gegen den Zustand geprüft; auffällige
+Werte landen in messwerte_auffaellig. Keine Abfrage muss dafür die ganze
+Historie lesen.
+
+Reihe = typ, bei laborwert zusätzlich der Name aus der Notiz
+("Apple Health Import (SpO2)" → "laborwert:SpO2"), damit SpO2 und BMI
+nicht in einem Topf landen.
+"""
+
+import math, re
+
+ALPHA      = 0.1    # EWMA-Gewicht der neuen Messung
+MIN_N      = 10     # erst ab so vielen Messungen statistisch flaggen
+Z_GRENZE   = 3.0
+
+# Feste Grenzen unabhängig von der Statistik: reihe → feld → (min, max)
+GRENZWERTE = {
+    "blutdruck":      {"wert": (None, 180), "wert2": (None, 110)},   # hypertensive Krise
+    "laborwert:SpO2": {"wert": (92, None)},
+    "blutzucker":     {"wert": (3.0, 16.7)},                         # mmol/L
+    "puls":           {"wert": (40, 150)},
+    "temperatur":     {"wert": (None, 39.5)},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messwerte_laufend (
+    person_id INTEGER NOT NULL, reihe TEXT NOT NULL, feld TEXT NOT NULL,
+    n INTEGER NOT NULL, mittel REAL NOT NULL, m2 REAL NOT NULL,
+    ewma REAL NOT NULL, ewm_var REAL NOT NULL,
+    letzte_id INTEGER, aktualisiert_am TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (person_id, reihe, feld)
+);
+CREATE TABLE IF NOT EXISTS messwerte_auffaellig (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    messwert_id INTEGER, person_id INTEGER, reihe TEXT, feld TEXT,
+    wert REAL, datum TEXT, z REAL, ewma_z REAL, grund TEXT,
+    erstellt_am TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_auffaellig_person ON messwerte_auffaellig(person_id, datum);
+"""
+
+_NAME_RE = re.compile(r"\(([^)]+)\)\s*$")
+
+def reihe_fuer(typ: str, notiz: str | None) -> str:
+    if typ != "laborwert":
+        return typ
+    notiz = (notiz or "").strip()
+    m = _NAME_RE.search(notiz)
+    return f"laborwert:{m.group(1) if m else notiz}"
+
+def _pruefe(reihe: str, feld: str, x: float, s: list | None) -> tuple:
+    """Messung gegen Zustand prüfen → (z, ewma_z, gründe)"""
+    gruende, z, ewma_z = [], None, None
+    lo, hi = GRENZWERTE.get(reihe, {}).get(feld, (None, None))
+    if lo is not None and x < lo: gruende.append(f"unter Grenzwert {lo}")
+    if hi is not None and x > hi: gruende.append(f"über Grenzwert {hi}")
+    if s and s[0] >= MIN_N:
+        n, mittel, m2, ewma, ewm_var = s
+        var = m2 / (n - 1)
+        if var > 0:
+            z = (x - mittel) / math.sqrt(var)
+            if abs(z) >= Z_GRENZE: gruende.append(f"{z:+.1f}σ vom Langzeit-Mittel")
+        if ewm_var > 0:
+            ewma_z = (x - ewma) / math.sqrt(ewm_var)
+            if abs(ewma_z) >= Z_GRENZE: gruende.append(f"Sprung {ewma_z:+.1f}σ zum Verlauf")
+    return z, ewma_z, gruende
+
+def _update(s: list | None, x: float) -> list:
+    """Welford + EWMA fortschreiben (O(1))"""
+    if not s:
+        return [1, x, 0.0, x, 0.0]
+    n, mittel, m2, ewma, ewm_var = s
+    n += 1
+    d = x - mittel
+    mittel += d / n
+    m2 += d * (x - mittel)
+    d_e = x - ewma
+    ewma += ALPHA * d_e
+    ewm_var = (1 - ALPHA) * (ewm_var + ALPHA * d_e * d_e)
+    return [n, mittel, m2, ewma, ewm_var]
+
+def _zahl(x) -> float | None:
+    """Messwert als float — POST /api/messwerte nimmt auch "80,5" oder Text an;
+    was keine endliche Zahl ist, bleibt für den Zustand außen vor"""
+    if x is None:
+        return None
+    try:
+        x = float(str(x).replace(",", ".").strip()) if isinstance(x, str) else float(x)
+    except (TypeError, ValueError):
+        return None
+    return x if math.isfinite(x) else None
+
+def aktualisiere(db, messungen) -> int:
+    """
+    Neue Messungen (in Einfüge-Reihenfolge) durch die Zustände schieben.
+
+    messungen: Rows/dicts mit id, person_id, typ, notiz, wert, wert2, datum
+               (id None = Zeitreihen-Sample ohne eigene messwerte-Zeile)
+    Returns: Anzahl neu geflaggter Werte
+    """
+    messungen = [m for m in messungen if m["person_id"] is not None]
+    if not messungen:
+        return 0
+    zustand, letzte = {}, {}
+    for p_id in {m["person_id"] for m in messungen}:
+        for r in db.execute("SELECT reihe, feld, n, mittel, m2, ewma, ewm_var FROM messwerte_laufend "
+                            "WHERE person_id=?", (p_id,)):
+            zustand[(p_id, r[0], r[1])] = list(r[2:])
+
+    flags = []
+    for m in messungen:
+        reihe = reihe_fuer(m["typ"], m["notiz"])
+        for feld in ("wert", "wert2"):
+            x = _zahl(m[feld])
+            if x is None:
+                continue
+            key = (m["person_id"], reihe, feld)
+            z, ewma_z, gruende = _pruefe(reihe, feld, x, zustand.get(key))
+            if gruende:
+                flags.append((m["id"], m["person_id"], reihe, feld, x, m["datum"],
+                              z, ewma_z, "; ".join(gruende)))
+            zustand[key] = _update(zustand.get(key), x)
+            letzte[key] = m["id"]
+
+    db.executemany("""
+        INSERT INTO messwerte_laufend (person_id, reihe, feld, n, mittel, m2, ewma, ewm_var, letzte_id)
+        VALUES (?,?,?,?,?,?,?,?,?)
+        ON CONFLICT (person_id, reihe, feld) DO UPDATE SET
+            n=excluded.n, mittel=excluded.mittel, m2=excluded.m2, ewma=excluded.ewma,
+            ewm_var=excluded.ewm_var,
+            letzte_id=COALESCE(excluded.letzte_id, messwerte_laufend.letzte_id),
+            aktualisiert_am=CURRENT_TIMESTAMP
+    """, [(*key, *zustand[key], letzte[key]) for key in letzte])
+    if flags:
+        db.executemany("""
+            INSERT INTO messwerte_auffaellig (messwert_id, person_id, reihe, feld, wert, datum,
+                                              z, ewma_z, grund)
+            VALUES (?,?,?,?,?,?,?,?,?)
+        """, flags)
+    return len(flags)
+
+def aktualisiere_ids(db, von_id: int, bis_id: int) -> int:
+    """Messungen eines id-Bereichs (z.B. ein executemany-Batch) fortschreiben"""
+    return aktualisiere(db, db.execute(
+        "SELECT id, person_id, typ, notiz, wert, wert2, datum FROM messwerte "
+        "WHERE id BETWEEN ? AND ? ORDER BY id", (von_id, bis_id)).fetchall())
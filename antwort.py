@@ -0,0 +1,143 @@
+"""
+Antwort — schnelle JSON-Serialisierung und komprimierte Responses
+=================================================================
+json_antwort(daten, response)
+    Listen-Endpoints geben ihre Zeilen direkt als Response zurück: orjson
+    (falls installiert) bzw. json.dumps kodiert in einem Schritt, der
+    rekursive jsonable_encoder-Durchlauf von FastAPI entfällt. Header, die
+    Dependencies auf `response` gesetzt haben (ETag), werden übernommen.
+
+Kompression (ASGI-Middleware)
+    Komprimiert vollständige Antworten ab MIN_BYTES mit zstd, br oder gzip —
+    je nach Accept-Encoding und installierten Modulen (zstandard, brotli).
+    Gestreamte Antworten (SSE, Dateien) und bereits kodierte bleiben
+    unverändert. Ein ETag wird dabei schwach (W/"..."), If-None-Match
+    vergleicht ohne W/-Präfix.
+"""
+
+import gzip, json
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MIN_BYTES = 1024
+KOMPRIMIERBAR = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+# ── JSON ─────────────────────────────────────────────────────────────────
+
+def _default(o):
+    return o.isoformat() if hasattr(o, "isoformat") else str(o)
+
+def json_bytes(daten) -> bytes:
+    """Gleiches Format wie FastAPIs JSONResponse (UTF-8, kompakt)"""
+    if orjson is not None:
+        return orjson.dumps(daten, default=_default)
+    return json.dumps(daten, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+def json_antwort(daten, response: Response | None = None, roh: bytes | None = None) -> Response:
+    """Response aus Daten (oder schon kodierten Bytes) inkl. Dependency-Headern"""
+    headers = dict(response.headers) if response is not None else None
+    if headers: headers.pop("content-length", None)
+    return Response(roh if roh is not None else json_bytes(daten),
+                    media_type="application/json", headers=headers)
+
+# ── KOMPRESSION ──────────────────────────────────────────────────────────
+
+def _gzip(b: bytes) -> bytes:
+    return gzip.compress(b, compresslevel=6, mtime=0)
+
+def _br(b: bytes) -> bytes:
+    return brotli.compress(b, quality=5)
+
+def _zstd(b: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=3).compress(b)
+
+def verfahren() -> dict:
+    """Verfügbare Content-Encodings in Präferenzreihenfolge"""
+    v = {}
+    if zstandard is not None: v["zstd"] = _zstd
+    if brotli is not None:    v["br"] = _br
+    v["gzip"] = _gzip
+    return v
+
+def angeboten(accept_encoding: str) -> set:
+    """Accept-Encoding → Menge der akzeptierten Verfahren (q=0 schließt aus)"""
+    namen = set()
+    for teil in accept_encoding.lower().split(","):
+        name, _, param = teil.partition(";")
+        q = 1.0
+        if param.strip().startswith("q="):
+            try: q = float(param.strip()[2:])
+            except ValueError: pass
+        if q > 0:
+            namen.add(name.strip())
+    return namen
+
+def waehle(accept_encoding: str) -> str | None:
+    """Accept-Encoding → bestes verfügbares Verfahren"""
+    namen = angeboten(accept_encoding)
+    return next((v for v in verfahren() if v in namen), None)
+
+class Kompression:
+    """ASGI-Middleware: vollständige, komprimierbare Antworten ab MIN_BYTES komprimieren"""
+
+    def __init__(self, app, min_bytes: int = MIN_BYTES):
+        self.app = app
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept = next((v.decode() for k, v in scope["headers"] if k == b"accept-encoding"), "")
+        kodierung = waehle(accept)
+        if not kodierung:
+            return await self.app(scope, receive, send)
+
+        start = None
+        durchreichen = False
+
+        async def senden(msg):
+            nonlocal start, durchreichen
+            if msg["type"] == "http.response.start":
+                start = msg
+                return
+            if msg["type"] != "http.response.body" or durchreichen:
+                return await send(msg)
+            body = msg.get("body", b"")
+            headers = {k.lower(): v for k, v in start.get("headers", [])}
+            typ = headers.get(b"content-type", b"").decode()
+            if (msg.get("more_body") or len(body) < self.min_bytes or start["status"] != 200
+                    or b"content-encoding" in headers or not typ.startswith(KOMPRIMIERBAR)):
+                durchreichen = True
+                await send(start)
+                return await send(msg)
+
+            gepackt = verfahren()[kodierung](body)
+            neu = [(k, v) for k, v in start["headers"]
+                   if k.lower() not in (b"content-length", b"etag", b"vary")]
+            vary = headers.get(b"vary")
+            neu += [(b"content-encoding", kodierung.encode()),
+                    (b"content-length", str(len(gepackt)).encode()),
+                    (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding")]
+            if b"etag" in headers and not headers[b"etag"].startswith(b"W/"):
+                neu.append((b"etag", b"W/" + headers[b"etag"]))
+            elif b"etag" in headers:
+                neu.append((b"etag", headers[b"etag"]))
+            await send({**start, "headers": neu})
+            await send({"type": "http.response.body", "body": gepackt})
+
+        await self.app(scope, receive, senden)
@@ -0,0 +1,112 @@
+"""
+Antwortcache — Read-through-Cache für häufig gelesene Endpoints
+===============================================================
+@gecacht("personen", "medikamente") unter @app.get(...) legt das Ergebnis
+eines Endpoints im Prozess ab:
+
+  Schlüssel      Funktionsname + Parameter (Pfad/Query) + Benutzername
+  Ablauf         TTL (Sekunden) und LRU, begrenzt auf MAX_EINTRAEGE und
+                 MAX_BYTES
+  Inhalt         die fertig kodierten JSON-Bytes (antwort.json_bytes) —
+                 ein Treffer serialisiert nichts mehr
+  Invalidierung  Schreibende Endpoints rufen invalidiere("tabelle") auf →
+                 genau die Einträge, die diese Tabelle lesen, fliegen raus
+
+Schreibzugriffe aus anderen Prozessen (tools/apple_health_importer.py)
+sieht der Cache erst nach Ablauf der TTL.
+"""
+
+import functools, threading, time
+from collections import OrderedDict
+
+import antwort
+
+TTL           = 300
+MAX_EINTRAEGE = 512
+MAX_BYTES     = 8 * 1024 * 1024
+
+_lock    = threading.Lock()
+_eintraege = OrderedDict()   # schluessel → (ablauf, tabellen, bytes, wert)
+_bytes   = 0
+_stand   = 0    # wird bei jeder Invalidierung hochgezählt
+_zaehler = {"treffer": 0, "fehlschlaege": 0, "invalidiert": 0, "verdraengt": 0, "abgelaufen": 0}
+
+def _entferne(schluessel, grund: str) -> None:
+    global _bytes
+    _, _, groesse, _ = _eintraege.pop(schluessel)
+    _bytes -= groesse
+    _zaehler[grund] += 1
+
+def hole(schluessel):
+    """→ (True, wert) bei Treffer, sonst (False, None)"""
+    with _lock:
+        eintrag = _eintraege.get(schluessel)
+        if eintrag and eintrag[0] > time.monotonic():
+            _eintraege.move_to_end(schluessel)
+            _zaehler["treffer"] += 1
+            return True, eintrag[3]
+        if eintrag:
+            _entferne(schluessel, "abgelaufen")
+        _zaehler["fehlschlaege"] += 1
+        return False, None
+
+def lege_ab(schluessel, tabellen: tuple, wert: bytes, ttl: float = TTL,
+            stand: int | None = None) -> None:
+    """Ablegen — nicht, wenn seit `stand` invalidiert wurde (Wert evtl. schon veraltet)"""
+    global _bytes
+    groesse = len(wert)
+    if groesse > MAX_BYTES // 4:
+        return                      # Einzelne Riesen-Antworten verdrängen sonst alles
+    with _lock:
+        if stand is not None and stand != _stand:
+            return
+        if schluessel in _eintraege:
+            _bytes -= _eintraege.pop(schluessel)[2]
+        _eintraege[schluessel] = (time.monotonic() + ttl, frozenset(tabellen), groesse, wert)
+        _bytes += groesse
+        while len(_eintraege) > MAX_EINTRAEGE or _bytes > MAX_BYTES:
+            _entferne(next(iter(_eintraege)), "verdraengt")
+
+def invalidiere(*tabellen: str) -> None:
+    """Nach Schreibzugriffen aufrufen — ohne Argumente wird alles verworfen"""
+    global _stand
+    with _lock:
+        _stand += 1
+        for schluessel in [k for k, e in _eintraege.items()
+                           if not tabellen or e[1].intersection(tabellen)]:
+            _entferne(schluessel, "invalidiert")
+
+def statistik() -> dict:
+    with _lock:
+        anfragen = _zaehler["treffer"] + _zaehler["fehlschlaege"]
+        return {**_zaehler, "eintraege": len(_eintraege), "bytes": _bytes,
+                "trefferquote": round(_zaehler["treffer"] / anfragen, 3) if anfragen else None,
+                "ttl": TTL, "max_eintraege": MAX_EINTRAEGE, "max_bytes": MAX_BYTES}
+
+def gecacht(*tabellen: str, ttl: float = TTL):
+    """
+    Decorator für async Endpoints, die nur aus `tabellen` lesen.
+
+    Parameter `user` geht nur mit dem Benutzernamen in den Schlüssel ein,
+    Request/Response-Objekte gar nicht. Die Antwort ist immer eine fertige
+    JSON-Response; Header auf einem `response`-Parameter (ETag) werden
+    übernommen.
+    """
+    def deko(func):
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            teile = []
+            for k, v in sorted(kwargs.items()):
+                if k == "user":
+                    teile.append(("user", v.get("username") if v else None))
+                elif v is None or isinstance(v, (str, int, float, bool)):
+                    teile.append((k, v))
+            schluessel = (func.__name__, tuple(teile))
+            treffer, roh = hole(schluessel)
+            if not treffer:
+                vorher = _stand
+                roh = antwort.json_bytes(await func(**kwargs))
+                lege_ab(schluessel, tabellen, roh, ttl, vorher)
+            return antwort.json_antwort(None, kwargs.get("response"), roh)
+        return wrapper
+    return deko
@@ -0,0 +1,68 @@
+"""
+Einzelflug — gleichzeitige identische Anfragen teilen sich eine Berechnung
+==========================================================================
+Öffnen mehrere Familienmitglieder gleichzeitig die App oder feuert die SPA
+beim Neurendern doppelt, laufen sonst identische teure Abfragen parallel
+gegen dieselbe SQLite-Datei.
+
+  await teile(("dashboard",), _dashboard_daten)
+
+Läuft für den Schlüssel schon eine Berechnung, wartet der Aufrufer auf
+deren Ergebnis (oder Exception) statt eine zweite zu starten. Synchrone
+Funktionen laufen im Thread-Pool (run_in_executor), damit der Event-Loop
+frei bleibt und Folgeanfragen überhaupt andocken können; Coroutine-
+Funktionen werden direkt awaited. Das erste Element des Schlüssels ist der
+Name für die Zähler. Sub-Requests von /api/batch lesen über eine eigene
+Snapshot-Verbindung — main.flug_schluessel() hängt sie an den Schlüssel,
+damit kein Ergebnis zwischen Snapshot und normalen Requests wandert.
+"""
+
+import asyncio, contextvars, functools
+
+_laufend = {}   # schluessel → Future
+_zaehler = {}   # name → {"aufrufe", "ausgefuehrt", "geteilt", "fehler"}
+
+def _zaehle(name: str, feld: str) -> None:
+    z = _zaehler.setdefault(name, {"aufrufe": 0, "ausgefuehrt": 0, "geteilt": 0, "fehler": 0})
+    z[feld] += 1
+
+async def teile(schluessel: tuple, fn, *args):
+    """fn(*args) einmal pro Schlüssel gleichzeitig ausführen, Ergebnis an alle Wartenden"""
+    name = str(schluessel[0])
+    _zaehle(name, "aufrufe")
+    fut = _laufend.get(schluessel)
+    if fut is not None:
+        _zaehle(name, "geteilt")
+        return await asyncio.shield(fut)
+
+    loop = asyncio.get_running_loop()
+    fut = _laufend[schluessel] = loop.create_future()
+    _zaehle(name, "ausgefuehrt")
+    try:
+        if asyncio.iscoroutinefunction(fn):
+            ergebnis = await fn(*args)
+        else:
+            # Kontext mitnehmen (z.B. die Snapshot-Verbindung von /api/batch)
+            ergebnis = await loop.run_in_executor(
+                None, functools.partial(contextvars.copy_context().run, fn, *args))
+    except BaseException as e:
+        _zaehle(name, "fehler")
+        if isinstance(e, asyncio.CancelledError):
+            fut.cancel()
+        else:
+            fut.set_exception(e)
+            fut.exception()     # als abgeholt markieren, falls niemand wartet
+        raise
+    else:
+        fut.set_result(ergebnis)
+        return ergebnis
+    finally:
+        del _laufend[schluessel]
+
+def statistik() -> dict:
+    gesamt = {"aufrufe": 0, "ausgefuehrt": 0, "geteilt": 0, "fehler": 0}
+    for z in _zaehler.values():
+        for k in gesamt:
+            gesamt[k] += z[k]
+    return {**gesamt, "laufend": len(_laufend),
+            "pro_schluessel": {n: dict(z) for n, z in sorted(_zaehler.items())}}
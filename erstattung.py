@@ -0,0 +1,230 @@
+"""
+Erstattung — Beihilfe pro Rechnung berechnen, einzeln und für alle
+==================================================================
+berechne() bewertet eine Positionsliste (Analyse-Dialog, Foto-Analyse).
+
+neu_berechnen() rechnet alle gespeicherten Rechnungen eines Umfangs
+(Person, Jahr, einzelne Dokumente) auf einmal nach — nötig, wenn sich der
+Beihilfesatz ändert (Kind geboren, Pensionierung) oder ein neuer GOÄ-Stand
+geladen wird:
+
+  1. Positionen aus dokumente.ki_extraktion lesen, jede Ziffer zum
+     Leistungsdatum im Tarif auflösen (goae.Tarif.hole)
+  2. Eingabe-Hash je Rechnung: Positionen + Beihilfesatz + aufgelöste
+     Tarifwerte. Gleicher Hash wie in erstattungen → übersprungen
+  3. Alle übrigen Positionen als Spalten (NumPy) in einem Durchgang
+     bewerten, Summen je Rechnung per bincount
+  4. Summen je Rechnung in erstattungen, jede Position als Zeile in
+     rechnungspositionen speichern — Auswertungen (Erstattung pro Jahr,
+     häufigste Ziffern) sind damit SQL-Aggregate ohne JSON-Parsen
+
+Ohne NumPy werden dieselben Formeln Zeile für Zeile gerechnet.
+"""
+
+import hashlib, json, math, time
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import goae
+
+MAX_FAKTOR = 2.3              # Schwellenwert — darüber nur mit Begründung beihilfefähig
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS erstattungen (
+    dokument_id INTEGER PRIMARY KEY,
+    person TEXT, jahr INTEGER, eingabe TEXT NOT NULL,
+    beihilfesatz REAL, gesamt_rechnung REAL, gesamt_beihilfefaehig REAL,
+    nicht_beihilfefaehig REAL, erstattung REAL, eigenanteil REAL,
+    berechnet_am TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_erstattungen_person ON erstattungen(person, jahr);
+CREATE INDEX IF NOT EXISTS idx_erstattungen_jahr ON erstattungen(jahr);
+CREATE TABLE IF NOT EXISTS rechnungspositionen (
+    dokument_id INTEGER NOT NULL, nr INTEGER NOT NULL,
+    ziffer TEXT, faktor REAL, anzahl INTEGER, betrag REAL,
+    beihilfefaehig INTEGER, beihilfefaehiger_betrag REAL, tarif TEXT, hinweis TEXT,
+    PRIMARY KEY (dokument_id, nr)
+);
+CREATE INDEX IF NOT EXISTS idx_rechnungspositionen_ziffer ON rechnungspositionen(ziffer);
+"""
+FORMAT = 3                    # geht in den Eingabe-Hash ein: neues Speicherformat oder neue Rundung → einmal alles neu
+
+def cent(x: float) -> float:
+    """Kaufmännisch auf Cent runden — round() rundet den Binärwert (5,25 × 2,3 → 12,07)"""
+    return math.floor(x * 100 + 0.5 + 1e-9) / 100
+
+def berechne(positionen, tarif, beihilfesatz, leistungsdatum=None) -> dict:
+    """tarif: goae.stand() — jede Position wird nach dem an ihrem Leistungsdatum
+    (pos["datum"], sonst leistungsdatum, sonst heute) gültigen GOÄ-Stand bewertet"""
+    res = {"positionen":[], "gesamt_rechnung":0.0, "gesamt_beihilfefaehig":0.0,
+           "erstattung":0.0, "nicht_beihilfefaehig":0.0, "hinweise":[]}
+    for pos in positionen:
+        ziffer = str(pos.get("ziffer","")).strip()
+        betrag = float(pos.get("betrag",0))
+        faktor = float(pos.get("faktor",1.0))
+        anzahl = int(pos.get("anzahl",1))
+        res["gesamt_rechnung"] += betrag
+        eintrag = tarif.hole(ziffer, pos.get("datum") or leistungsdatum) if ziffer and ziffer != "null" else None
+        if not eintrag:
+            res["positionen"].append({**pos,"beihilfefaehig":False,"beihilfefaehiger_betrag":0.0,"hinweis":"Ziffer unbekannt"})
+            res["nicht_beihilfefaehig"] += betrag
+            continue
+        if not eintrag["beihilfefaehig_bund"]:
+            res["positionen"].append({**pos,"beschreibung_goae":eintrag["beschreibung"],"tarif":eintrag["tarif"],"beihilfefaehig":False,"beihilfefaehiger_betrag":0.0,"hinweis":"IGeL / nicht beihilfefähig"})
+            res["nicht_beihilfefaehig"] += betrag
+            continue
+        angemessen = cent(eintrag["einfachsatz"] * min(faktor, MAX_FAKTOR) * anzahl)
+        bh_betrag = min(betrag, angemessen)
+        hinweis = f"Faktor {faktor} > 2,3: nur {angemessen:.2f}€ beihilfefähig" if faktor > MAX_FAKTOR else None
+        if hinweis: res["hinweise"].append(f"GOÄ {ziffer}: {hinweis}")
+        res["gesamt_beihilfefaehig"] += bh_betrag
+        res["positionen"].append({**pos,"beschreibung_goae":eintrag["beschreibung"],"kategorie":eintrag["kategorie"],"tarif":eintrag["tarif"],"beihilfefaehig":True,"beihilfefaehiger_betrag":round(bh_betrag,2),"hinweis":hinweis})
+    res["gesamt_beihilfefaehig"] = round(res["gesamt_beihilfefaehig"],2)
+    res["erstattung"] = cent(res["gesamt_beihilfefaehig"] * beihilfesatz)
+    res["nicht_beihilfefaehig"] = round(res["nicht_beihilfefaehig"],2)
+    res["beihilfesatz_prozent"] = int(beihilfesatz*100)
+    res["eigenanteil"] = cent(res["gesamt_rechnung"] - res["erstattung"])
+    return res
+
+# ── STAPEL ───────────────────────────────────────────────────────────────
+
+def _zahl(x, standard: float) -> float:
+    """KI-Extraktion liefert auch "10,72" oder null"""
+    try:
+        return float(str(x).replace(",", ".")) if x not in (None, "") else standard
+    except ValueError:
+        return standard
+
+def _rechnung(r, tarif, saetze: dict) -> dict | None:
+    """dokumente-Zeile → normalisierte Positionen + Eingabe-Hash, None ohne Positionen"""
+    try:
+        ki = json.loads(r["ki_extraktion"] or "{}")
+    except ValueError:
+        return None
+    positionen = ki.get("positionen") if isinstance(ki, dict) else None
+    if not positionen or not isinstance(positionen, list):
+        return None
+    tag = goae.datum_ordinal(r["datum"] or (r["erstellt_am"] or "")[:10])      # Leistungsdatum der Rechnung
+    satz = saetze.get(r["person"], 0.50)
+    zeilen = []
+    for p in positionen:
+        if not isinstance(p, dict):
+            continue
+        ziffer = str(p.get("ziffer", "")).strip()
+        e = tarif.hole(ziffer, goae.datum_ordinal(p["datum"]) if p.get("datum") else tag) \
+            if ziffer and ziffer != "null" else None
+        zeilen.append((ziffer, _zahl(p.get("betrag"), 0.0), _zahl(p.get("faktor"), 1.0),
+                       int(_zahl(p.get("anzahl"), 1)),
+                       e and (e["tarif"], e["einfachsatz"], bool(e["beihilfefaehig_bund"]))))
+    eingabe = hashlib.sha1(repr((FORMAT, satz, zeilen)).encode()).hexdigest()[:20]
+    return {"id": r["id"], "person": r["person"], "jahr": date.fromordinal(tag).year,
+            "satz": satz, "zeilen": zeilen, "eingabe": eingabe}
+
+def _spalten(rechnungen: list) -> list:
+    """Alle Positionen aller Rechnungen in einem Durchgang bewerten → Summen je Rechnung"""
+    zeilen = [(i, z) for i, r in enumerate(rechnungen) for z in r["zeilen"]]
+    n = len(rechnungen)
+    dok     = np.fromiter((i for i, _ in zeilen), dtype=np.int64, count=len(zeilen))
+    betrag  = np.fromiter((z[1] for _, z in zeilen), dtype=float, count=len(zeilen))
+    faktor  = np.fromiter((z[2] for _, z in zeilen), dtype=float, count=len(zeilen))
+    anzahl  = np.fromiter((z[3] for _, z in zeilen), dtype=float, count=len(zeilen))
+    einfach = np.fromiter((z[4][1] if z[4] else 0.0 for _, z in zeilen), dtype=float, count=len(zeilen))
+    faehig  = np.fromiter((bool(z[4] and z[4][2]) for _, z in zeilen), dtype=bool, count=len(zeilen))
+
+    angemessen = np.floor(einfach * np.minimum(faktor, MAX_FAKTOR) * anzahl * 100 + 0.5 + 1e-9) / 100   # = cent()
+    bh = np.where(faehig, np.minimum(betrag, angemessen), 0.0)
+    summe = lambda w: np.bincount(dok, weights=w, minlength=n)
+    gesamt, beihilfefaehig = summe(betrag), summe(bh)
+    nicht = summe(np.where(faehig, 0.0, betrag))
+
+    ergebnisse, k = [], 0
+    for i, r in enumerate(rechnungen):
+        positionen = []
+        for z in r["zeilen"]:
+            positionen.append(_position(z, float(angemessen[k]), float(bh[k])))
+            k += 1
+        ergebnisse.append((float(gesamt[i]), float(beihilfefaehig[i]), float(nicht[i]), positionen))
+    return ergebnisse
+
+def _einzeln(rechnungen: list) -> list:
+    """Ohne NumPy: dieselbe Rechnung Zeile für Zeile"""
+    ergebnisse = []
+    for r in rechnungen:
+        gesamt = beihilfefaehig = nicht = 0.0
+        positionen = []
+        for z in r["zeilen"]:
+            faehig = bool(z[4] and z[4][2])
+            angemessen = cent(z[4][1] * min(z[2], MAX_FAKTOR) * z[3]) if faehig else 0.0
+            bh = min(z[1], angemessen) if faehig else 0.0
+            gesamt += z[1]; beihilfefaehig += bh; nicht += 0.0 if faehig else z[1]
+            positionen.append(_position(z, angemessen, bh))
+        ergebnisse.append((gesamt, beihilfefaehig, nicht, positionen))
+    return ergebnisse
+
+def _position(z: tuple, angemessen: float, bh: float) -> tuple:
+    """→ Spalten von rechnungspositionen ab ziffer"""
+    hinweis = ("Ziffer unbekannt" if not z[4] else "IGeL / nicht beihilfefähig" if not z[4][2] else
+               f"Faktor {z[2]} > 2,3: nur {angemessen:.2f}€ beihilfefähig" if z[2] > MAX_FAKTOR else None)
+    return (z[0], z[2], z[3], z[1], int(bool(z[4] and z[4][2])), round(bh, 2), z[4] and z[4][0], hinweis)
+
+def neu_berechnen(db, tarif, person: str | None = None, jahr: int | None = None,
+                  dokument_ids: list | None = None, erzwingen: bool = False) -> dict:
+    """Erstattungen im Umfang nachrechnen (nur geänderte Eingaben) → Statistik"""
+    t0 = time.perf_counter()
+    saetze = {r["name"]: float(r["beihilfesatz"] or 0.50)
+              for r in db.execute("SELECT name, beihilfesatz FROM personen").fetchall()}
+    q, params = "SELECT id, person, datum, erstellt_am, ki_extraktion FROM dokumente WHERE typ='rechnung'", []
+    if person:
+        q += " AND person=?"; params.append(person)
+    if dokument_ids:
+        q += f" AND id IN ({','.join('?' * len(dokument_ids))})"; params += list(dokument_ids)
+    rechnungen, ohne = [], []
+    for r in db.execute(q, params).fetchall():
+        x = _rechnung(r, tarif, saetze)
+        if x is None:
+            ohne.append(r["id"])
+        elif not jahr or x["jahr"] == jahr:
+            rechnungen.append(x)
+    bisher = {}
+    if rechnungen:
+        ids = [x["id"] for x in rechnungen]
+        bisher = {r[0]: r[1] for r in db.execute(f"SELECT dokument_id, eingabe FROM erstattungen WHERE "
+                                                  f"dokument_id IN ({','.join('?' * len(ids))})", ids)}
+    offen = [x for x in rechnungen if erzwingen or bisher.get(x["id"]) != x["eingabe"]]
+
+    if offen:
+        ergebnisse = _spalten(offen) if np is not None else _einzeln(offen)
+        zeilen, pos_zeilen = [], []
+        for x, (gesamt, beihilfefaehig, nicht, positionen) in zip(offen, ergebnisse):
+            beihilfefaehig = round(beihilfefaehig, 2)
+            erstattung = cent(beihilfefaehig * x["satz"])
+            zeilen.append((x["id"], x["person"], x["jahr"], x["eingabe"], x["satz"], round(gesamt, 2),
+                           beihilfefaehig, round(nicht, 2), erstattung, cent(gesamt - erstattung)))
+            pos_zeilen += [(x["id"], nr, *p) for nr, p in enumerate(positionen, 1)]
+        db.executemany("DELETE FROM rechnungspositionen WHERE dokument_id=?", [(x["id"],) for x in offen])
+        db.executemany("INSERT OR REPLACE INTO erstattungen (dokument_id, person, jahr, eingabe, beihilfesatz, "
+                       "gesamt_rechnung, gesamt_beihilfefaehig, nicht_beihilfefaehig, erstattung, eigenanteil) "
+                       "VALUES (?,?,?,?,?,?,?,?,?,?)", zeilen)
+        db.executemany("INSERT INTO rechnungspositionen (dokument_id, nr, ziffer, faktor, anzahl, betrag, "
+                       "beihilfefaehig, beihilfefaehiger_betrag, tarif, hinweis) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                       pos_zeilen)
+
+    # Ergebnisse ohne Rechnung (gelöscht, Positionen entfernt) aufräumen
+    weg = list(ohne)
+    if dokument_ids:
+        gefunden = {x["id"] for x in rechnungen} | set(ohne)
+        weg += [i for i in dokument_ids if i not in gefunden and not jahr and not person]
+    elif not person and not jahr:
+        weg += [r[0] for r in db.execute("SELECT e.dokument_id FROM erstattungen e LEFT JOIN dokumente d "
+                                         "ON d.id = e.dokument_id WHERE d.id IS NULL OR d.typ != 'rechnung'")]
+    entfernt = db.executemany("DELETE FROM erstattungen WHERE dokument_id=?", [(i,) for i in weg]).rowcount if weg else 0
+    if weg:
+        db.executemany("DELETE FROM rechnungspositionen WHERE dokument_id=?", [(i,) for i in weg])
+    db.commit()
+    return {"geprueft": len(rechnungen), "neu_berechnet": len(offen), "unveraendert": len(rechnungen) - len(offen),
+            "ohne_positionen": len(ohne), "entfernt": max(entfernt, 0), "spaltenweise": np is not None,
+            "ms": round((time.perf_counter() - t0) * 1000, 1)}
@@ -0,0 +1,327 @@
+"""
+GOÄ — Tarife laden und durchsuchen
+==================================
+stand() liefert den aktuellen Tarif-Stand: den Basiskatalog aus den
+KATALOG_DATEIEN (die erste Datei, die eine Ziffer enthält, gewinnt) plus
+datierte Versionen aus data/goae/ (GOÄ-Reform). Geänderte Dateien werden
+per mtime erkannt und ohne Neustart geladen; der neue Stand ersetzt den
+alten in einem Schritt. stand().hole(ziffer, leistungsdatum) liefert den
+am Leistungstag gültigen Eintrag per bisect über eine Zeitleiste je Ziffer.
+
+Pro Version wird bei der ersten Suche ein Index gebaut:
+
+  Ziffer-Trie        "35" → 35, 350, 3500, 3550, … (Präfix, aufsteigend)
+  Token-Index        normalisierte Wörter aus Beschreibung + Kategorie → Ziffern
+  Wortliste          sortiert, für Präfixe ("bera" → beratung) per bisect
+  Trigramm-Index     Trigramm → Wörter, für Tippfehler ("beratnug" → beratung)
+
+Normalisierung: klein, ä→ae, ö→oe, ü→ue, ß→ss, Akzente weg — "Röntgen",
+"roentgen" und "Rontgen" (per Tippfehler-Suche) finden dasselbe.
+
+Ranking pro Suchwort: exakt 1.0 > Präfix 0.8 > Tippfehler (Dice ≥ 0.45) ×0.6;
+Treffer in der Kategorie zählen halb. Ziffern, die alle Suchwörter
+enthalten, stehen vor Teiltreffern. Ein vollständiger Katalog (~2.500
+Ziffern) kommt über GOAE_KATALOG=/pfad/zur/datei.json dazu.
+
+  python goae.py "bertung"     → Versionen, Treffer + Zeit pro Suche
+"""
+
+import bisect, heapq, json, os, re, sys, threading, time, unicodedata
+from collections import Counter, defaultdict
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+
+BASIS           = Path(__file__).parent
+KATALOG_DATEIEN = tuple(p for p in (os.getenv("GOAE_KATALOG"),
+                                    BASIS / "goae_datenbank.json",
+                                    BASIS / "backend" / "goae_datenbank.json") if p)
+VERSIONEN_VERZEICHNIS = Path(os.getenv("GOAE_VERSIONEN", BASIS / "data" / "goae"))
+BASIS_TARIF     = "GOÄ 1996"
+OFFEN           = date.max.toordinal() + 1
+PRUEFEN_ALLE    = 2.0         # Sekunden zwischen zwei mtime-Prüfungen
+MIN_AEHNLICH    = 0.45
+GEWICHT_KATEGORIE = 0.5
+
+_UMLAUTE = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+_WORT    = re.compile(r"[a-z0-9]+")
+
+def normalisiere(text: str) -> str:
+    text = str(text or "").lower().translate(_UMLAUTE)
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+def woerter(text: str) -> list:
+    return _WORT.findall(normalisiere(text))
+
+def _trigramme(wort: str) -> set:
+    w = f" {wort} "
+    return {w[i:i + 3] for i in range(len(w) - 2)}
+
+def _ziffer_schluessel(z: str) -> tuple:
+    m = re.match(r"(\d*)(.*)", z)
+    return (int(m.group(1)) if m.group(1) else 10**9, m.group(2))
+
+class Index:
+    """Suchindex über {ziffer: eintrag} — einmal bauen, danach nur lesen"""
+
+    def __init__(self, eintraege: dict):
+        self.eintraege = eintraege
+        self.reihenfolge = sorted(eintraege, key=_ziffer_schluessel)
+        self.rang = {z: i for i, z in enumerate(self.reihenfolge)}      # numerische Ordnung
+        self.trie = {}
+        for z in self.reihenfolge:
+            knoten = self.trie
+            for zeichen in normalisiere(z):
+                knoten = knoten.setdefault(zeichen, {})
+                knoten.setdefault("", []).append(z)
+        self.token = defaultdict(dict)                 # wort → {ziffer: gewicht}
+        for z, e in eintraege.items():
+            for feld, gewicht in (("kategorie", GEWICHT_KATEGORIE), ("beschreibung", 1.0)):
+                for w in woerter(e.get(feld, "")):
+                    self.token[w][z] = max(self.token[w].get(z, 0), gewicht)
+        self.wortliste = sorted(self.token)
+        self.trigramme = defaultdict(list)
+        for w in self.wortliste:
+            for t in _trigramme(w):
+                self.trigramme[t].append(w)
+        self.suche = lru_cache(maxsize=1024)(self._suche)
+        self.wort_punkte = lru_cache(maxsize=4096)(self._wort_punkte)
+
+    def _ziffern_mit_praefix(self, praefix: str) -> list:
+        knoten = self.trie
+        for zeichen in praefix:
+            knoten = knoten.get(zeichen)
+            if knoten is None:
+                return []
+        return knoten.get("", [])
+
+    def _passende_woerter(self, q: str) -> dict:
+        """Suchwort → {wort im Index: gewicht} (exakt, Präfix, sonst Tippfehler)"""
+        treffer = {}
+        if q in self.token:
+            treffer[q] = 1.0
+        if len(q) >= 2:
+            i = bisect.bisect_left(self.wortliste, q)
+            while i < len(self.wortliste) and self.wortliste[i].startswith(q):
+                treffer.setdefault(self.wortliste[i], 0.8)
+                i += 1
+        if treffer or len(q) < 4:
+            return treffer
+        tq = _trigramme(q)
+        gemeinsam = Counter(w for t in tq for w in self.trigramme.get(t, ()))
+        for w, n in gemeinsam.items():
+            aehnlich = 2 * n / (len(tq) + len(w))        # Dice; " w " hat len(w) Trigramme
+            if aehnlich >= MIN_AEHNLICH:
+                treffer[w] = 0.6 * aehnlich
+        return treffer
+
+    def _wort_punkte(self, w: str) -> dict:
+        """Suchwort → {ziffer: punkte}, bester passender Indexwort-Treffer je Ziffer"""
+        beste = {}
+        for wort, gewicht in self._passende_woerter(w).items():
+            for z, feld in self.token[wort].items():
+                p = gewicht * feld
+                if p > beste.get(z, 0.0):
+                    beste[z] = p
+        return beste
+
+    def _suche(self, q: str, limit: int = 30) -> tuple:
+        """→ Ziffern, bestes Ergebnis zuerst"""
+        q = normalisiere(q).strip()
+        if not q:
+            return tuple(self.reihenfolge[:limit])
+        punkte, anzahl = {}, {}
+        if re.fullmatch(r"\d+[a-z]?", q):
+            for rang, z in enumerate(self._ziffern_mit_praefix(q)[:limit]):
+                punkte[z] = 10.0 if z == q else 5.0 - rang / 100
+        suchwoerter = woerter(q)
+        for w in suchwoerter:
+            for z, p in self.wort_punkte(w).items():
+                punkte[z] = punkte.get(z, 0.0) + p
+                anzahl[z] = anzahl.get(z, 0) + 1
+        alle, rang = len(suchwoerter), self.rang
+        besten = heapq.nsmallest(limit, ((anzahl.get(z, 0) != alle, -p, rang[z], z) for z, p in punkte.items()))
+        return tuple(t[3] for t in besten)
+
+    def ergebnisse(self, q: str, limit: int = 30) -> list:
+        return [self.eintraege[z] for z in self.suche(q, limit)]
+
+def _eintraege(daten, tarif: str, basis: dict | None = None) -> dict:
+    """dict ziffer→eintrag oder Liste → {ziffer: eintrag}; vorhandene Ziffern in basis gewinnen"""
+    eintraege = basis if basis is not None else {}
+    for e in (daten.values() if isinstance(daten, dict) else daten):
+        z = str(e.get("ziffer", "")).strip()
+        if z and z not in eintraege:
+            eintraege[z] = {**e, "ziffer": z, "tarif": tarif}
+    return eintraege
+
+def lade(dateien=KATALOG_DATEIEN) -> dict:
+    """Ziffern aus allen vorhandenen Dateien (dict ziffer→eintrag oder Liste), erste gewinnt"""
+    eintraege = {}
+    for pfad in dateien:
+        pfad = Path(pfad)
+        if pfad.exists():
+            with open(pfad, encoding="utf-8") as f:
+                _eintraege(json.load(f), BASIS_TARIF, eintraege)
+    return eintraege
+
+# ── Tarif-Versionen ──────────────────────────────────────────
+# Neben dem Basiskatalog (GOÄ 1996, unbefristet) liegen weitere Stände als
+# VERSIONEN_VERZEICHNIS/*.json, jeweils ein vollständiger Katalog:
+#   {"tarif": "GOÄ 2027", "gueltig_ab": "2027-01-01", "gueltig_bis": null, "ziffern": {…}}
+# Ein Stand gilt von gueltig_ab bis gueltig_bis bzw. bis zum nächsten Stand.
+# Maßgeblich ist das Leistungsdatum, nicht das Rechnungs- oder Einreichdatum.
+
+def datum_ordinal(datum) -> int:
+    """"2025-03-14", "14.03.2025", date/datetime → Tagesnummer; leer/unlesbar → heute"""
+    if isinstance(datum, int):
+        return datum
+    if isinstance(datum, datetime):
+        return datum.date().toordinal()
+    if isinstance(datum, date):
+        return datum.toordinal()
+    s = str(datum or "").strip()
+    try:
+        if re.fullmatch(r"\d{1,2}\.\d{1,2}\.\d{4}", s):
+            return datetime.strptime(s, "%d.%m.%Y").toordinal()
+        return date.fromisoformat(s[:10]).toordinal()
+    except ValueError:
+        return date.today().toordinal()
+
+class Version:
+    def __init__(self, tarif: str, ab: int, bis: int, eintraege: dict):
+        self.tarif, self.ab, self.bis, self.eintraege = tarif, ab, bis, eintraege
+        self._index = None
+
+    @property
+    def index(self) -> Index:
+        if self._index is None:                            # erst bei der ersten Suche bauen
+            self._index = Index(self.eintraege)
+        return self._index
+
+    def info(self) -> dict:
+        return {"tarif": self.tarif,
+                "gueltig_ab": date.fromordinal(self.ab).isoformat() if self.ab > 1 else None,
+                "gueltig_bis": date.fromordinal(self.bis - 1).isoformat() if self.bis < OFFEN else None,
+                "ziffern": len(self.eintraege)}
+
+class Tarif:
+    """Unveränderlicher Stand aller Versionen; wird beim Neuladen als Ganzes ersetzt"""
+
+    def __init__(self, versionen: list, signatur: tuple = ()):
+        self.signatur = signatur
+        versionen = sorted(versionen, key=lambda v: v.ab)
+        for v, naechste in zip(versionen, versionen[1:]):
+            v.bis = min(v.bis, naechste.ab)
+        self.versionen = [v for v in versionen if v.ab < v.bis]
+        self._starts = [v.ab for v in self.versionen]
+        # Zeitleiste je Ziffer: (Beginn-Tage, ((Ende, eintrag), …)) — bisect statt Versionssuche
+        leisten = defaultdict(lambda: ([], []))
+        for v in self.versionen:
+            for z, e in v.eintraege.items():
+                leisten[z][0].append(v.ab)
+                leisten[z][1].append((v.bis, e))
+        self._zeitleiste = {z: (tuple(a), tuple(b)) for z, (a, b) in leisten.items()}
+
+    def version(self, datum=None) -> Version | None:
+        tag = datum_ordinal(datum)
+        i = bisect.bisect_right(self._starts, tag) - 1
+        return self.versionen[i] if i >= 0 and tag < self.versionen[i].bis else None
+
+    def hole(self, ziffer, datum=None) -> dict | None:
+        """(ziffer, leistungsdatum) → eintrag des dann gültigen Tarifs, None falls unbekannt"""
+        leiste = self._zeitleiste.get(str(ziffer).strip())
+        if leiste is None:
+            return None
+        tag = datum_ordinal(datum)
+        i = bisect.bisect_right(leiste[0], tag) - 1
+        if i < 0:
+            return None
+        ende, eintrag = leiste[1][i]
+        return eintrag if tag < ende else None
+
+    def katalog(self, datum=None) -> dict:
+        v = self.version(datum)
+        return v.eintraege if v else {}
+
+    def index(self, datum=None) -> Index:
+        v = self.version(datum)
+        return v.index if v else Index({})
+
+def lade_versionen(dateien=KATALOG_DATEIEN, verzeichnis=None) -> list:
+    versionen = [Version(BASIS_TARIF, 1, OFFEN, lade(dateien))]
+    verzeichnis = Path(verzeichnis or VERSIONEN_VERZEICHNIS)
+    for pfad in sorted(verzeichnis.glob("*.json")) if verzeichnis.is_dir() else ():
+        with open(pfad, encoding="utf-8") as f:
+            daten = json.load(f)
+        tarif = daten.get("tarif") or pfad.stem
+        ab = date.fromisoformat(daten["gueltig_ab"]).toordinal()
+        bis = date.fromisoformat(daten["gueltig_bis"]).toordinal() + 1 if daten.get("gueltig_bis") else OFFEN
+        versionen.append(Version(tarif, ab, bis, _eintraege(daten["ziffern"], tarif)))
+    return versionen
+
+def _signatur(dateien=KATALOG_DATEIEN, verzeichnis=None) -> tuple:
+    verzeichnis = Path(verzeichnis or VERSIONEN_VERZEICHNIS)
+    pfade = [Path(p) for p in dateien] + (sorted(verzeichnis.glob("*.json")) if verzeichnis.is_dir() else [])
+    sig = []
+    for p in pfade:
+        try:
+            st = p.stat()
+            sig.append((str(p), st.st_mtime_ns, st.st_size))
+        except OSError:
+            pass
+    return tuple(sig)
+
+_tarif   = None
+_geprueft = 0.0
+_lock    = threading.Lock()
+
+def stand() -> Tarif:
+    """Aktueller Tarif-Stand; höchstens alle PRUEFEN_ALLE Sekunden auf geänderte Dateien
+    prüfen (mtime/Größe), dann neu bauen und die Referenz in einem Schritt tauschen.
+    Laufende Anfragen rechnen mit dem Stand weiter, den sie schon haben."""
+    global _tarif, _geprueft
+    if _tarif is not None and time.monotonic() - _geprueft < PRUEFEN_ALLE:
+        return _tarif
+    if not _lock.acquire(blocking=_tarif is None):     # baut gerade ein anderer Thread → alter Stand
+        return _tarif
+    try:
+        _geprueft = time.monotonic()
+        sig = _signatur()
+        if _tarif is None or sig != _tarif.signatur:
+            try:
+                _tarif = Tarif(lade_versionen(), sig)
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                if _tarif is None:
+                    raise
+                print(f"⚠️ GOÄ-Katalog nicht neu geladen, alter Stand bleibt: {e}")
+    finally:
+        _lock.release()
+    return _tarif
+
+def index(datum=None) -> Index:
+    return stand().index(datum)
+
+def katalog(datum=None) -> dict:
+    """{ziffer: eintrag} des am Datum (Standard: heute) gültigen Tarifs"""
+    return stand().katalog(datum)
+
+if __name__ == "__main__":
+    t0 = time.perf_counter()
+    tarif = stand()
+    print(f"\n🏥 GOÄ-Tarife — geladen in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    for v in tarif.versionen:
+        i = v.info()
+        print(f"  {i['tarif']:16} {i['gueltig_ab'] or '—':>10} … {i['gueltig_bis'] or 'offen':10} {i['ziffern']:>5} Ziffern")
+    t0 = time.perf_counter()
+    idx = index()
+    print(f"\n  Suchindex (heute): {len(idx.eintraege)} Ziffern, {len(idx.wortliste)} Wörter "
+          f"— in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    for q in sys.argv[1:] or ["beratung"]:
+        t0 = time.perf_counter()
+        treffer = idx._suche(q)
+        dt = (time.perf_counter() - t0) * 1e6
+        print(f"\n  {q!r} → {len(treffer)} Treffer in {dt:.0f} µs")
+        for z in treffer[:8]:
+            print(f"    {z:>6}  {idx.eintraege[z]['beschreibung']}")
+    print()
@@ -0,0 +1,71 @@
+"""
+HealthLedger Import
+===================
+Gemeinsame Import-Bibliothek für den CLI-Importer (tools/) und den
+HTTP-Endpoint /api/import/apple-health in main.py.
+
+  Quelle (apple_health, CSV, NDJSON) → Messungen → schreibe_messungen()
+  AppleHealthQuelle + NumPy          → Spalten   → schreibe_gruppen()
+
+Beispiel:
+    from importer import AppleHealthQuelle, importiere
+    stats = importiere(db, AppleHealthQuelle("export.zip"), person_id, "Sven")
+"""
+
+from collections import defaultdict
+
+from .quellen import Quelle, CsvQuelle, NdjsonQuelle, parse_date, quelle_fuer
+from .apple_health import AppleHealthQuelle, HK_MAP, HK_SKIP, MAX_WORKERS
+from .schreiber import finde_person, schreibe_messungen, schreibe_gruppen
+
+def importiere(db, quelle: Quelle, person_id: int | None, person_name: str,
+               zeitreihen: bool = False, bei_reihe=None, **kwargs) -> dict:
+    """Quelle vollständig durch den Schreiber laufen lassen → Statistik
+
+    Quellen mit spaltenweise=True (Apple Health + NumPy) gehen den
+    Spalten-Pfad, alle anderen den Pro-Record-Pfad. zeitreihen=True
+    (Puls/SpO2 → messreihen) braucht die Uhrzeit und damit den Spalten-Pfad;
+    bei_reihe siehe schreibe_gruppen().
+    """
+    stats = defaultdict(int)
+    if getattr(quelle, "spaltenweise", False):
+        schreibe_gruppen(db, quelle.gruppen(stats), person_id, person_name,
+                         notiz_prefix=quelle.name, stats=stats, zeitreihen=zeitreihen, bei_reihe=bei_reihe, **kwargs)
+    elif zeitreihen:
+        raise ValueError("Zeitreihen-Import braucht NumPy (spaltenweiser Pfad)")
+    else:
+        schreibe_messungen(db, quelle.messungen(stats), person_id, person_name,
+                           notiz_prefix=quelle.name, stats=stats, **kwargs)
+    return stats
+
+def importiere_und_auswerten(db, quelle: Quelle, person_id: int, person_name: str,
+                             zeitreihen: bool = False, **kwargs) -> dict:
+    """importiere() plus die Folgeschritte jedes echten Imports — gemeinsam für
+    den HTTP-Endpoint und tools/apple_health_importer.py:
+
+      Anomalien  neue messwerte-Zeilen und Zeitreihen-Samples (bei_reihe)
+                 schreiben die Zustände in messwerte_laufend fort
+      Verlauf    Rollups der Person neu berechnen (Zeitreihen-Tage werden
+                 gemischt, nicht nur ergänzt)
+
+    Committet; stats["auffaellig"] = Anzahl neu geflaggter Werte.
+    """
+    if kwargs.get("dry_run"):
+        return importiere(db, quelle, person_id, person_name, zeitreihen=zeitreihen, **kwargs)
+    import anomalien, verlauf
+
+    vorher = db.execute("SELECT COALESCE(MAX(id), 0) FROM messwerte").fetchone()[0]
+    auffaellig = []
+    stats = importiere(db, quelle, person_id, person_name, zeitreihen=zeitreihen,
+                       bei_reihe=lambda zeilen: auffaellig.append(anomalien.aktualisiere(db, zeilen)),
+                       **kwargs)
+    stats["auffaellig"] = sum(auffaellig) + anomalien.aktualisiere_ids(db, vorher + 1, 2**62)
+    db.commit()
+    verlauf.aktualisiere_alle(db, person_id)
+    return stats
+
+__all__ = [
+    "Quelle", "AppleHealthQuelle", "CsvQuelle", "NdjsonQuelle", "quelle_fuer",
+    "HK_MAP", "HK_SKIP", "MAX_WORKERS", "parse_date", "finde_person", "schreibe_messungen",
+    "schreibe_gruppen", "importiere", "importiere_und_auswerten",
+]
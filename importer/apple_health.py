@@ -0,0 +1,560 @@
+"""
+Apple Health Quelle
+===================
+Liest export.xml (oder export.zip) aus dem Apple Health Export und liefert
+Messungen im HealthLedger-Format.
+
+Apple Health XML Struktur:
+  <HealthData locale="de_DE">
+    <Record type="HKQuantityTypeIdentifierBodyMass"
+            sourceName="Sven's iPhone"
+            unit="kg"
+            startDate="2024-01-15 08:30:00 +0100"
+            endDate="2024-01-15 08:30:00 +0100"
+            value="82.4"/>
+    <Record type="HKQuantityTypeIdentifierBloodPressureSystolic" .../>
+    <Record type="HKQuantityTypeIdentifierBloodPressureDiastolic" .../>
+    ...
+  </HealthData>
+
+Zwei Parse-Modi:
+  workers=0   Streaming per XMLPullParser (ein Kern, konstanter RAM)
+  workers≥1   export.xml wird an <Record-Grenzen in Byte-Bereiche zerlegt,
+              jeder Bereich in einem eigenen Prozess geparst (inkl. HK_MAP-
+              Umrechnung). Die Ergebnisse kommen in Datei-Reihenfolge zurück,
+              so dass das Blutdruck-Pairing auch über Chunk-Grenzen stimmt.
+              Höchstens MAX_WORKERS (Kerne); die Prozesse werden per "spawn"
+              gestartet, nie per fork aus dem (threaded) Server.
+
+Zwei Umrechnungs-Pfade mit identischem Ergebnis:
+  messungen()  pro Record über HK_MAP["conv"] → schreibe_messungen()
+  gruppen()    mit NumPy spaltenweise pro Batch (spalten.py) → schreibe_gruppen()
+"""
+
+import xml.etree.ElementTree as ET
+import os, re, shutil, tempfile, zipfile
+from collections import defaultdict
+from itertools import islice, repeat
+from operator import itemgetter
+from pathlib import Path
+from xml.sax.saxutils import unescape
+
+from . import spalten
+from .quellen import Quelle, parse_date
+
+MAX_WORKERS = os.cpu_count() or 1
+
+
+# ── MAPPING ──────────────────────────────────────────────────────────────
+# HKType → (hl_typ, einheit_override, umrechnung_fn)
+#   conv:      Umrechnung pro Record (Fallback ohne NumPy)
+#   spalte:    dieselbe Umrechnung als Array-Operation (siehe spalten.py)
+#   plausibel: gültiger Bereich nach Umrechnung, alles außerhalb wird verworfen
+HK_MAP = {
+    # Gewicht
+    "HKQuantityTypeIdentifierBodyMass": {
+        "typ": "gewicht", "feld": "wert", "einheit": "kg",
+        "spalte": "runde1", "plausibel": (2, 400),
+        "conv": lambda v, u: (round(float(v), 1), None)
+    },
+    # Blutdruck (werden zusammengeführt)
+    "HKQuantityTypeIdentifierBloodPressureSystolic": {
+        "typ": "blutdruck", "feld": "wert", "einheit": "mmHg",
+        "spalte": "ganzzahl", "plausibel": (50, 300),
+        "conv": lambda v, u: (int(float(v)), None)
+    },
+    "HKQuantityTypeIdentifierBloodPressureDiastolic": {
+        "typ": "blutdruck", "feld": "wert2", "einheit": "mmHg",
+        "spalte": "ganzzahl", "plausibel": (20, 200),
+        "conv": lambda v, u: (int(float(v)), None)
+    },
+    # Blutzucker
+    "HKQuantityTypeIdentifierBloodGlucose": {
+        "typ": "blutzucker", "feld": "wert", "einheit": "mmol/L",
+        "spalte": "mgdl", "plausibel": (0.5, 40),
+        "conv": lambda v, u: (
+            round(float(v), 1) if u in ("mmol/L","mmol/l")
+            else round(float(v) / 18.0, 1),  # mg/dL → mmol/L
+            None
+        )
+    },
+    # Temperatur
+    "HKQuantityTypeIdentifierBodyTemperature": {
+        "typ": "temperatur", "feld": "wert", "einheit": "°C",
+        "spalte": "fahrenheit", "plausibel": (30, 45),
+        "conv": lambda v, u: (
+            round(float(v), 1) if u in ("°C","degC","C")
+            else round((float(v) - 32) * 5/9, 1),  # °F → °C
+            None
+        )
+    },
+    # Puls / Herzfrequenz
+    "HKQuantityTypeIdentifierHeartRate": {
+        "typ": "puls", "feld": "wert", "einheit": "BPM",
+        "spalte": "ganzzahl", "plausibel": (20, 260),
+        "conv": lambda v, u: (int(float(v)), None)
+    },
+    "HKQuantityTypeIdentifierRestingHeartRate": {
+        "typ": "puls", "feld": "wert", "einheit": "BPM",
+        "spalte": "ganzzahl", "plausibel": (20, 200),
+        "conv": lambda v, u: (int(float(v)), None)
+    },
+    # SpO2 / Sauerstoffsättigung
+    "HKQuantityTypeIdentifierOxygenSaturation": {
+        "typ": "laborwert", "feld": "wert", "einheit": "%",
+        "spalte": "anteil", "plausibel": (50, 100),
+        "name": "SpO2",
+        "conv": lambda v, u: (round(float(v) * 100, 1) if float(v) <= 1.0
+                              else round(float(v), 1), None)
+    },
+    # BMI
+    "HKQuantityTypeIdentifierBodyMassIndex": {
+        "typ": "laborwert", "feld": "wert", "einheit": "BMI",
+        "spalte": "runde1", "plausibel": (8, 80),
+        "name": "BMI",
+        "conv": lambda v, u: (round(float(v), 1), None)
+    },
+    # Körperfett
+    "HKQuantityTypeIdentifierBodyFatPercentage": {
+        "typ": "laborwert", "feld": "wert", "einheit": "%",
+        "spalte": "anteil", "plausibel": (1, 75),
+        "name": "Körperfett",
+        "conv": lambda v, u: (round(float(v) * 100, 1) if float(v) <= 1.0
+                              else round(float(v), 1), None)
+    },
+}
+
+# Diese Types komplett ignorieren (zu viel Rauschen)
+HK_SKIP = {
+    "HKQuantityTypeIdentifierStepCount",
+    "HKQuantityTypeIdentifierDistanceWalkingRunning",
+    "HKQuantityTypeIdentifierActiveEnergyBurned",
+    "HKQuantityTypeIdentifierBasalEnergyBurned",
+    "HKQuantityTypeIdentifierFlightsClimbed",
+    "HKQuantityTypeIdentifierDistanceCycling",
+    "HKCategoryTypeIdentifierSleepAnalysis",
+    "HKCategoryTypeIdentifierAppleStandHour",
+    "HKQuantityTypeIdentifierAppleExerciseTime",
+    "HKQuantityTypeIdentifierAppleStandTime",
+    "HKQuantityTypeIdentifierWalkingSpeed",
+    "HKQuantityTypeIdentifierWalkingStepLength",
+    "HKQuantityTypeIdentifierWalkingDoubleSupportPercentage",
+    "HKQuantityTypeIdentifierWalkingAsymmetryPercentage",
+    "HKQuantityTypeIdentifierStairAscentSpeed",
+    "HKQuantityTypeIdentifierStairDescentSpeed",
+    "HKQuantityTypeIdentifierVO2Max",
+    "HKQuantityTypeIdentifierEnvironmentalAudioExposure",
+    "HKQuantityTypeIdentifierHeadphoneAudioExposure",
+    "HKCategoryTypeIdentifierHandwashingEvent",
+    "HKCategoryTypeIdentifierMindfulSession",
+    "HKQuantityTypeIdentifierSixMinuteWalkTestDistance",
+}
+
+BP_TYPES = ("HKQuantityTypeIdentifierBloodPressureSystolic",
+            "HKQuantityTypeIdentifierBloodPressureDiastolic")
+
+
+# ── DOCTYPE ──────────────────────────────────────────────────────────────
+# Apple Health DTD-Bug umgehen (iOS 16+): die interne DTD bringt expat aus
+# dem Tritt, also wird der komplette <!DOCTYPE …]> Block entfernt.
+
+_HEAD_BYTES = 64 * 1024
+
+def strip_doctype(head: bytes) -> bytes | None:
+    """DOCTYPE aus dem Dateianfang entfernen (None = Block noch unvollständig)"""
+    i = head.find(b"<!DOCTYPE")
+    if i < 0:
+        return head
+    bracket = head.find(b"[", i)
+    close   = head.find(b">", i)
+    if close < 0:
+        return None
+    if 0 <= bracket < close:
+        # Interne DTD: endet mit "]>" (ggf. mit Whitespace dazwischen)
+        m = re.compile(rb"\]\s*>").search(head, bracket)
+        if not m:
+            return None
+        return head[:i] + head[m.end():]
+    return head[:i] + head[close + 1:]
+
+def _finde_export_xml(z: zipfile.ZipFile) -> str:
+    # Suche export.xml
+    xml_files = [f for f in z.namelist() if "export.xml" in f and "cda" not in f.lower()]
+    if not xml_files:
+        raise FileNotFoundError("export.xml nicht in ZIP gefunden")
+    return xml_files[0]
+
+# ── RECORD → MESSUNG ─────────────────────────────────────────────────────
+
+def _event(hk_type: str, mapping: dict, val, dt_str: str):
+    datum = parse_date(dt_str)
+    if hk_type in BP_TYPES:
+        # Minuten-genau für Pairing
+        return ("bp", dt_str[:16], "sys" if "Systolic" in hk_type else "dia", val, datum)
+    return ("rec", mapping["typ"], mapping.get("einheit", ""), datum,
+            mapping.get("name", ""), mapping["feld"], val)
+
+def record_event(hk_type: str, value_str: str, unit_str: str, dt_str: str,
+                 stats: dict, skipped_types: set):
+    """Ein <Record> → kompaktes Event-Tupel (oder None wenn irrelevant)
+
+    ("bp",  pairing_key, "sys"|"dia", wert, datum)
+    ("rec", typ, einheit, datum, notiz, feld, wert)
+    """
+    if hk_type in HK_SKIP:
+        return None
+    mapping = HK_MAP.get(hk_type)
+    if mapping is None:
+        skipped_types.add(hk_type)
+        return None
+    if not value_str:
+        return None
+
+    try:
+        conv_val, _ = mapping["conv"](value_str, unit_str)
+    except (ValueError, ZeroDivisionError):
+        stats["fehler"] += 1
+        return None
+    lo, hi = mapping["plausibel"]
+    if not lo <= conv_val <= hi:
+        stats["unplausibel"] += 1
+        return None
+    return _event(hk_type, mapping, conv_val, dt_str)
+
+def konvertiere(raw_iter, stats: dict, skipped_types: set):
+    """Rohe Records → Events (Pro-Record-Pfad)"""
+    for r in raw_iter:
+        ev = record_event(*r, stats, skipped_types)
+        if ev: yield ev
+
+def sammle_events(event_streams, stats: dict):
+    """Events in Datei-Reihenfolge → Messungen
+
+    Der Blutdruck-Puffer lebt über alle Streams hinweg, damit Systolisch/
+    Diastolisch auch dann gepaart werden, wenn sie auf zwei Chunks liegen.
+    """
+    bp_buffer = defaultdict(dict)    # date+time → {sys: x, dia: y}
+
+    for events in event_streams:
+        for ev in events:
+            if ev[0] == "bp":
+                _, key, side, val, datum = ev
+                bp_buffer[key][side] = val
+                bp_buffer[key]["datum"] = datum
+                # Wenn beide vorhanden → als eine Messung liefern
+                if "sys" in bp_buffer[key] and "dia" in bp_buffer[key]:
+                    bp = bp_buffer.pop(key)
+                    stats["gemappt"] += 1
+                    yield {"typ": "blutdruck", "wert": bp["sys"], "wert2": bp["dia"],
+                           "einheit": "mmHg", "datum": datum, "notiz": ""}
+            else:
+                _, typ, einheit, datum, notiz, feld, val = ev
+                entry = {"typ": typ, "einheit": einheit, "datum": datum,
+                         "notiz": notiz, "wert": None, "wert2": None}
+                entry[feld] = val
+                stats["gemappt"] += 1
+                yield entry
+    stats["bp_ungepaart"] += len(bp_buffer)
+
+# ── SPALTENWEISE (NumPy) ─────────────────────────────────────────────────
+# Gleiche Ergebnisse wie record_event() + sammle_events(), aber pro Batch:
+# Werte eines HK-Typs landen in einem Array, Umrechnung + Plausibilität
+# laufen in spalten.py, Gruppen gehen ohne Messungs-dicts an den Schreiber.
+
+_HK_CODES = {hk: i for i, hk in enumerate(HK_MAP)}
+_HK_LISTE = list(HK_MAP)
+
+def _pick(spalte: list, idx) -> list:
+    """spalte[idx] für einen Index-Array, ohne Python-Schleife"""
+    idx = idx.tolist()
+    if not idx:
+        return []
+    if len(idx) == 1:
+        return [spalte[idx[0]]]
+    return list(itemgetter(*idx)(spalte))
+
+def gruppen_batch(raw: list, pos0: int, stats: dict, skipped_types: set):
+    """
+    Ein Batch roher Records → (gruppen, bp_haelften)
+
+    raw:   [(hk_type, value_str, unit_str, dt_str), …] in Datei-Reihenfolge
+    pos0:  Position des ersten Records im Export
+
+    gruppen:     eine Spalten-Gruppe pro HK-Typ (Format siehe spalten.py)
+    bp_haelften: [(pos, pairing_key, "sys"|"dia", wert, datum), …] nach pos
+                 sortiert — Blutdruck wird über Batches hinweg gepaart
+    """
+    np = spalten.np
+    gruppen, bp_haelften = [], []
+    if not raw:
+        return gruppen, bp_haelften
+    typen, werte_str, einheiten, daten = (list(map(itemgetter(i), raw)) for i in range(4))
+    skipped_types |= set(typen) - _HK_CODES.keys() - HK_SKIP
+    codes = np.array(list(map(_HK_CODES.get, typen, repeat(-1, len(typen)))), dtype=np.int16)
+
+    for code in np.unique(codes[codes >= 0]).tolist():
+        hk_type = _HK_LISTE[code]
+        mapping = HK_MAP[hk_type]
+        idx = np.flatnonzero(codes == code)
+        w = _pick(werte_str, idx)
+        if "" in w:
+            voll = np.array([bool(v) for v in w])
+            idx, w = idx[voll], [v for v in w if v]
+        positionen, werte, n_fehler, n_unplausibel = spalten.konvertiere_spalte(
+            mapping["spalte"], w, _pick(einheiten, idx), mapping["plausibel"])
+        stats["fehler"] += n_fehler
+        stats["unplausibel"] += n_unplausibel
+        if not len(positionen):
+            continue
+
+        idx = idx[positionen]
+        dts = _pick(daten, idx)
+        datum, sekunden = spalten.zeit_spalten(dts)
+        if hk_type in BP_TYPES:
+            side = "sys" if "Systolic" in hk_type else "dia"
+            bp_haelften += zip((idx + pos0).tolist(), [dt[:16] for dt in dts],
+                               [side] * len(dts), werte.tolist(), datum.tolist())
+            continue
+        gruppen.append({"typ": mapping["typ"], "einheit": mapping.get("einheit", ""),
+                        "notiz": mapping.get("name", ""), "pos": idx + pos0,
+                        "datum": datum, "sekunden": sekunden, "wert": werte, "wert2": None})
+
+    bp_haelften.sort()
+    return gruppen, bp_haelften
+
+def _paare_bp(bp_haelften: list, bp_buffer: dict) -> dict | None:
+    """Blutdruck-Hälften paaren (wie sammle_events) → blutdruck-Gruppe"""
+    np = spalten.np
+    pos, datum, sys_, dia = [], [], [], []
+    for p, key, side, val, d in bp_haelften:
+        bp_buffer[key][side] = val
+        bp_buffer[key]["datum"] = d
+        if "sys" in bp_buffer[key] and "dia" in bp_buffer[key]:
+            bp = bp_buffer.pop(key)
+            pos.append(p); datum.append(d); sys_.append(bp["sys"]); dia.append(bp["dia"])
+    if not pos:
+        return None
+    return {"typ": "blutdruck", "einheit": "mmHg", "notiz": "",
+            "pos": np.array(pos, dtype=np.int64), "datum": np.array(datum, dtype="U10"),
+            "wert": np.array(sys_, dtype=np.int64), "wert2": np.array(dia, dtype=np.int64)}
+
+def sammle_gruppen(batches, stats: dict):
+    """(gruppen, bp_haelften) in Datei-Reihenfolge → fertige Gruppen-Batches"""
+    bp_buffer = defaultdict(dict)
+    for gruppen, bp_haelften in batches:
+        bp = _paare_bp(bp_haelften, bp_buffer)
+        if bp is not None:
+            gruppen = gruppen + [bp]
+        stats["gemappt"] += sum(len(g["pos"]) for g in gruppen)
+        yield gruppen
+    stats["bp_ungepaart"] += len(bp_buffer)
+
+def _batches(raw_iter, stats: dict, skipped_types: set):
+    """Rohe Records in Batches à spalten.BATCH_RECORDS schneiden"""
+    raw_iter, pos0 = iter(raw_iter), 0
+    while batch := list(islice(raw_iter, spalten.BATCH_RECORDS)):
+        yield gruppen_batch(batch, pos0, stats, skipped_types)
+        pos0 += len(batch)
+
+# ── STREAMING (ein Kern) ─────────────────────────────────────────────────
+
+_READ_BYTES = 1024 * 1024
+
+def _stream_records(f, stats: dict):
+    """export.xml inkrementell parsen → (type, value, unit, date); Elemente
+    werden sofort wieder verworfen"""
+    parser = ET.XMLPullParser(events=("start", "end"))
+    head = f.read(_HEAD_BYTES)
+    cleaned = strip_doctype(head)
+    while cleaned is None:
+        more = f.read(_HEAD_BYTES)
+        if not more:
+            cleaned = head
+            break
+        head += more
+        cleaned = strip_doctype(head)
+    parser.feed(cleaned)
+
+    root = None
+    while True:
+        for event, elem in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = elem
+                continue
+            if elem.tag == "Record":
+                stats["total_raw"] += 1
+                yield (elem.get("type", ""), elem.get("value", ""), elem.get("unit", ""),
+                       elem.get("startDate", elem.get("endDate", "")))
+            if elem is not root:
+                root.clear()
+        chunk = f.read(_READ_BYTES)
+        if not chunk:
+            break
+        parser.feed(chunk)
+    parser.close()
+
+# ── PARALLEL-MODUS ───────────────────────────────────────────────────────
+
+RECORD_TAG   = b"<Record"
+CHUNK_BYTES  = 32 * 1024 * 1024          # Ziel-Chunkgröße (RAM pro Worker)
+_SCAN_BLOCK  = 1024 * 1024
+_RECORD_RE   = re.compile(rb'<Record\s((?:[^>"]|"[^"]*")*)>')
+_ATTR_RE     = re.compile(rb'(\w+)="([^"]*)"')
+
+def _finde_record(f, pos: int, end: int) -> int:
+    """Offset des nächsten <Record ab pos (oder -1)"""
+    f.seek(pos)
+    overlap = len(RECORD_TAG) - 1
+    while pos < end:
+        block = f.read(_SCAN_BLOCK)
+        if not block:
+            break
+        i = block.find(RECORD_TAG)
+        if i >= 0:
+            return pos + i
+        pos += len(block) - overlap
+        f.seek(pos)
+    return -1
+
+def split_ranges(xml_path: Path, n_chunks: int) -> list:
+    """export.xml in max. n_chunks Byte-Bereiche schneiden, jeweils ab <Record"""
+    size = xml_path.stat().st_size
+    with open(xml_path, "rb") as f:
+        # DOCTYPE enthält nur "<!ATTLIST Record" → erster Treffer ist ein echter Record
+        start = _finde_record(f, 0, size)
+        if start < 0:
+            return []
+        bounds = [start]
+        step = max((size - start) // max(n_chunks, 1), 1)
+        for i in range(1, n_chunks):
+            pos = _finde_record(f, start + i * step, size)
+            if pos < 0:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _parse_range(args):
+    """Worker: Byte-Bereich parsen → (ergebnis, total, fehler, unplausibel, unbekannte Typen)
+
+    ergebnis sind Events (Pro-Record) bzw. (gruppen, bp_haelften) mit
+    Positionen relativ zum Chunk-Anfang (spaltenweise)
+    """
+    path, start, end, spaltenweise = args
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    raw = []
+    for m in _RECORD_RE.finditer(data):
+        attrs = dict(_ATTR_RE.findall(m.group(1)))
+        hk_type = attrs.get(b"type", b"").decode()
+        dt = attrs.get(b"startDate") or attrs.get(b"endDate") or b""
+        raw.append((hk_type, _attr_str(attrs.get(b"value", b"")),
+                    _attr_str(attrs.get(b"unit", b"")), dt.decode()))
+
+    stats = defaultdict(int)
+    skipped_types = set()
+    if spaltenweise:
+        ergebnis = gruppen_batch(raw, 0, stats, skipped_types)
+    else:
+        ergebnis = list(konvertiere(raw, stats, skipped_types))
+    return ergebnis, len(raw), stats["fehler"], stats["unplausibel"], skipped_types
+
+def _attr_str(raw: bytes) -> str:
+    s = raw.decode("utf-8", "replace")
+    return unescape(s, {"&quot;": '"'}) if "&" in s else s
+
+def _parallel_events(xml_path: Path, workers: int, stats: dict, skipped_types: set,
+                     spaltenweise: bool):
+    """Byte-Bereiche im Prozess-Pool parsen, Ergebnisse geordnet liefern"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = min(workers, MAX_WORKERS)
+    size = xml_path.stat().st_size
+    n_chunks = max(workers * 4, size // CHUNK_BYTES + 1)
+    ranges = split_ranges(xml_path, n_chunks)
+    stats["chunks"] = len(ranges)
+
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        # map() liefert in Eingabe-Reihenfolge → BP-Pairing über Chunk-Grenzen bleibt korrekt
+        for ergebnis, total, fehler, unplausibel, skipped in pool.map(
+                _parse_range, [(str(xml_path), a, b, spaltenweise) for a, b in ranges]):
+            if spaltenweise:
+                # Chunk-relative Positionen → Position im Export
+                gruppen, bp_haelften = ergebnis
+                for g in gruppen:
+                    g["pos"] += stats["total_raw"]
+                ergebnis = (gruppen, [(h[0] + stats["total_raw"],) + h[1:] for h in bp_haelften])
+            stats["total_raw"] += total
+            stats["fehler"] += fehler
+            stats["unplausibel"] += unplausibel
+            skipped_types |= skipped
+            yield ergebnis
+
+# ── QUELLE ───────────────────────────────────────────────────────────────
+
+class AppleHealthQuelle(Quelle):
+    """export.zip / export.xml aus der Health-App"""
+
+    name = "Apple Health"
+
+    def __init__(self, pfad, workers: int = 0, format: str | None = None,
+                 spaltenweise: bool | None = None):
+        self.pfad = Path(pfad)
+        self.workers = workers
+        # None = automatisch, sobald NumPy installiert ist
+        self.spaltenweise = spalten.verfuegbar() if spaltenweise is None else spaltenweise
+        self.format = (format or self.pfad.suffix.lstrip(".")).lower()
+        self.skipped_types = set()
+        if self.format not in ("zip", "xml"):
+            raise ValueError(f"Unbekanntes Format: {self.pfad.suffix}")
+
+    def messungen(self, stats: dict):
+        """Pro-Record-Pfad: Messungs-dicts für schreibe_messungen()"""
+        if self.workers and self.workers >= 1:
+            streams = self._parallel(stats, spaltenweise=False)
+        else:
+            streams = [self._stream(stats, spaltenweise=False)]
+        yield from sammle_events(streams, stats)
+        stats["unbekannte_typen"] = len(self.skipped_types)
+
+    def gruppen(self, stats: dict):
+        """Spaltenweiser Pfad: Gruppen-Batches für schreibe_gruppen()"""
+        if self.workers and self.workers >= 1:
+            batches = self._parallel(stats, spaltenweise=True)
+        else:
+            batches = self._stream(stats, spaltenweise=True)
+        yield from sammle_gruppen(batches, stats)
+        stats["unbekannte_typen"] = len(self.skipped_types)
+
+    def _stream(self, stats: dict, spaltenweise: bool):
+        verarbeite = _batches if spaltenweise else konvertiere
+        if self.format == "zip":
+            with zipfile.ZipFile(self.pfad) as z, z.open(_finde_export_xml(z)) as f:
+                yield from verarbeite(_stream_records(f, stats), stats, self.skipped_types)
+        else:
+            with open(self.pfad, "rb") as f:
+                yield from verarbeite(_stream_records(f, stats), stats, self.skipped_types)
+
+    def _parallel(self, stats: dict, spaltenweise: bool):
+        if self.format == "xml":
+            yield from _parallel_events(self.pfad, self.workers, stats, self.skipped_types,
+                                        spaltenweise)
+            return
+        # ZIP: export.xml einmal auf Platte entpacken, Worker brauchen Byte-Offsets
+        fd, tmp_name = tempfile.mkstemp(suffix=".xml", dir=self.pfad.parent)
+        tmp_path = Path(tmp_name)
+        try:
+            with zipfile.ZipFile(self.pfad) as z, \
+                 os.fdopen(fd, "wb") as out, z.open(_finde_export_xml(z)) as src:
+                shutil.copyfileobj(src, out, _SCAN_BLOCK)
+            yield from _parallel_events(tmp_path, self.workers, stats, self.skipped_types,
+                                        spaltenweise)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
@@ -0,0 +1,133 @@
+"""
+Import-Quellen
+==============
+Eine Quelle liefert Messungen als dicts im messwerte-Format:
+
+  {"typ": "blutdruck", "wert": 128, "wert2": 84, "einheit": "mmHg",
+   "datum": "2024-01-15", "notiz": ""}
+
+Deduplizierung und Batch-Insert übernimmt der Schreiber — eine neue
+Geräte-Quelle muss nur messungen() implementieren.
+"""
+
+import csv, json
+from datetime import datetime, date
+from pathlib import Path
+
+def parse_date(dt_str: str) -> str:
+    """Apple Health / Geräte-Datum → YYYY-MM-DD"""
+    if not dt_str: return date.today().isoformat()
+    # Schneller Pfad: ISO-Präfix (Apple: "2024-01-15 08:30:00 +0100")
+    if len(dt_str) >= 10 and dt_str[4] == "-" and dt_str[7] == "-" and dt_str[:4].isdigit():
+        return dt_str[:10]
+    for fmt in ("%d.%m.%Y %H:%M", "%d.%m.%Y", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(dt_str[:len(fmt) + 2].strip(), fmt).strftime("%Y-%m-%d")
+        except ValueError: pass
+    return dt_str[:10]
+
+
+class Quelle:
+    """Basisklasse für Import-Quellen"""
+
+    name = "Import"
+
+    def messungen(self, stats: dict):
+        """Generator über Messungen; Zähler (fehler, total_raw, …) in stats"""
+        raise NotImplementedError
+
+
+class _ZeilenQuelle(Quelle):
+    """Gemeinsame Logik für zeilenbasierte Geräte-Exporte (CSV, NDJSON)
+
+    spalten:  Quell-Spalte → messwerte-Feld, z.B. {"Datum": "datum",
+              "SYS": "wert", "DIA": "wert2"}
+    typ:      fester Typ, wenn die Datei keine typ-Spalte hat (Waage → "gewicht")
+    einheit:  feste Einheit, analog zu typ
+    """
+
+    FELDER = ("typ", "wert", "wert2", "einheit", "datum", "notiz")
+
+    def __init__(self, pfad, typ: str | None = None, einheit: str | None = None,
+                 spalten: dict | None = None, name: str | None = None):
+        self.pfad = Path(pfad)
+        self.typ = typ
+        self.einheit = einheit
+        self.spalten = spalten or {}
+        if name: self.name = name
+
+    def _zeilen(self):
+        raise NotImplementedError
+
+    def messungen(self, stats: dict):
+        for roh in self._zeilen():
+            stats["total_raw"] += 1
+            m = self._mappe(roh)
+            if m is None:
+                stats["fehler"] += 1
+                continue
+            stats["gemappt"] += 1
+            yield m
+
+    def _mappe(self, roh: dict) -> dict | None:
+        zeile = {self.spalten.get(k, k): v for k, v in roh.items()}
+        typ = self.typ or zeile.get("typ")
+        try:
+            wert  = float(str(zeile["wert"]).replace(",", "."))
+            wert2 = zeile.get("wert2")
+            wert2 = float(str(wert2).replace(",", ".")) if wert2 not in (None, "") else None
+        except (KeyError, ValueError, TypeError):
+            return None
+        if not typ:
+            return None
+        return {"typ": typ, "wert": wert, "wert2": wert2,
+                "einheit": self.einheit or zeile.get("einheit") or "",
+                "datum": parse_date(str(zeile.get("datum") or "")),
+                "notiz": zeile.get("notiz") or ""}
+
+
+class CsvQuelle(_ZeilenQuelle):
+    """CSV-Export (Waage, Blutdruckmessgerät) — Trennzeichen wird erkannt"""
+
+    name = "CSV"
+
+    def _zeilen(self):
+        with open(self.pfad, newline="", encoding="utf-8-sig") as f:
+            probe = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(probe, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            yield from csv.DictReader(f, dialect=dialect)
+
+
+class NdjsonQuelle(_ZeilenQuelle):
+    """NDJSON — ein JSON-Objekt pro Zeile"""
+
+    name = "NDJSON"
+
+    def _zeilen(self):
+        with open(self.pfad, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError:
+                    obj = {}
+                yield obj if isinstance(obj, dict) else {}
+
+
+def quelle_fuer(pfad, **kwargs) -> Quelle:
+    """Passende Quelle anhand der Dateiendung"""
+    from .apple_health import AppleHealthQuelle
+    suffix = Path(pfad).suffix.lower()
+    if suffix in (".zip", ".xml"):
+        return AppleHealthQuelle(pfad, **kwargs)
+    if suffix == ".csv":
+        return CsvQuelle(pfad, **kwargs)
+    if suffix in (".ndjson", ".jsonl"):
+        return NdjsonQuelle(pfad, **kwargs)
+    raise ValueError(f"Unbekanntes Format: {suffix}")
@@ -0,0 +1,201 @@
+"""
+Schreiber — gemeinsamer Write-Pfad aller Import-Quellen
+========================================================
+  - Deduplizierung: pro Typ + Tag max. max_per_day Messungen, Tage mit
+    bereits vorhandenen Messungen werden übersprungen
+  - Batch-Insert per executemany, ein Commit am Ende
+
+schreibe_messungen() nimmt Messungs-dicts (jede Quelle), schreibe_gruppen()
+die Spalten-Batches aus AppleHealthQuelle.gruppen() (NumPy) und kann Puls/
+SpO2 optional in den Zeitreihen-Speicher (zeitreihen.py) umleiten.
+"""
+
+from collections import defaultdict
+
+BATCH_SIZE = 5000
+
+INSERT_SQL = """
+    INSERT INTO messwerte (person_id, person, typ, wert, wert2, einheit, datum, notiz)
+    VALUES (?,?,?,?,?,?,?,?)
+"""
+
+def finde_person(db, person_name: str):
+    """Person per exaktem Namen, sonst per Vorname-Präfix → Row(id, name) oder None"""
+    if not person_name: return None
+    row = db.execute("SELECT id, name FROM personen WHERE name=?", (person_name,)).fetchone()
+    if row: return row
+    return db.execute("SELECT id, name FROM personen WHERE name LIKE ?",
+                      (person_name.split()[0] + "%",)).fetchone()
+
+def vorhandene_tage(db, person_id: int) -> set:
+    """{(typ, datum)} aller gespeicherten Messungen der Person"""
+    return {(r[0], r[1]) for r in db.execute(
+        "SELECT typ, datum FROM messwerte WHERE person_id=?", (person_id,))}
+
+def schreibe_messungen(db, messungen, person_id: int | None, person_name: str,
+                       notiz_prefix: str = "Import",
+                       dry_run: bool = False,
+                       deduplicate: bool = True,
+                       max_per_day: int = 3,
+                       stats: dict | None = None,
+                       batch_size: int = BATCH_SIZE) -> dict:
+    """
+    Messungen (Generator einer Quelle) deduplizieren und in messwerte schreiben.
+
+    Args:
+        db:           SQLite-Verbindung (bei dry_run ohne DB: None)
+        messungen:    Iterable von Messungs-dicts (siehe quellen.py)
+        notiz_prefix: "Apple Health" → notiz "Apple Health Import (SpO2)"
+        dry_run:      Nur zählen, nichts schreiben
+
+    Returns:
+        stats mit zu_importieren, importiert, dedupliziert, bereits_vorhanden
+        und einem Zähler pro Typ
+    """
+    stats = stats if stats is not None else defaultdict(int)
+    existing = vorhandene_tage(db, person_id) if (deduplicate and db is not None and person_id) else set()
+    day_type_count = defaultdict(int)
+    batch = []
+    basis_notiz = f"{notiz_prefix} Import"
+
+    for m in messungen:
+        key = (m["typ"], m["datum"])
+        if deduplicate:
+            # Pro Tag + Typ max. max_per_day Messungen (Watch sendet oft stündlich)
+            if key in existing:
+                stats["bereits_vorhanden"] += 1
+                continue
+            if day_type_count[key] >= max_per_day:
+                stats["dedupliziert"] += 1
+                continue
+            day_type_count[key] += 1
+
+        stats["zu_importieren"] += 1
+        stats[m["typ"]] += 1
+        if dry_run:
+            continue
+
+        notiz = basis_notiz + (f" ({m['notiz']})" if m.get("notiz") else "")
+        batch.append((person_id, person_name, m["typ"], m.get("wert"), m.get("wert2"),
+                      m.get("einheit"), m["datum"], notiz))
+        if len(batch) >= batch_size:
+            db.executemany(INSERT_SQL, batch)
+            stats["importiert"] += len(batch)
+            batch.clear()
+
+    if batch:
+        db.executemany(INSERT_SQL, batch)
+        stats["importiert"] += len(batch)
+    if not dry_run and db is not None:
+        db.commit()
+    return stats
+
+def schreibe_gruppen(db, batches, person_id: int | None, person_name: str,
+                     notiz_prefix: str = "Import",
+                     dry_run: bool = False,
+                     deduplicate: bool = True,
+                     max_per_day: int = 3,
+                     stats: dict | None = None,
+                     zeitreihen: bool = False,
+                     bei_reihe=None) -> dict:
+    """
+    Spaltenweises Gegenstück zu schreibe_messungen() — gleiche Regeln,
+    gleiche Statistik, aber Deduplizierung per NumPy und executemany direkt
+    aus den Spalten (Gruppen-Format siehe spalten.py).
+
+    zeitreihen=True: Puls + SpO2 (zeitreihen.REIHEN_TYPEN) werden ohne
+    max_per_day komplett in den Zeitreihen-Speicher (messreihen) geschrieben
+    statt als Einzelzeilen nach messwerte. bei_reihe(zeilen) bekommt dann
+    pro Tag die neu hinzugekommenen Samples im messwerte-Format (id None,
+    datum mit Uhrzeit), z.B. für anomalien.aktualisiere().
+    """
+    from itertools import repeat
+    from .spalten import np, dedup_maske
+
+    stats = stats if stats is not None else defaultdict(int)
+    existing = vorhandene_tage(db, person_id) if (deduplicate and db is not None and person_id) else set()
+    day_type_count = {}
+    basis_notiz = f"{notiz_prefix} Import"
+    if zeitreihen:
+        from zeitreihen import REIHEN_TYPEN
+    else:
+        REIHEN_TYPEN = set()
+
+    for gruppen in batches:
+        nach_typ = defaultdict(list)
+        for g in gruppen:
+            if (g["typ"], g["notiz"]) in REIHEN_TYPEN:
+                _schreibe_reihe(db, g, person_id, basis_notiz, dry_run, stats, bei_reihe)
+                continue
+            nach_typ[g["typ"]].append(g)
+
+        for typ, gs in nach_typ.items():
+            # max_per_day zählt in Datei-Reihenfolge über alle Gruppen eines Typs
+            # (Puls = HeartRate + RestingHeartRate, laborwert = SpO2/BMI/Körperfett)
+            if not deduplicate:
+                masken = [np.ones(len(g["pos"]), dtype=bool) for g in gs]
+            else:
+                if len(gs) == 1:
+                    order, datum = None, gs[0]["datum"]
+                else:
+                    order = np.argsort(np.concatenate([g["pos"] for g in gs]), kind="stable")
+                    datum = np.concatenate([g["datum"] for g in gs])[order]
+                keep, n_vorhanden, n_dedup = dedup_maske(datum, existing, day_type_count,
+                                                         typ, max_per_day)
+                stats["bereits_vorhanden"] += n_vorhanden
+                stats["dedupliziert"] += n_dedup
+                if order is not None:
+                    zurueck = np.empty_like(keep)
+                    zurueck[order] = keep
+                    keep = zurueck
+                grenzen = np.cumsum([len(g["pos"]) for g in gs])[:-1]
+                masken = np.split(keep, grenzen)
+
+            for g, keep in zip(gs, masken):
+                n = int(keep.sum())
+                if not n:
+                    continue
+                stats["zu_importieren"] += n
+                stats[typ] += n
+                if dry_run:
+                    continue
+                notiz = basis_notiz + (f" ({g['notiz']})" if g["notiz"] else "")
+                wert2 = repeat(None) if g["wert2"] is None else g["wert2"][keep].tolist()
+                db.executemany(INSERT_SQL, zip(
+                    repeat(person_id), repeat(person_name), repeat(typ),
+                    g["wert"][keep].tolist(), wert2, repeat(g["einheit"]),
+                    g["datum"][keep].tolist(), repeat(notiz)))
+                stats["importiert"] += n
+
+    if not dry_run and db is not None:
+        db.commit()
+    return stats
+
+def _schreibe_reihe(db, g: dict, person_id: int | None, basis_notiz: str,
+                    dry_run: bool, stats: dict, bei_reihe=None) -> None:
+    """Eine Spalten-Gruppe tageweise in den Zeitreihen-Speicher schreiben"""
+    from zeitreihen import lese_tag, schreibe_tag, uhrzeit
+    from .spalten import np
+
+    n = len(g["pos"])
+    stats["zu_importieren"] += n
+    stats["zeitreihe"] += n
+    stats[g["typ"]] += n
+    if dry_run:
+        return
+    notiz = basis_notiz + (f" ({g['notiz']})" if g["notiz"] else "")
+    order = np.argsort(g["datum"], kind="stable")
+    tage, grenzen = np.unique(g["datum"][order], return_index=True)
+    for tag, a, b in zip(tage.tolist(), grenzen.tolist(), np.r_[grenzen[1:], n].tolist()):
+        sel = order[a:b]
+        offsets, werte = g["sekunden"][sel].tolist(), g["wert"][sel].tolist()
+        if bei_reihe is not None:
+            # erneuter Import desselben Exports: vorhandene Offsets zählen nicht neu
+            vorhanden = set(lese_tag(db, person_id, g["typ"], tag, notiz)[0])
+            neu = {o: w for o, w in zip(offsets, werte) if o not in vorhanden}
+        schreibe_tag(db, person_id, g["typ"], tag, notiz, g["einheit"], offsets, werte)
+        if bei_reihe is not None and neu:
+            bei_reihe([{"id": None, "person_id": person_id, "typ": g["typ"], "notiz": notiz,
+                        "wert": neu[o], "wert2": None, "datum": f"{tag} {uhrzeit(o)}"}
+                       for o in sorted(neu)])
+    stats["importiert"] += n
@@ -0,0 +1,178 @@
+"""
+Spaltenweise Ingestion
+======================
+Statt pro Record conv-Lambda + float() aufzurufen, werden die Rohwerte
+eines Batches pro HK-Typ in typisierte Arrays gesammelt; Einheiten-
+Umrechnung, Rundung, Plausibilitätsprüfung und Deduplizierung laufen als
+NumPy-Operationen, der Insert per executemany direkt aus den Spalten.
+
+Ein Batch ist eine Liste von Gruppen — eine Gruppe pro HK-Typ:
+
+  {"typ": "gewicht", "einheit": "kg", "notiz": "",
+   "pos":   int64[n],     # Position im Export (Datei-Reihenfolge)
+   "datum": <U10[n],      # YYYY-MM-DD
+   "sekunden": int32[n],  # Uhrzeit als Sekunden seit Mitternacht
+   "wert":  float64|int64[n],
+   "wert2": int64[n] | None}
+
+NumPy ist optional — ohne NumPy bleibt der Importer beim Pro-Record-Pfad
+(HK_MAP["conv"] → messungen()), der dieselben Ergebnisse liefert.
+"""
+
+from .quellen import parse_date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BATCH_RECORDS = 100_000
+
+MMOL_EINHEITEN    = ("mmol/L", "mmol/l")
+CELSIUS_EINHEITEN = ("°C", "degC", "C")
+
+def verfuegbar() -> bool:
+    return np is not None
+
+# ── UMRECHNUNG ───────────────────────────────────────────────────────────
+
+def _round1(v):
+    """Wie round(x, 1) pro Element
+
+    np.round() rechnet x*10 und rundet dann — bei Werten wie 84.45 (binär
+    knapp über .45) landet das Produkt exakt auf .5 und wird zur geraden
+    Zahl abgerundet, Python rundet korrekt auf 84.5. Diese (seltenen)
+    Gleichstände werden einzeln mit round() nachgerechnet.
+    """
+    y = v * 10
+    out = np.rint(y) / 10
+    for i in np.flatnonzero(np.abs(y - np.floor(y)) == 0.5).tolist():
+        out[i] = round(float(v[i]), 1)
+    return out
+
+def _runde1(v, einheiten):
+    return _round1(v)
+
+def _ganzzahl(v, einheiten):
+    return np.trunc(v)
+
+def _mgdl(v, einheiten):
+    # mg/dL → mmol/L, außer der Wert ist bereits in mmol/L
+    return _round1(np.where(_einheit_in(einheiten, MMOL_EINHEITEN), v, v / 18.0))
+
+def _fahrenheit(v, einheiten):
+    # °F → °C, außer der Wert ist bereits in °C
+    return _round1(np.where(_einheit_in(einheiten, CELSIUS_EINHEITEN), v, (v - 32) * 5 / 9))
+
+def _anteil(v, einheiten):
+    # Apple liefert Prozentwerte als Anteil (0.97) → 97.0
+    return _round1(np.where(v <= 1.0, v * 100, v))
+
+def _einheit_in(einheiten: list, erlaubt: tuple):
+    # Meist hat eine Spalte genau eine Einheit → Skalar statt Array-Vergleich
+    if len(set(einheiten)) == 1:
+        return einheiten[0] in erlaubt
+    return np.isin(np.array(einheiten), erlaubt)
+
+VEKTOR_CONV = {
+    "runde1":     _runde1,
+    "ganzzahl":   _ganzzahl,
+    "mgdl":       _mgdl,
+    "fahrenheit": _fahrenheit,
+    "anteil":     _anteil,
+}
+
+def parse_floats(werte_str: list):
+    """Strings → float64-Array; nicht parsebare Werte werden NaN"""
+    try:
+        return np.array(werte_str, dtype=np.float64)
+    except ValueError:
+        out = np.empty(len(werte_str), dtype=np.float64)
+        for i, s in enumerate(werte_str):
+            try: out[i] = float(s)
+            except ValueError: out[i] = np.nan
+        return out
+
+def konvertiere_spalte(art: str, werte_str: list, einheiten: list, plausibel: tuple):
+    """
+    Eine Spalte (alle Werte eines HK-Typs im Batch) umrechnen und prüfen.
+
+    Returns:
+        (positionen, werte, n_fehler, n_unplausibel) — positionen sind die
+        Indizes der gültigen Einträge in werte_str, werte die umgerechneten
+        Werte (int64 bei "ganzzahl")
+    """
+    roh = parse_floats(werte_str)
+    ok = ~np.isnan(roh)
+    n_fehler = int(len(roh) - ok.sum())
+
+    conv = VEKTOR_CONV[art](np.where(ok, roh, 0.0), einheiten)
+    lo, hi = plausibel
+    gueltig = ok & (conv >= lo) & (conv <= hi)
+    n_unplausibel = int(ok.sum() - gueltig.sum())
+
+    positionen = np.flatnonzero(gueltig)
+    werte = conv[gueltig]
+    if art == "ganzzahl":
+        werte = werte.astype(np.int64)
+    return positionen, werte, n_fehler, n_unplausibel
+
+def zeit_spalten(dts: list):
+    """Apple-Zeitstempel → (<U10-Array YYYY-MM-DD, int32-Array Sekunden seit Mitternacht)
+
+    parse_date() nur für Ausreißer; ohne lesbare Uhrzeit ist der Offset 0.
+    """
+    n = len(dts)
+    if not n:
+        return np.array([], dtype="U10"), np.array([], dtype=np.int32)
+    arr = np.array(dts, dtype="U19")          # "2024-01-15 08:30:00", Zeitzone fällt weg
+    zeichen = arr.view("U1").reshape(n, 19)
+    datum = arr.astype("U10")
+    iso = (zeichen[:, 4] == "-") & (zeichen[:, 7] == "-")
+    for i in np.flatnonzero(~iso).tolist():
+        datum[i] = parse_date(dts[i])
+
+    z = arr.view(np.uint32).reshape(n, 19).astype(np.int32) - ord("0")
+    sekunden = ((z[:, 11] * 10 + z[:, 12]) * 3600 + (z[:, 14] * 10 + z[:, 15]) * 60
+                + z[:, 17] * 10 + z[:, 18])
+    hat_zeit = iso & (zeichen[:, 13] == ":") & (zeichen[:, 16] == ":")
+    return datum, np.where(hat_zeit, sekunden, 0).astype(np.int32)
+
+# ── DEDUPLIZIERUNG ───────────────────────────────────────────────────────
+
+def dedup_maske(datum, vorhanden: set, tageszaehler: dict, typ: str, max_per_day: int):
+    """
+    Welche Zeilen (in Datei-Reihenfolge) werden geschrieben?
+
+    Gleiche Regel wie schreibe_messungen(): Tage mit vorhandenen Messungen
+    fallen komplett weg, sonst max. max_per_day pro Typ + Tag — der Zähler
+    läuft über Batch-Grenzen hinweg in tageszaehler[(typ, datum)].
+
+    Returns:
+        (keep, n_bereits_vorhanden, n_dedupliziert)
+    """
+    n = len(datum)
+    if n == 0:
+        return np.zeros(0, dtype=bool), 0, 0
+    tage, inv = np.unique(datum, return_inverse=True)
+    tage = tage.tolist()
+
+    existiert = np.array([(typ, t) in vorhanden for t in tage], dtype=bool)[inv]
+
+    # Rang jeder Zeile innerhalb ihres Tages (0, 1, 2, …) in Datei-Reihenfolge
+    order = np.argsort(inv, kind="stable")
+    sortiert = inv[order]
+    start = np.flatnonzero(np.r_[True, sortiert[1:] != sortiert[:-1]])
+    lauf = np.repeat(start, np.diff(np.r_[start, n]))
+    rang = np.empty(n, dtype=np.int64)
+    rang[order] = np.arange(n) - lauf
+
+    bisher = np.array([tageszaehler.get((typ, t), 0) for t in tage], dtype=np.int64)
+    keep = ~existiert & (rang + bisher[inv] < max_per_day)
+
+    neu = np.bincount(inv[keep], minlength=len(tage))
+    for t, k in zip(tage, neu.tolist()):
+        if k: tageszaehler[(typ, t)] = tageszaehler.get((typ, t), 0) + k
+
+    n_vorhanden = int(existiert.sum())
+    return keep, n_vorhanden, int(n - n_vorhanden - keep.sum())
@@ -1,16 +1,18 @@
 """HealthLedger Pi — main.py mit FIDO2/YubiKey Auth v1.1"""
-import os, json, sqlite3, base64, asyncio, re, secrets, struct
+import os, json, sqlite3, base64, asyncio, re, secrets, struct, codecs, hashlib, contextvars
 from datetime import datetime, date, timedelta
 from pathlib import Path
 from typing import Optional
 
-from fastapi import FastAPI, File, UploadFile, Form, Request, HTTPException, Depends
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi import FastAPI, File, UploadFile, Form, Request, Response, HTTPException, Depends, Query
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import aiofiles
 
+import abgleich, aenderungen, anomalien, antwort, antwortcache, einzelflug, erstattung, goae, notfall, statisch, statistik, timeline, verlauf, versionen, zeitreihen
+
 # JWT
 from jose import jwt, JWTError
 
@@ -28,6 +30,7 @@ BASE_DIR    = Path(__file__).parent
 UPLOAD_DIR  = BASE_DIR / "uploads"
 STATIC_DIR  = BASE_DIR / "static"
 DATA_DIR    = BASE_DIR / "data"
+NOTFALL_DIR = DATA_DIR / "notfall"
 DB_PATH     = DATA_DIR / "healthledger.db"
 OLLAMA_URL  = os.getenv("OLLAMA_URL",   "http://localhost:11434")
 VISION_MODEL= os.getenv("VISION_MODEL", "qwen2.5vl:7b")
@@ -51,6 +54,7 @@ _challenges: dict = {}  # In-Memory Challenge Store
 
 app = FastAPI(title="HealthLedger")
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(antwort.Kompression)
 
 # ═══════════════════════════════════════════════════════════
 # AUTH HELPERS
@@ -99,6 +103,17 @@ async def get_optional_user(
     except:
         return None
 
+def etag_fuer(*tabellen):
+    """Dependency-Fabrik — ETag aus den Tabellen-Versionen, 304 bei passendem If-None-Match"""
+    def pruefe(request: Request, response: Response):
+        with get_db() as db:
+            tag = versionen.etag(db, tabellen, APP_VERSION)
+        headers = {"ETag": tag, "Cache-Control": "private, no-cache"}
+        if versionen.passt(request.headers.get("if-none-match"), tag):
+            raise HTTPException(304, headers=headers)
+        response.headers.update(headers)
+    return pruefe
+
 def is_setup_mode() -> bool:
     """True wenn noch kein YubiKey registriert — Setup erlaubt"""
     try:
@@ -113,11 +128,43 @@ def is_setup_mode() -> bool:
 # DATENBANK
 # ═══════════════════════════════════════════════════════════
 
+# Innerhalb von /api/batch: alle Sub-Requests lesen über dieselbe Snapshot-Verbindung
+_snapshot_db = contextvars.ContextVar("snapshot_db", default=None)
+
 def get_db():
+    snapshot = _snapshot_db.get()
+    if snapshot is not None:
+        return snapshot
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
+def flug_schluessel(schluessel: tuple) -> tuple:
+    """Einzelflug-Schlüssel — Sub-Requests von /api/batch teilen nur mit ihrem eigenen Snapshot"""
+    snapshot = _snapshot_db.get()
+    return schluessel if snapshot is None else schluessel + (("snapshot", id(snapshot)),)
+
+class SnapshotDB:
+    """
+    Eine Verbindung in einer offenen Lesetransaktion — alle Abfragen sehen
+    denselben Datenstand. `with`, commit() und close() der Endpoints sind
+    hier wirkungslos, erst schliessen() beendet die Transaktion.
+    """
+    def __init__(self):
+        self._conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA query_only = ON")
+        self._conn.execute("BEGIN")
+        self._conn.execute("SELECT COUNT(*) FROM sqlite_master")   # Snapshot jetzt festlegen
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def commit(self): pass
+    def close(self): pass
+    def __getattr__(self, name): return getattr(self._conn, name)
+    def schliessen(self):
+        self._conn.rollback()
+        self._conn.close()
+
 def init_db():
     with get_db() as db:
         db.executescript("""
@@ -191,6 +238,13 @@ def init_db():
         );
         CREATE TABLE IF NOT EXISTS config (key TEXT PRIMARY KEY, value TEXT);
         """)
+        db.executescript(zeitreihen.SCHEMA)
+        db.executescript(verlauf.SCHEMA)
+        db.executescript(anomalien.SCHEMA)
+        db.executescript(timeline.SCHEMA)
+        db.executescript(versionen.SCHEMA)
+        db.executescript(abgleich.SCHEMA)
+        db.executescript(erstattung.SCHEMA)
         # Default Familie
         db.executescript("""
         INSERT OR IGNORE INTO personen (name,versicherung_name,beihilfesatz)
@@ -210,7 +264,46 @@ def audit(aktion, tabelle, datensatz_id=None, details="", user="", ip=""):
             db.commit()
     except: pass
 
+def geaendert(tabelle, aktion, datensatz_id=None, **extra):
+    """Nach Schreibzugriffen: Antwortcache invalidieren + Live-Feed (/api/events) melden"""
+    antwortcache.invalidiere(tabelle)
+    aenderungen.melde(tabelle, aktion, datensatz_id, **extra)
+    if tabelle in ("personen", "medikamente"):
+        notfall_aktualisieren()
+    if tabelle in ("personen", "dokumente"):
+        erstattungen_aktualisieren(dokument_ids=[datensatz_id] if tabelle == "dokumente" and datensatz_id else None)
+
+def notfall_aktualisieren():
+    """Notfallkarten neu bauen — Fehler dürfen den Schreibzugriff nicht scheitern lassen"""
+    try:
+        with get_db() as db:
+            notfall.aktualisiere(db, NOTFALL_DIR)
+    except Exception as e:
+        print(f"⚠️ Notfallkarten: {e}")
+
+def erstattungen_aktualisieren(**umfang):
+    """Erwartete Beihilfe gespeicherter Rechnungen nachrechnen (nur geänderte Eingaben)"""
+    try:
+        with get_db() as db:
+            stats = erstattung.neu_berechnen(db, goae.stand(), **umfang)
+        if stats["neu_berechnet"] or stats["entfernt"]:
+            antwortcache.invalidiere("dokumente")
+        return stats
+    except Exception as e:
+        print(f"⚠️ Erstattungen: {e}")
+
+def rollups_aktualisieren(person_id=None):
+    """Verlauf-Rollups gegen den Datenstand prüfen (Start) — Inserts addieren selbst"""
+    try:
+        with get_db() as db:
+            verlauf.aktualisiere_alle(db, person_id)
+    except Exception as e:
+        print(f"⚠️ Rollups: {e}")
+
 init_db()
+notfall_aktualisieren()
+erstattungen_aktualisieren()
+rollups_aktualisieren()
 
 # ═══════════════════════════════════════════════════════════
 # AUTH ENDPOINTS
@@ -448,7 +541,9 @@ async def status():
     }
 
 @app.get("/api/personen")
-async def get_personen(user: dict = Depends(get_current_user)):
+@antwortcache.gecacht("personen")
+async def get_personen(response: Response, user: dict = Depends(get_current_user),
+                        _etag: None = Depends(etag_fuer("personen"))):
     with get_db() as db:
         rows = db.execute("SELECT * FROM personen WHERE aktiv=1 ORDER BY name").fetchall()
         return [dict(r) for r in rows]
@@ -465,19 +560,21 @@ async def update_person(person_id: int, request: Request, user: dict = Depends(g
         db.execute(f"UPDATE personen SET {set_clause} WHERE id=?",
                    list(updates.values()) + [person_id])
         db.commit()
+    geaendert("personen", "UPDATE", person_id)
     audit("UPDATE","personen",person_id,json.dumps(updates),user["username"])
     return {"erfolg": True}
 
 @app.get("/api/dokumente")
-async def get_dokumente(person: Optional[str]=None, typ: Optional[str]=None,
-                         limit: int=50, user: dict = Depends(get_current_user)):
+async def get_dokumente(response: Response, person: Optional[str]=None, typ: Optional[str]=None,
+                         limit: int=50, offset: int=0, user: dict = Depends(get_current_user),
+                         _etag: None = Depends(etag_fuer("dokumente"))):
     with get_db() as db:
         q = "SELECT * FROM dokumente WHERE 1=1"
         params = []
         if person: q += " AND person=?"; params.append(person)
         if typ:    q += " AND typ=?"; params.append(typ)
-        q += f" ORDER BY datum DESC, erstellt_am DESC LIMIT {limit}"
-        return [dict(r) for r in db.execute(q, params).fetchall()]
+        q += f" ORDER BY datum DESC, erstellt_am DESC, id DESC LIMIT {limit} OFFSET {max(offset, 0)}"
+        return antwort.json_antwort([dict(r) for r in db.execute(q, params).fetchall()], response)
 
 @app.post("/api/upload")
 async def upload_dokument(
@@ -522,6 +619,7 @@ async def upload_dokument(
               json.dumps(extracted.get("tags",[])),
               str(filepath), json.dumps(extracted))).lastrowid
         db.commit()
+    geaendert("dokumente", "CREATE", dok_id)
 
     ip = request.client.host if request else ""
     audit("CREATE","dokumente",dok_id,f"Upload: {file.filename}",user["username"],ip)
@@ -536,19 +634,21 @@ async def delete_dokument(dok_id: int, user: dict = Depends(get_current_user)):
         if fp.exists(): fp.unlink()
         db.execute("DELETE FROM dokumente WHERE id=?", (dok_id,))
         db.commit()
+    geaendert("dokumente", "DELETE", dok_id)
     audit("DELETE","dokumente",dok_id,"",user["username"])
     return {"erfolg": True}
 
 @app.get("/api/medikamente")
-async def get_medikamente(person: Optional[str]=None, aktiv_only: bool=True,
-                           user: dict = Depends(get_current_user)):
+async def get_medikamente(response: Response, person: Optional[str]=None, aktiv_only: bool=True,
+                           user: dict = Depends(get_current_user),
+                           _etag: None = Depends(etag_fuer("medikamente"))):
     with get_db() as db:
         q = "SELECT * FROM medikamente WHERE 1=1"
         params = []
         if person: q += " AND person=?"; params.append(person)
         if aktiv_only: q += " AND aktiv=1"
         q += " ORDER BY name"
-        return [dict(r) for r in db.execute(q, params).fetchall()]
+        return antwort.json_antwort([dict(r) for r in db.execute(q, params).fetchall()], response)
 
 @app.post("/api/medikamente")
 async def add_medikament(request: Request, user: dict = Depends(get_current_user)):
@@ -567,6 +667,7 @@ async def add_medikament(request: Request, user: dict = Depends(get_current_user
               body.get("seit",date.today().isoformat()), body.get("bis",""),
               body.get("typ","dauermedikation"), body.get("notiz",""))).lastrowid
         db.commit()
+    geaendert("medikamente", "CREATE", mid)
     audit("CREATE","medikamente",mid,body["name"],user["username"])
     return {"erfolg": True, "id": mid}
 
@@ -575,18 +676,83 @@ async def delete_medikament(med_id: int, user: dict = Depends(get_current_user))
     with get_db() as db:
         db.execute("UPDATE medikamente SET aktiv=0 WHERE id=?", (med_id,))
         db.commit()
+    geaendert("medikamente", "DELETE", med_id)
     audit("DELETE","medikamente",med_id,"",user["username"])
     return {"erfolg": True}
 
 @app.get("/api/messwerte")
-async def get_messwerte(person: Optional[str]=None, typ: Optional[str]=None,
-                         limit: int=30, user: dict = Depends(get_current_user)):
+async def get_messwerte(response: Response, person: Optional[str]=None, typ: Optional[str]=None,
+                         limit: int=30, offset: int=0, user: dict = Depends(get_current_user),
+                         _etag: None = Depends(etag_fuer("messwerte", "messreihen"))):
     with get_db() as db:
         q = "SELECT * FROM messwerte WHERE 1=1"
         params = []
         if person: q += " AND person=?"; params.append(person)
         if typ:    q += " AND typ=?"; params.append(typ)
-        q += f" ORDER BY datum DESC LIMIT {limit}"
+        # Seite offset..offset+limit aus beiden Quellen: jeweils die ersten offset+limit mischen
+        offset = max(offset, 0)
+        q += f" ORDER BY datum DESC, id DESC LIMIT {limit + offset}"
+        werte = [dict(r) for r in db.execute(q, params).fetchall()]
+        # Hochfrequente Samples (Puls, SpO2) liegen kompakt in messreihen
+        reihen = zeitreihen.messwerte_zeilen(db, person, typ, limit + offset)
+    if reihen:
+        werte = sorted(werte + reihen, key=lambda w: (w["datum"] or "", w.get("zeit", "")),
+                       reverse=True)
+    werte = werte[offset:offset + limit]
+    return antwort.json_antwort(werte, response)
+
+@app.get("/api/messwerte/verlauf")
+async def get_messwerte_verlauf(person: str, typ: str,
+                                 von: Optional[str] = Query(None, alias="from"),
+                                 bis: Optional[str] = Query(None, alias="to"),
+                                 max_points: int = 500,
+                                 user: dict = Depends(get_current_user)):
+    """Zeitraum für Charts — max. max_points Punkte (Rohwerte, LTTB oder Rollups)"""
+    for d in (von, bis):
+        if d:
+            try: date.fromisoformat(d)
+            except ValueError: raise HTTPException(400, f"Ungültiges Datum: {d}")
+    with get_db() as db:
+        p = db.execute("SELECT id, name FROM personen WHERE name LIKE ?", (person,)).fetchone()
+        if not p: raise HTTPException(404, f"Person '{person}' nicht gefunden")
+        ergebnis = verlauf.verlauf(db, p["id"], typ, von, bis, min(max(max_points, 3), 5000))
+    return {"person": p["name"], "typ": typ, "from": von, "to": bis, **ergebnis}
+
+@app.get("/api/messwerte/statistik")
+async def get_messwerte_statistik(person: str, typ: str, fenster: str = "7,30,90",
+                                   ziel_min: Optional[float] = None,
+                                   ziel_max: Optional[float] = None,
+                                   user: dict = Depends(get_current_user)):
+    """Trends, Perzentile und Zeit im Zielbereich pro Fenster (Tage, 0 = alles)"""
+    if not statistik.verfuegbar():
+        raise HTTPException(503, "NumPy nicht installiert")
+    try:
+        fenster_liste = tuple(int(f) for f in fenster.split(",") if f.strip())
+    except ValueError:
+        raise HTTPException(400, "fenster: kommagetrennte Tage, z.B. 7,30,90")
+    if any(not 0 <= f <= statistik.MAX_FENSTER for f in fenster_liste):
+        raise HTTPException(400, f"fenster: Tage zwischen 0 und {statistik.MAX_FENSTER}")
+    ziel = None
+    if ziel_min is not None or ziel_max is not None:
+        ziel = {"wert": (ziel_min, ziel_max)}
+    with get_db() as db:
+        p = db.execute("SELECT id, name FROM personen WHERE name LIKE ?", (person,)).fetchone()
+        if not p: raise HTTPException(404, f"Person '{person}' nicht gefunden")
+        ergebnisse = statistik.statistik(db, p["id"], typ, fenster_liste, ziel)
+    return {"person": p["name"], "typ": typ,
+            "zielbereich": ziel or statistik.ZIELBEREICHE.get(typ), "fenster": ergebnisse}
+
+@app.get("/api/messwerte/auffaellig")
+async def get_messwerte_auffaellig(person: Optional[str]=None, reihe: Optional[str]=None,
+                                    limit: int=50, user: dict = Depends(get_current_user)):
+    """Beim Einfügen geflaggte Messungen (siehe anomalien.py), neueste zuerst"""
+    with get_db() as db:
+        q = """SELECT a.*, p.name AS person FROM messwerte_auffaellig a
+               LEFT JOIN personen p ON p.id = a.person_id WHERE 1=1"""
+        params = []
+        if person: q += " AND p.name=?"; params.append(person)
+        if reihe:  q += " AND a.reihe=?"; params.append(reihe)
+        q += " ORDER BY a.datum DESC, a.id DESC LIMIT ?"; params.append(limit)
         return [dict(r) for r in db.execute(q, params).fetchall()]
 
 @app.post("/api/messwerte")
@@ -604,19 +770,161 @@ async def add_messwert(request: Request, user: dict = Depends(get_current_user))
               body.get("wert"), body.get("wert2"),
               body.get("einheit"), body.get("datum",date.today().isoformat()),
               body.get("notiz",""))).lastrowid
+        anomalien.aktualisiere_ids(db, mid, mid)
+        verlauf.addiere_ids(db, mid, mid)
         db.commit()
+    statistik.invalidiere(person_id)
+    geaendert("messwerte", "CREATE", mid)
     audit("CREATE","messwerte",mid,"",user["username"])
     return {"erfolg": True, "id": mid}
 
+# ── BULK-IMPORT ──────────────────────────────────────────────────────────
+# Geräte-Historie (Blutdruckmessgerät, Waage) in einem Request statt
+# tausender Einzel-POSTs: NDJSON (eine Messung pro Zeile) oder JSON-Array,
+# beides wird gestreamt gelesen.
+
+MESSWERT_TYPEN   = ('gewicht','blutdruck','blutzucker','temperatur','puls','laborwert')
+BULK_CHUNK       = 1000      # Zeilen pro Transaktion
+BULK_MAX_FEHLER  = 100       # so viele Fehler werden einzeln zurückgemeldet
+
+async def _bulk_text(request: Request):
+    """Body-Chunks → (text, ende); UTF-8 darf über Chunk-Grenzen gehen"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async for chunk in request.stream():
+        yield decoder.decode(chunk), False
+    yield decoder.decode(b"", final=True), True
+
+async def _bulk_objekte(request: Request):
+    """Request-Body → (zeile, obj | None, fehler | None), ohne alles in den RAM zu laden"""
+    decoder = json.JSONDecoder()
+    buf, modus, zeile = "", None, 0
+    async for text, ende in _bulk_text(request):
+        buf += text
+        if modus is None:
+            buf = buf.lstrip("\ufeff \t\r\n")
+            if not buf:
+                continue
+            modus = "array" if buf[0] == "[" else "ndjson"
+            if modus == "array": buf = buf[1:]
+
+        if modus == "ndjson":
+            *zeilen, buf = buf.split("\n")
+            if ende: zeilen.append(buf); buf = ""
+            for line in zeilen:
+                zeile += 1
+                line = line.strip()
+                if not line: continue
+                try:
+                    yield zeile, json.loads(line), None
+                except json.JSONDecodeError as e:
+                    yield zeile, None, f"Ungültiges JSON: {e.msg}"
+            continue
+
+        # JSON-Array: Element für Element per raw_decode
+        while True:
+            buf = buf.lstrip(" \t\r\n,")
+            if not buf or buf[0] == "]":
+                break
+            try:
+                obj, pos = decoder.raw_decode(buf)
+            except json.JSONDecodeError as e:
+                if ende: raise HTTPException(400, f"Ungültiges JSON-Array: {e.msg}")
+                break  # Element noch unvollständig → nächsten Chunk abwarten
+            zeile += 1
+            yield zeile, obj, None
+            buf = buf[pos:]
+        if ende and buf.strip() != "]":
+            raise HTTPException(400, "Ungültiges JSON-Array: ']' fehlt")
+
+def _bulk_zeile(obj, personen: dict, standard_person: Optional[str]):
+    """Eine Messung validieren → (Insert-Tupel, None) oder (None, Fehlertext)"""
+    from importer import parse_date
+
+    if not isinstance(obj, dict): return None, "Kein JSON-Objekt"
+    typ = obj.get("typ")
+    if typ not in MESSWERT_TYPEN: return None, f"Unbekannter Typ: {typ!r}"
+    name = obj.get("person") or standard_person
+    if not name: return None, "Person fehlt"
+    person = personen.get(name.lower())
+    if not person: return None, f"Person '{name}' nicht gefunden"
+    try:
+        wert  = float(obj["wert"]) if obj.get("wert") not in (None, "") else None
+        wert2 = float(obj["wert2"]) if obj.get("wert2") not in (None, "") else None
+    except (TypeError, ValueError):
+        return None, "Wert ist keine Zahl"
+    if wert is None: return None, "Wert fehlt"
+    if typ == "blutdruck" and wert2 is None: return None, "Blutdruck braucht wert2 (diastolisch)"
+    try:
+        datum = parse_date(str(obj["datum"])) if obj.get("datum") else date.today().isoformat()
+        date.fromisoformat(datum)
+    except ValueError:
+        return None, f"Ungültiges Datum: {obj.get('datum')!r}"
+    return (person["id"], person["name"], typ, wert, wert2,
+            obj.get("einheit"), datum, obj.get("notiz", "")), None
+
+@app.post("/api/messwerte/bulk")
+async def add_messwerte_bulk(request: Request, person: Optional[str]=None,
+                              dry_run: bool=False, user: dict = Depends(get_current_user)):
+    """
+    Viele Messungen auf einmal — NDJSON oder JSON-Array im Body.
+
+    Personen werden einmal aufgelöst, fehlerhafte Zeilen einzeln gemeldet
+    (der Rest wird trotzdem geschrieben), Insert per executemany in
+    Transaktionen à BULK_CHUNK Zeilen, ein Audit-Eintrag am Ende.
+    ?person=Sven gilt für alle Zeilen ohne eigenes "person"-Feld.
+    """
+    with get_db() as db:
+        personen = {r["name"].lower(): dict(r) for r in db.execute("SELECT id, name FROM personen")}
+
+        importiert, gesamt, n_fehler, fehler, batch = 0, 0, 0, [], []
+        def _flush():
+            nonlocal importiert
+            if batch and not dry_run:
+                db.executemany("""
+                    INSERT INTO messwerte (person_id,person,typ,wert,wert2,einheit,datum,notiz)
+                    VALUES (?,?,?,?,?,?,?,?)
+                """, batch)
+                # ein Transaktions-Batch → fortlaufende ids bis last_insert_rowid()
+                letzte = db.execute("SELECT last_insert_rowid()").fetchone()[0]
+                anomalien.aktualisiere_ids(db, letzte - len(batch) + 1, letzte)
+                verlauf.addiere_ids(db, letzte - len(batch) + 1, letzte)
+                db.commit()
+            importiert += len(batch)
+            batch.clear()
+
+        async for zeile, obj, err in _bulk_objekte(request):
+            gesamt += 1
+            row = None
+            if err is None:
+                row, err = _bulk_zeile(obj, personen, person)
+            if err:
+                n_fehler += 1
+                if len(fehler) < BULK_MAX_FEHLER:
+                    fehler.append({"zeile": zeile, "fehler": err})
+                continue
+            batch.append(row)
+            if len(batch) >= BULK_CHUNK:
+                _flush()
+        _flush()
+
+    if importiert and not dry_run:
+        statistik.invalidiere()
+        geaendert("messwerte", "BULK", anzahl=importiert)
+        audit("BULK_CREATE","messwerte",None,
+              f"{importiert} Messungen importiert, {n_fehler} fehlerhaft", user["username"])
+    return {"erfolg": True, "dry_run": dry_run, "gesamt": gesamt, "importiert": importiert,
+            "fehler_anzahl": n_fehler, "fehler": fehler}
+
 @app.get("/api/ereignisse")
-async def get_ereignisse(person: Optional[str]=None, limit: int=50,
-                          user: dict = Depends(get_current_user)):
+async def get_ereignisse(response: Response, person: Optional[str]=None, limit: int=50,
+                          user: dict = Depends(get_current_user),
+                          _etag: None = Depends(etag_fuer("ereignisse"))):
     with get_db() as db:
         q = "SELECT * FROM ereignisse WHERE 1=1"
         params = []
         if person: q += " AND person=?"; params.append(person)
         q += f" ORDER BY datum DESC LIMIT {limit}"
-        return [dict(r) for r in db.execute(q, params).fetchall()]
+        return antwort.json_antwort([dict(r) for r in db.execute(q, params).fetchall()], response)
 
 @app.post("/api/ereignisse")
 async def add_ereignis(request: Request, user: dict = Depends(get_current_user)):
@@ -633,11 +941,152 @@ async def add_ereignis(request: Request, user: dict = Depends(get_current_user))
               body.get("titel"), body.get("datum",date.today().isoformat()),
               body.get("arzt",""), body.get("einrichtung",""), body.get("notizen",""))).lastrowid
         db.commit()
+    geaendert("ereignisse", "CREATE", eid)
     audit("CREATE","ereignisse",eid,"",user["username"])
     return {"erfolg": True, "id": eid}
 
+@app.get("/api/cache")
+async def get_cache_statistik(user: dict = Depends(get_current_user)):
+    """Treffer/Fehlschläge und Füllstand des Antwortcaches"""
+    return antwortcache.statistik()
+
+# Nur lesende, seiteneffektfreie Endpoints
+BATCH_PFADE = re.compile(r"^/api/(personen|dashboard|dokumente|medikamente|ereignisse|timeline|status"
+                         r"|messwerte(/statistik|/auffaellig|/verlauf)?|notfall/\d+|beihilfe/antraege)$")
+BATCH_MAX   = 20
+
+async def _intern_get(pfad: str, headers: list) -> tuple:
+    """GET direkt durch die ASGI-App (ohne Netzwerk) → (status, headers, body)"""
+    path, _, query = pfad.partition("?")
+    scope = {"type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query.encode(),
+             "headers": headers, "client": ("127.0.0.1", 0), "server": ("batch", 80)}
+    antwort = {"status": 500, "headers": [], "body": b""}
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(msg):
+        if msg["type"] == "http.response.start":
+            antwort["status"], antwort["headers"] = msg["status"], msg.get("headers", [])
+        elif msg["type"] == "http.response.body":
+            antwort["body"] += msg.get("body", b"")
+    await app(scope, receive, send)
+    return antwort["status"], dict(antwort["headers"]), antwort["body"]
+
+@app.post("/api/batch")
+async def batch(request: Request, user: dict = Depends(get_current_user)):
+    """
+    Mehrere Lese-Requests in einem Roundtrip:
+      {"anfragen": [{"id": "dash", "pfad": "/api/dashboard"}, "/api/personen", ...]}
+    Alle laufen gleichzeitig gegen einen gemeinsamen DB-Snapshot.
+    """
+    body = await request.json()
+    anfragen = body.get("anfragen") if isinstance(body, dict) else body
+    if not isinstance(anfragen, list) or not anfragen:
+        raise HTTPException(400, "anfragen: Liste von Pfaden erwartet")
+    if len(anfragen) > BATCH_MAX:
+        raise HTTPException(400, f"Maximal {BATCH_MAX} Anfragen pro Batch")
+    liste = []
+    for i, a in enumerate(anfragen):
+        pfad = a if isinstance(a, str) else (a.get("pfad") if isinstance(a, dict) else None)
+        if not pfad or not BATCH_PFADE.match(pfad.partition("?")[0]):
+            raise HTTPException(400, f"Anfrage {i}: Pfad nicht erlaubt: {pfad}")
+        liste.append((a.get("id", pfad) if isinstance(a, dict) else pfad, pfad))
+
+    headers = [(k, v) for k, v in request.headers.raw if k in (b"authorization", b"cookie")]
+    snapshot = SnapshotDB()
+    token = _snapshot_db.set(snapshot)
+    try:
+        ergebnisse = await asyncio.gather(*[_intern_get(pfad, headers) for _, pfad in liste])
+    finally:
+        _snapshot_db.reset(token)
+        snapshot.schliessen()
+
+    antworten = []
+    for (id_, pfad), (status, h, inhalt) in zip(liste, ergebnisse):
+        try: daten = json.loads(inhalt) if inhalt else None
+        except ValueError: daten = inhalt.decode(errors="replace")
+        etag = h.get(b"etag")
+        antworten.append({"id": id_, "pfad": pfad, "status": status,
+                          "etag": etag.decode() if etag else None, "body": daten})
+    return {"antworten": antworten}
+
+@app.get("/api/einzelflug")
+async def get_einzelflug_statistik(user: dict = Depends(get_current_user)):
+    """Wie viele gleichzeitige Aufrufe sich eine Berechnung geteilt haben"""
+    return einzelflug.statistik()
+
+@app.get("/api/events")
+async def events(request: Request, user: dict = Depends(get_current_user)):
+    """Live-Feed: Server-Sent Events {tabelle, aktion, id} bei jeder Änderung"""
+    return StreamingResponse(aenderungen.strom(request.headers.get("last-event-id")),
+                             media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Tabellen, deren Zeilen /api/zeilen einzeln nachliefert (nach einer Live-Meldung)
+ZEILEN_TABELLEN = ("personen", "dokumente", "medikamente", "messwerte", "ereignisse", "policen")
+
+@app.get("/api/zeilen/{tabelle}")
+async def get_zeilen(tabelle: str, ids: str, user: dict = Depends(get_current_user)):
+    """Einzelne Zeilen per id (max. 200) — für inkrementelle Updates im Client"""
+    if tabelle not in ZEILEN_TABELLEN:
+        raise HTTPException(404, f"Unbekannte Tabelle: {tabelle}")
+    try:
+        id_liste = [int(i) for i in ids.split(",") if i.strip()][:200]
+    except ValueError:
+        raise HTTPException(400, "ids: kommagetrennte Zahlen")
+    with get_db() as db:
+        rows = db.execute(f"SELECT * FROM {tabelle} WHERE id IN ({','.join('?' * len(id_liste))})",
+                          id_liste).fetchall() if id_liste else []
+    return antwort.json_antwort([dict(r) for r in rows])
+
+@app.get("/api/sync")
+async def sync(since: int = 0, tabellen: Optional[str] = None,
+               user: dict = Depends(get_current_user)):
+    """Delta-Sync: seit `since` geänderte Zeilen + Tombstones (since=0 → Vollabzug)"""
+    liste = tuple(t.strip() for t in tabellen.split(",") if t.strip()) if tabellen else abgleich.TABELLEN
+    for t in liste:
+        if t not in abgleich.TABELLEN:
+            raise HTTPException(400, f"Unbekannte Tabelle: {t} (erlaubt: {', '.join(abgleich.TABELLEN)})")
+    with get_db() as db:
+        abgleich.kompaktiere_taeglich(db)
+    snapshot = SnapshotDB()
+    try:
+        ergebnis = abgleich.abgleich(snapshot, since, liste)
+    finally:
+        snapshot.schliessen()
+    return antwort.json_antwort(ergebnis)
+
+@app.get("/api/timeline")
+async def get_timeline(person: Optional[str]=None, typen: Optional[str]=None,
+                        von: Optional[str] = Query(None, alias="from"),
+                        bis: Optional[str] = Query(None, alias="to"),
+                        cursor: Optional[str]=None, limit: int=50,
+                        user: dict = Depends(get_current_user)):
+    """Dokumente, Ereignisse, Messwerte, Medikamente und Policen chronologisch (neueste zuerst)"""
+    typ_liste = [t.strip() for t in typen.split(",") if t.strip()] if typen else None
+    for t in typ_liste or []:
+        if t not in timeline.TYPEN:
+            raise HTTPException(400, f"Unbekannter Typ: {t} (erlaubt: {', '.join(timeline.TYPEN)})")
+    with get_db() as db:
+        person_id = None
+        if person:
+            p = db.execute("SELECT id FROM personen WHERE name LIKE ?", (person,)).fetchone()
+            if not p: raise HTTPException(404, f"Person '{person}' nicht gefunden")
+            person_id = p["id"]
+        try:
+            return antwort.json_antwort(timeline.timeline(db, person_id, typ_liste, von, bis, cursor,
+                                                          min(max(limit, 1), 500)))
+        except ValueError as e:
+            raise HTTPException(400, str(e))
+
 @app.get("/api/dashboard")
-async def get_dashboard(user: dict = Depends(get_current_user)):
+@antwortcache.gecacht("personen", "dokumente", "medikamente")
+async def get_dashboard(response: Response, user: dict = Depends(get_current_user),
+                        _etag: None = Depends(etag_fuer("personen", "dokumente", "medikamente"))):
+    # Für alle Benutzer gleich → gleichzeitige Aufrufe teilen sich eine Abfrage
+    return await einzelflug.teile(flug_schluessel(("dashboard",)), _dashboard_daten)
+
+def _dashboard_daten() -> dict:
     with get_db() as db:
         personen = [dict(r) for r in db.execute("SELECT * FROM personen WHERE aktiv=1").fetchall()]
         for p in personen:
@@ -655,30 +1104,23 @@ async def get_dashboard(user: dict = Depends(get_current_user)):
 
 @app.get("/api/notfall/{person_id}")
 async def get_notfall(person_id: int):
-    """Notfall — KEIN Auth nötig (Arzt/Rettungsdienst muss zugreifen können)"""
-    with get_db() as db:
-        p = db.execute("SELECT * FROM personen WHERE id=?", (person_id,)).fetchone()
-        if not p: raise HTTPException(404)
-        p = dict(p)
-        meds = [dict(r) for r in db.execute(
-            "SELECT name,dosierung,haeufigkeit FROM medikamente WHERE person_id=? AND aktiv=1", (person_id,)
-        ).fetchall()]
-        allergien = []
-        try: allergien = json.loads(p.get("allergien") or "[]")
-        except: pass
-        return {
-            "name": p["name"], "geburtsdatum": p.get("geburtsdatum"),
-            "blutgruppe": p.get("blutgruppe"), "allergien": allergien,
-            "notfallkontakt": p.get("notfallkontakt"), "medikamente": meds,
-            "hausarzt": p.get("arzt_hausarzt"),
-            "generiert_am": datetime.now().isoformat()
-        }
-
-@app.post("/api/chat")
-async def chat(request: Request, user: dict = Depends(get_current_user)):
-    import urllib.request as ureq
-    body = await request.json()
-    user_msg = body.get("message","")
+    """Notfall — KEIN Auth nötig (Arzt/Rettungsdienst muss zugreifen können).
+    Vorberechnet (notfall.py): kommt aus Speicher/data/notfall/, ohne DB-Zugriff."""
+    roh = notfall.hole(person_id, "json", NOTFALL_DIR)
+    if roh is None: raise HTTPException(404)
+    return Response(roh, media_type="application/json", headers={"Cache-Control": "no-cache"})
+
+@app.get("/api/notfall/{person_id}/qr.{art}")
+async def get_notfall_qr(person_id: int, art: str):
+    """Notfall-QR (svg/png) mit dem Kartentext — ebenfalls ohne Auth"""
+    if art not in ("svg", "png"): raise HTTPException(404)
+    roh = notfall.hole(person_id, art, NOTFALL_DIR)
+    if roh is None: raise HTTPException(404, "QR-Code nicht verfügbar (segno installiert?)")
+    return Response(roh, media_type="image/svg+xml" if art == "svg" else "image/png",
+                    headers={"Cache-Control": "no-cache"})
+
+def _chat_kontext() -> tuple:
+    """Familie + aktive Medikamente + letzte Dokumente für den System-Prompt"""
     with get_db() as db:
         personen = [dict(r) for r in db.execute("SELECT * FROM personen WHERE aktiv=1").fetchall()]
         for p in personen:
@@ -688,6 +1130,14 @@ async def chat(request: Request, user: dict = Depends(get_current_user)):
         letzte_dok = [dict(r) for r in db.execute(
             "SELECT typ,aussteller,person,datum FROM dokumente ORDER BY erstellt_am DESC LIMIT 10"
         ).fetchall()]
+    return personen, letzte_dok
+
+@app.post("/api/chat")
+async def chat(request: Request, user: dict = Depends(get_current_user)):
+    import urllib.request as ureq
+    body = await request.json()
+    user_msg = body.get("message","")
+    personen, letzte_dok = await einzelflug.teile(flug_schluessel(("chat_kontext",)), _chat_kontext)
     system = f"""Du bist der HealthLedger Assistent der Familie Kurzberg.
 Eingeloggt als: {user.get('display_name','Unbekannt')}
 Familie: {json.dumps([p['name'] for p in personen],ensure_ascii=False)}
@@ -702,8 +1152,9 @@ WICHTIG: Du bist kein Arzt. Bei medizinischen Fragen immer Arzt empfehlen. Antwo
     try:
         req = ureq.Request(f"{OLLAMA_URL}/api/chat", data=payload,
                            headers={"Content-Type":"application/json"}, method="POST")
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, lambda: json.loads(ureq.urlopen(req,timeout=120).read()))
+        # Doppelt abgeschickte identische Frage → nur ein LLM-Aufruf
+        result = await einzelflug.teile(("chat", hashlib.sha256(payload).hexdigest()),
+                                        lambda: json.loads(ureq.urlopen(req,timeout=120).read()))
         antwort = result.get("message",{}).get("content","Keine Antwort") if "error" not in result else f"⚠️ {result['error']}"
     except Exception as e:
         antwort = f"⚠️ Fehler: {e}"
@@ -777,151 +1228,62 @@ async def import_apple_health(
     person: str = Form(...),
     dry_run: bool = Form(default=False),
     max_per_day: int = Form(default=3),
+    workers: int = Form(default=0),
+    zeitreihen: bool = Form(default=False),
     user: dict = Depends(get_current_user)
 ):
     """Apple Health export.zip oder export.xml importieren"""
-    import zipfile, xml.etree.ElementTree as ET, struct
-    from collections import defaultdict
+    from importer import AppleHealthQuelle, MAX_WORKERS, finde_person, importiere_und_auswerten
 
     if not file.filename.endswith(('.zip', '.xml')):
         raise HTTPException(400, "Nur .zip oder .xml Dateien erlaubt")
+    if not 0 <= workers <= MAX_WORKERS:
+        raise HTTPException(400, f"workers: 0 (Streaming) bis {MAX_WORKERS}")
 
-    # Temporär speichern
+    # Temporär speichern (in Blöcken — Exporte sind schnell mehrere 100 MB)
     tmp_path = UPLOAD_DIR / f"apple_health_import_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tmp"
     async with aiofiles.open(tmp_path, 'wb') as f:
-        await f.write(await file.read())
+        while chunk := await file.read(1024 * 1024):
+            await f.write(chunk)
 
     try:
-        # Importer laden
-        import sys
-        sys.path.insert(0, str(BASE_DIR))
-
-        # Inline-Import der Kernlogik
-        HK_MAP = {
-            "HKQuantityTypeIdentifierBodyMass":          {"typ":"gewicht",    "feld":"wert",  "einheit":"kg"},
-            "HKQuantityTypeIdentifierBloodPressureSystolic": {"typ":"blutdruck","feld":"wert",  "einheit":"mmHg"},
-            "HKQuantityTypeIdentifierBloodPressureDiastolic":{"typ":"blutdruck","feld":"wert2", "einheit":"mmHg"},
-            "HKQuantityTypeIdentifierBloodGlucose":      {"typ":"blutzucker", "feld":"wert",  "einheit":"mmol/L"},
-            "HKQuantityTypeIdentifierBodyTemperature":   {"typ":"temperatur", "feld":"wert",  "einheit":"°C"},
-            "HKQuantityTypeIdentifierHeartRate":         {"typ":"puls",       "feld":"wert",  "einheit":"BPM"},
-            "HKQuantityTypeIdentifierRestingHeartRate":  {"typ":"puls",       "feld":"wert",  "einheit":"BPM"},
-            "HKQuantityTypeIdentifierOxygenSaturation":  {"typ":"laborwert",  "feld":"wert",  "einheit":"%",   "name":"SpO2"},
-            "HKQuantityTypeIdentifierBodyMassIndex":     {"typ":"laborwert",  "feld":"wert",  "einheit":"BMI", "name":"BMI"},
-            "HKQuantityTypeIdentifierBodyFatPercentage": {"typ":"laborwert",  "feld":"wert",  "einheit":"%",   "name":"Körperfett"},
-        }
-        HK_SKIP = {"HKQuantityTypeIdentifierStepCount","HKQuantityTypeIdentifierDistanceWalkingRunning",
-                   "HKQuantityTypeIdentifierActiveEnergyBurned","HKQuantityTypeIdentifierBasalEnergyBurned",
-                   "HKCategoryTypeIdentifierSleepAnalysis","HKCategoryTypeIdentifierAppleStandHour",
-                   "HKQuantityTypeIdentifierAppleExerciseTime","HKQuantityTypeIdentifierAppleStandTime",
-                   "HKQuantityTypeIdentifierFlightsClimbed","HKQuantityTypeIdentifierWalkingSpeed"}
-
-        # XML laden
-        suffix = Path(tmp_path.name).suffix if hasattr(tmp_path,'name') else str(tmp_path).split('.')[-1]
-        if str(tmp_path).endswith('.zip') or file.filename.endswith('.zip'):
-            with zipfile.ZipFile(tmp_path) as z:
-                xml_files = [f for f in z.namelist() if "export.xml" in f and "cda" not in f.lower()]
-                if not xml_files: raise HTTPException(400, "export.xml nicht in ZIP gefunden")
-                xml_data = z.read(xml_files[0])
-        else:
-            xml_data = tmp_path.read_bytes()
-
-        # DTD-Bug fix
-        if b"<!DOCTYPE" in xml_data[:2000]:
-            lines = xml_data.split(b"\n")
-            cleaned, skip = [], False
-            for line in lines:
-                if b"<!DOCTYPE" in line: skip = True
-                if skip:
-                    if b"]>" in line: skip = False
-                    continue
-                cleaned.append(line)
-            xml_data = b"\n".join(cleaned)
-
-        root = ET.fromstring(xml_data)
-
-        # Person-ID
         with get_db() as db:
-            p = db.execute("SELECT id,name FROM personen WHERE name LIKE ?", (person+"%",)).fetchone()
-            if not p: raise HTTPException(404, f"Person '{person}' nicht gefunden")
-            person_id, person_name = p["id"], p["name"]
-
-            existing_keys = set()
-            for row in db.execute("SELECT typ,datum FROM messwerte WHERE person_id=?", (person_id,)):
-                existing_keys.add(f"{row['typ']}_{row['datum']}")
-
-        # Parse Records
-        bp_buf = defaultdict(dict)
-        records = []
-        day_counts = defaultdict(int)
-        stats = defaultdict(int)
-
-        for rec in root.iter("Record"):
-            hk = rec.get("type","")
-            if hk in HK_SKIP or hk not in HK_MAP: continue
-            m = HK_MAP[hk]
-            v = rec.get("value","")
-            u = rec.get("unit","")
-            if not v: continue
-            try: fv = float(v)
-            except: continue
-
-            dt = rec.get("startDate","")[:10]
-
-            # Einheiten-Konvertierung
-            if hk == "HKQuantityTypeIdentifierBloodGlucose" and u in ("mg/dL","mg/dl"):
-                fv = round(fv / 18.0, 1)
-            elif hk == "HKQuantityTypeIdentifierBodyTemperature" and u in ("°F","F"):
-                fv = round((fv - 32) * 5/9, 1)
-            elif hk == "HKQuantityTypeIdentifierOxygenSaturation" and fv <= 1.0:
-                fv = round(fv * 100, 1)
-            elif hk == "HKQuantityTypeIdentifierBodyFatPercentage" and fv <= 1.0:
-                fv = round(fv * 100, 1)
-
-            if "Systolic" in hk:
-                bp_buf[dt]["sys"] = int(fv)
-            elif "Diastolic" in hk:
-                bp_buf[dt]["dia"] = int(fv)
-                if "sys" in bp_buf[dt]:
-                    bp = bp_buf.pop(dt)
-                    dk = f"blutdruck_{dt}"
-                    if day_counts[dk] < max_per_day and dk not in existing_keys:
-                        records.append({"typ":"blutdruck","wert":bp["sys"],"wert2":bp["dia"],"einheit":"mmHg","datum":dt,"notiz":""})
-                        day_counts[dk] += 1
-                        stats["blutdruck"] += 1
-            else:
-                dk = f"{m['typ']}_{dt}"
-                if day_counts[dk] < max_per_day:
-                    if dk not in existing_keys:
-                        records.append({"typ":m["typ"],"wert":round(fv,2),"wert2":None,
-                                        "einheit":m["einheit"],"datum":dt,
-                                        "notiz":f"Apple Health - {m.get('name','')}"})
-                        day_counts[dk] += 1
-                        stats[m["typ"]] += 1
-                    else:
-                        stats["bereits_vorhanden"] += 1
-                else:
-                    stats["dedupliziert"] += 1
+            p = finde_person(db, person)
+        if not p: raise HTTPException(404, f"Person '{person}' nicht gefunden")
+        person_id, person_name = p["id"], p["name"]
+
+        def _run():
+            try:
+                quelle = AppleHealthQuelle(tmp_path, workers=workers,
+                                           format="zip" if file.filename.endswith('.zip') else "xml")
+                # Anomalien + Rollups inklusive — im Executor statt auf dem Event-Loop
+                with get_db() as db:
+                    return importiere_und_auswerten(db, quelle, person_id, person_name,
+                                                    zeitreihen=zeitreihen, dry_run=dry_run,
+                                                    max_per_day=max_per_day)
+            except (FileNotFoundError, ValueError) as e:
+                raise HTTPException(400, str(e))
 
-        if dry_run:
-            return {"dry_run": True, "wuerde_importieren": len(records),
-                    "typen": dict(stats), "person": person_name}
+        loop = asyncio.get_event_loop()
+        stats = await loop.run_in_executor(None, _run)
+        typen = {k: v for k, v in stats.items()
+                 if k in ("gewicht","blutdruck","blutzucker","temperatur","puls","laborwert",
+                          "dedupliziert","bereits_vorhanden","zeitreihe","auffaellig") and v}
 
-        # Schreiben
-        with get_db() as db:
-            for r in records:
-                db.execute("""INSERT INTO messwerte
-                    (person_id,person,typ,wert,wert2,einheit,datum,notiz) VALUES (?,?,?,?,?,?,?,?)""",
-                    (person_id,person_name,r["typ"],r["wert"],r["wert2"],r["einheit"],r["datum"],r["notiz"]))
-            db.commit()
+        if dry_run:
+            return {"dry_run": True, "wuerde_importieren": stats["zu_importieren"],
+                    "typen": typen, "person": person_name}
+        statistik.invalidiere(person_id)
+        geaendert("messwerte", "BULK", anzahl=stats["importiert"], person_id=person_id)
 
         audit("IMPORT","messwerte",person_id,
-              f"Apple Health: {len(records)} Messungen importiert", user["username"])
+              f"Apple Health: {stats['importiert']} Messungen importiert", user["username"])
 
         return {
             "erfolg": True,
-            "importiert": len(records),
+            "importiert": stats["importiert"],
             "person": person_name,
-            "typen": dict(stats),
+            "typen": typen,
         }
 
     finally:
@@ -935,12 +1297,24 @@ async def import_apple_health(
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 
 @app.get("/")
-async def index():
-    return FileResponse(STATIC_DIR / "login.html")
+async def index(request: Request):
+    return statisch.seite(STATIC_DIR, "login.html", request)
 
 @app.get("/app")
-async def app_page():
-    return FileResponse(STATIC_DIR / "index.html")
+async def app_page(request: Request):
+    return statisch.seite(STATIC_DIR, "index.html", request)
+
+@app.get("/sw.js")
+async def service_worker(request: Request):
+    """Service Worker muss von / kommen, damit sein Scope /app und / umfasst"""
+    return statisch.seite(STATIC_DIR, "sw.js", request, {"Service-Worker-Allowed": "/"})
+
+@app.get("/assets/{datei}")
+async def asset(datei: str, request: Request):
+    """Gehashte CSS/JS-Dateien — immutable, vorkomprimiert (siehe statisch.py)"""
+    r = statisch.asset(STATIC_DIR, datei, request)
+    if r is None: raise HTTPException(404)
+    return r
 
 # [catch-all ans Ende verschoben]
     raise HTTPException(404)
@@ -953,57 +1327,18 @@ if __name__ == "__main__":
 # BEIHILFE-MODUL
 # ═══════════════════════════════════════════════════════════════
 import json as _json
-from pathlib import Path as _Path
-
-def _lade_goae_db():
-    if not hasattr(_lade_goae_db, "_cache"):
-        db_path = _Path(__file__).parent / "goae_datenbank.json"
-        _lade_goae_db._cache = _json.load(open(db_path)) if db_path.exists() else {}
-    return _lade_goae_db._cache
-
-def _berechne_erstattung(positionen, goae_db, beihilfesatz):
-    MAX_FAKTOR = 2.3
-    res = {"positionen":[], "gesamt_rechnung":0.0, "gesamt_beihilfefaehig":0.0,
-           "erstattung":0.0, "nicht_beihilfefaehig":0.0, "hinweise":[]}
-    for pos in positionen:
-        ziffer = str(pos.get("ziffer","")).strip()
-        betrag = float(pos.get("betrag",0))
-        faktor = float(pos.get("faktor",1.0))
-        anzahl = int(pos.get("anzahl",1))
-        res["gesamt_rechnung"] += betrag
-        goae = goae_db.get(ziffer) if ziffer and ziffer != "null" else None
-        if not goae:
-            res["positionen"].append({**pos,"beihilfefaehig":False,"beihilfefaehiger_betrag":0.0,"hinweis":"Ziffer unbekannt"})
-            res["nicht_beihilfefaehig"] += betrag
-            continue
-        if not goae["beihilfefaehig_bund"]:
-            res["positionen"].append({**pos,"beschreibung_goae":goae["beschreibung"],"beihilfefaehig":False,"beihilfefaehiger_betrag":0.0,"hinweis":"IGeL / nicht beihilfefähig"})
-            res["nicht_beihilfefaehig"] += betrag
-            continue
-        angemessen = round(goae["einfachsatz"] * min(faktor, MAX_FAKTOR) * anzahl, 2)
-        bh_betrag = min(betrag, angemessen)
-        hinweis = f"Faktor {faktor} > 2,3: nur {angemessen:.2f}€ beihilfefähig" if faktor > MAX_FAKTOR else None
-        if hinweis: res["hinweise"].append(f"GOÄ {ziffer}: {hinweis}")
-        res["gesamt_beihilfefaehig"] += bh_betrag
-        res["positionen"].append({**pos,"beschreibung_goae":goae["beschreibung"],"kategorie":goae["kategorie"],"beihilfefaehig":True,"beihilfefaehiger_betrag":round(bh_betrag,2),"hinweis":hinweis})
-    res["gesamt_beihilfefaehig"] = round(res["gesamt_beihilfefaehig"],2)
-    res["erstattung"] = round(res["gesamt_beihilfefaehig"] * beihilfesatz,2)
-    res["nicht_beihilfefaehig"] = round(res["nicht_beihilfefaehig"],2)
-    res["beihilfesatz_prozent"] = int(beihilfesatz*100)
-    res["eigenanteil"] = round(res["gesamt_rechnung"] - res["erstattung"],2)
-    return res
 
 @app.get("/api/beihilfe/goae/suche")
-async def goae_suche(q: str = "", user: dict = Depends(get_current_user)):
-    goae_db = _lade_goae_db()
-    q = q.lower().strip()
-    treffer = [v for v in goae_db.values() if not q or q in v["ziffer"] or q in v["beschreibung"].lower() or q in v["kategorie"].lower()]
-    return {"ziffern": treffer[:30]}
+async def goae_suche(q: str = "", datum: str = "", user: dict = Depends(get_current_user)):
+    return {"ziffern": goae.index(datum).ergebnisse(q[:100], 30)}
+
+@app.get("/api/beihilfe/goae/tarife")
+async def goae_tarife(user: dict = Depends(get_current_user)):
+    return {"tarife": [v.info() for v in goae.stand().versionen]}
 
 @app.get("/api/beihilfe/goae/{ziffer}")
-async def goae_details(ziffer: str, user: dict = Depends(get_current_user)):
-    goae_db = _lade_goae_db()
-    pos = goae_db.get(ziffer)
+async def goae_details(ziffer: str, datum: str = "", user: dict = Depends(get_current_user)):
+    pos = goae.stand().hole(ziffer, datum)
     if not pos: raise HTTPException(404, f"GOÄ {ziffer} nicht gefunden")
     return pos
 
@@ -1011,32 +1346,37 @@ async def goae_details(ziffer: str, user: dict = Depends(get_current_user)):
 async def rechnung_analysieren(request: Request, user: dict = Depends(get_current_user)):
     data = await request.json()
     person = data.get("person","Sven")
-    goae_db = _lade_goae_db()
+    tarif = goae.stand()
     with get_db() as db:
         row = db.execute("SELECT beihilfesatz FROM personen WHERE name=?", (person,)).fetchone()
         beihilfesatz = float(row["beihilfesatz"]) if row else 0.50
     positionen = data.get("positionen", [])
-    berechnung = _berechne_erstattung(positionen, goae_db, beihilfesatz)
+    berechnung = erstattung.berechne(positionen, tarif, beihilfesatz, data.get("leistungsdatum"))
     berechnung["person"] = person
     berechnung["beihilfesatz"] = beihilfesatz
     return berechnung
 
 @app.get("/api/beihilfe/antraege")
+@antwortcache.gecacht("dokumente")
 async def beihilfe_antraege(person: str = "", user: dict = Depends(get_current_user)):
+    return await einzelflug.teile(flug_schluessel(("beihilfe_antraege", person)), _beihilfe_antraege, person)
+
+def _beihilfe_antraege(person: str) -> dict:
     with get_db() as db:
-        query = "SELECT id,person,titel,aussteller,datum,betrag,eingereicht_beihilfe,ki_extraktion,erstellt_am FROM dokumente WHERE 1=1"
+        query = """SELECT d.id,d.person,d.titel,d.aussteller,d.datum,d.betrag,d.eingereicht_beihilfe,
+                          -- ohne gespeicherte Positionen: Wert aus der KI-Extraktion
+                          COALESCE(e.erstattung,
+                                   CASE WHEN json_valid(d.ki_extraktion)
+                                        THEN json_extract(d.ki_extraktion, '$.erstattung') END)
+                              AS erstattung_erwartet
+                   FROM dokumente d LEFT JOIN erstattungen e ON e.dokument_id = d.id WHERE 1=1"""
         params = []
         if person:
-            query += " AND person=?"
+            query += " AND d.person=?"
             params.append(person)
-        query += " ORDER BY datum DESC"
+        query += " ORDER BY d.datum DESC"
         rows = db.execute(query, params).fetchall()
-    antraege = []
-    for r in rows:
-        ki = {}
-        try: ki = _json.loads(r["ki_extraktion"] or "{}")
-        except: pass
-        antraege.append({"id":r["id"],"person":r["person"],"titel":r["titel"],"aussteller":r["aussteller"],"datum":r["datum"],"betrag":r["betrag"],"eingereicht":bool(r["eingereicht_beihilfe"]),"erstattung_erwartet":ki.get("erstattung")})
+    antraege = [{"id":r["id"],"person":r["person"],"titel":r["titel"],"aussteller":r["aussteller"],"datum":r["datum"],"betrag":r["betrag"],"eingereicht":bool(r["eingereicht_beihilfe"]),"erstattung_erwartet":r["erstattung_erwartet"]} for r in rows]
     offen = [a for a in antraege if not a["eingereicht"]]
     return {"antraege":antraege,"offen":len(offen),"eingereicht":len(antraege)-len(offen),"summe_offen":round(sum(a["betrag"] or 0 for a in offen),2)}
 
@@ -1045,8 +1385,63 @@ async def beihilfe_eingereicht(dok_id: int, user: dict = Depends(get_current_use
     with get_db() as db:
         db.execute("UPDATE dokumente SET eingereicht_beihilfe=1 WHERE id=?", (dok_id,))
         db.commit()
+    geaendert("dokumente", "UPDATE", dok_id)
     return {"ok":True}
 
+@app.post("/api/beihilfe/neuberechnen")
+async def beihilfe_neuberechnen(person: str = "", jahr: int = 0, erzwingen: bool = False,
+                                user: dict = Depends(get_current_user)):
+    """Erwartete Erstattung aller Rechnungen im Umfang nachrechnen (siehe erstattung.py)"""
+    with get_db() as db:
+        stats = erstattung.neu_berechnen(db, goae.stand(), person or None, jahr or None, erzwingen=erzwingen)
+    if stats["neu_berechnet"] or stats["entfernt"]:
+        antwortcache.invalidiere("dokumente")
+    return stats
+
+@app.get("/api/beihilfe/erstattungen")
+async def beihilfe_erstattungen(person: str = "", jahr: int = 0, user: dict = Depends(get_current_user)):
+    """Gespeicherte Ergebnisse je Rechnung + Summen je Person und Jahr"""
+    q, params = "FROM erstattungen WHERE 1=1", []
+    if person: q += " AND person=?"; params.append(person)
+    if jahr:   q += " AND jahr=?"; params.append(jahr)
+    with get_db() as db:
+        rows = db.execute(f"""SELECT dokument_id, person, jahr, beihilfesatz, gesamt_rechnung, gesamt_beihilfefaehig,
+                                     nicht_beihilfefaehig, erstattung, eigenanteil, berechnet_am
+                              {q} ORDER BY jahr DESC, dokument_id DESC""", params).fetchall()
+        positionen = {}
+        for p in db.execute(f"""SELECT * FROM rechnungspositionen WHERE dokument_id IN (SELECT dokument_id {q})
+                                ORDER BY dokument_id, nr""", params):
+            positionen.setdefault(p["dokument_id"], []).append(dict(p))
+        summen = db.execute(f"""SELECT person, jahr, COUNT(*) AS rechnungen, ROUND(SUM(gesamt_rechnung),2) AS gesamt_rechnung,
+                                       ROUND(SUM(gesamt_beihilfefaehig),2) AS gesamt_beihilfefaehig,
+                                       ROUND(SUM(erstattung),2) AS erstattung, ROUND(SUM(eigenanteil),2) AS eigenanteil
+                                {q} GROUP BY person, jahr ORDER BY jahr DESC, person""", params).fetchall()
+    return {"erstattungen": [{**dict(r), "positionen": positionen.get(r["dokument_id"], [])} for r in rows],
+            "summen": [dict(r) for r in summen]}
+
+@app.get("/api/beihilfe/auswertung")
+@antwortcache.gecacht("dokumente", "personen")
+async def beihilfe_auswertung(person: str = "", jahr: int = 0, top: int = 10, user: dict = Depends(get_current_user)):
+    """Erstattung pro Jahr + häufigste GOÄ-Ziffern — Aggregate über erstattungen/rechnungspositionen"""
+    wo, params = "WHERE 1=1", []
+    if person: wo += " AND e.person=?"; params.append(person)
+    if jahr:   wo += " AND e.jahr=?"; params.append(jahr)
+    with get_db() as db:
+        jahre = db.execute(f"""SELECT e.jahr, COUNT(*) AS rechnungen, ROUND(SUM(e.gesamt_rechnung),2) AS gesamt_rechnung,
+                                      ROUND(SUM(e.erstattung),2) AS erstattung, ROUND(SUM(e.eigenanteil),2) AS eigenanteil
+                               FROM erstattungen e {wo} GROUP BY e.jahr ORDER BY e.jahr DESC""", params).fetchall()
+        ziffern = db.execute(f"""SELECT p.ziffer, COUNT(*) AS anzahl, ROUND(SUM(p.betrag),2) AS betrag,
+                                        ROUND(SUM(p.beihilfefaehiger_betrag),2) AS beihilfefaehig,
+                                        SUM(p.beihilfefaehig = 0) AS nicht_beihilfefaehig
+                                 FROM rechnungspositionen p JOIN erstattungen e ON e.dokument_id = p.dokument_id
+                                 {wo}
+                                 GROUP BY p.ziffer ORDER BY anzahl DESC, betrag DESC LIMIT ?""",
+                             params + [max(1, min(top, 100))]).fetchall()
+    tarif = goae.stand()
+    return {"jahre": [dict(r) for r in jahre],
+            "top_ziffern": [{**dict(r), "beschreibung": (tarif.hole(r["ziffer"]) or {}).get("beschreibung")}
+                            for r in ziffern]}
+
 @app.post("/api/dokumente")
 async def create_dokument(request: Request, user: dict = Depends(get_current_user)):
     data = await request.json()
@@ -1064,17 +1459,18 @@ async def create_dokument(request: Request, user: dict = Depends(get_current_use
             datetime.utcnow().isoformat()
         ))
         db.commit()
+    geaendert("dokumente", "CREATE", cur.lastrowid)
     return {"id": cur.lastrowid, "ok": True}
 
 @app.get("/{path:path}")
-async def spa_fallback(path: str):
-    f = STATIC_DIR / "index.html"
-    if f.exists(): return FileResponse(f)
+async def spa_fallback(path: str, request: Request):
+    return statisch.seite(STATIC_DIR, "index.html", request)
 
 @app.post("/api/beihilfe/foto-analysieren")
 async def beihilfe_foto_analysieren(
     file: UploadFile = File(...),
     person: str = Form("Sven"),
+    leistungsdatum: str = Form(""),
     user: dict = Depends(get_current_user)
 ):
     import httpx, base64, re as _re
@@ -1123,19 +1519,19 @@ Regeln:
             positionen = _json.loads(match.group()) if match else []
         
         # Beihilfe berechnen
-        goae_db = _lade_goae_db()
+        tarif = goae.stand()
         with get_db() as db:
             row = db.execute("SELECT beihilfesatz FROM personen WHERE name=?", (person,)).fetchone()
             beihilfesatz = float(row["beihilfesatz"]) if row else 0.50
         
-        berechnung = _berechne_erstattung(positionen, goae_db, beihilfesatz)
+        berechnung = erstattung.berechne(positionen, tarif, beihilfesatz, leistungsdatum)
         berechnung["person"] = person
         berechnung["positionen_erkannt"] = len(positionen)
         
         # Warnungen
         warnungen = berechnung.get("hinweise", [])
         for p in positionen:
-            if str(p.get("ziffer","")) not in goae_db:
+            if not tarif.hole(p.get("ziffer",""), p.get("datum") or leistungsdatum):
                 warnungen.append(f"⚠️ GOÄ {p.get('ziffer')} nicht in Datenbank — manuell prüfen")
         berechnung["warnungen"] = warnungen
         
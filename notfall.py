@@ -0,0 +1,106 @@
+"""
+Notfall — vorberechnete Notfallkarten mit QR-Code
+=================================================
+/api/notfall/{id} muss ohne Login und auch dann sofort antworten, wenn die
+DB gerade durch einen Import gesperrt ist. Deshalb wird jede Karte nach
+Änderungen an personen/medikamente (und beim Start) einmal gebaut und liegt
+danach im Speicher und als Dateien in data/notfall/:
+
+  <id>.json   Karte wie bisher (name, blutgruppe, allergien, medikamente, …)
+  <id>.svg    QR-Code mit dem Kartentext — jede Handykamera zeigt ihn offline an
+  <id>.png    dasselbe als PNG (Sperrbildschirm, Ausdruck für den Geldbeutel)
+
+hole() liest nur Speicher bzw. Dateien, nie die DB. Der QR-Code braucht
+segno (pip install segno); ohne segno gibt es Karten ohne SVG/PNG.
+"""
+
+import io, json, os
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import segno
+except ImportError:
+    segno = None
+
+QR_MAX_ZEICHEN = 900          # darüber wird der QR-Code zu dicht für Handykameras
+
+_karten = {}                  # person_id → {"json": bytes, "svg": bytes|None, "png": bytes|None}
+
+def _karte(db, p) -> dict:
+    meds = [dict(r) for r in db.execute(
+        "SELECT name,dosierung,haeufigkeit FROM medikamente WHERE person_id=? AND aktiv=1", (p["id"],)
+    ).fetchall()]
+    allergien = []
+    try: allergien = json.loads(p["allergien"] or "[]")
+    except: pass
+    return {
+        "name": p["name"], "geburtsdatum": p["geburtsdatum"],
+        "blutgruppe": p["blutgruppe"], "allergien": allergien,
+        "notfallkontakt": p["notfallkontakt"], "medikamente": meds,
+        "hausarzt": p["arzt_hausarzt"],
+        "generiert_am": datetime.now().isoformat()
+    }
+
+def qr_text(k: dict) -> str:
+    """Karte → Klartext für den QR-Code (ohne App lesbar)"""
+    def datum(s):
+        try: return datetime.fromisoformat(s).strftime("%d.%m.%Y")
+        except (TypeError, ValueError): return s or "—"
+    zeilen = [f"NOTFALL – {k['name']}",
+              f"Geb.: {datum(k['geburtsdatum'])}",
+              f"Blutgruppe: {k['blutgruppe'] or 'unbekannt'}",
+              f"Allergien: {', '.join(map(str, k['allergien'])) or 'keine bekannt'}"]
+    meds = [" ".join(x for x in (m["name"], m["dosierung"], m["haeufigkeit"] and f"({m['haeufigkeit']})") if x)
+            for m in k["medikamente"]]
+    if meds: zeilen.append("Medikamente: " + "; ".join(meds))
+    if k["notfallkontakt"]: zeilen.append(f"Kontakt: {k['notfallkontakt']}")
+    if k["hausarzt"]: zeilen.append(f"Hausarzt: {k['hausarzt']}")
+    zeilen.append(f"Stand: {datum(k['generiert_am'][:10])}")
+    text = "\n".join(zeilen)
+    return text if len(text) <= QR_MAX_ZEICHEN else text[:QR_MAX_ZEICHEN - 1] + "…"
+
+def _qr(text: str) -> tuple:
+    """→ (svg, png) als bytes, (None, None) ohne segno"""
+    if segno is None:
+        return None, None
+    qr = segno.make(text, error="m", micro=False)
+    svg, png = io.BytesIO(), io.BytesIO()
+    qr.save(svg, kind="svg", scale=4, border=4, xmldecl=False)
+    qr.save(png, kind="png", scale=8, border=4)
+    return svg.getvalue(), png.getvalue()
+
+def _schreibe(pfad: Path, daten: bytes) -> None:
+    """Atomar ersetzen — ein Leser sieht nie eine halbe Datei"""
+    tmp = pfad.with_suffix(pfad.suffix + ".tmp")
+    tmp.write_bytes(daten)
+    os.replace(tmp, pfad)
+
+def aktualisiere(db, verzeichnis: Path) -> int:
+    """Alle Karten neu bauen (Familie = eine Handvoll Personen) → Anzahl"""
+    verzeichnis.mkdir(parents=True, exist_ok=True)
+    neu = {}
+    for p in db.execute("SELECT * FROM personen").fetchall():
+        k = _karte(db, p)
+        svg, png = _qr(qr_text(k))
+        neu[p["id"]] = {"json": json.dumps(k, ensure_ascii=False).encode(), "svg": svg, "png": png}
+    for pid, e in neu.items():
+        for art in ("json", "svg", "png"):
+            if e[art] is not None:
+                _schreibe(verzeichnis / f"{pid}.{art}", e[art])
+    for f in verzeichnis.iterdir():                   # Karten gelöschter Personen
+        if f.stem.isdigit() and int(f.stem) not in neu:
+            f.unlink(missing_ok=True)
+    _karten.clear()
+    _karten.update(neu)
+    return len(neu)
+
+def hole(person_id: int, art: str, verzeichnis: Path) -> bytes | None:
+    """Karte ("json") oder QR ("svg"/"png") aus Speicher, sonst aus data/notfall/"""
+    e = _karten.get(person_id)
+    if e is not None:
+        return e[art]
+    try:
+        return (verzeichnis / f"{person_id}.{art}").read_bytes()
+    except OSError:
+        return None
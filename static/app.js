@@ -0,0 +1,863 @@
+// HealthLedger SPA — Kern: Navigation, Dashboard, Dokumente, Gesundheit, Notfall, Live-Updates
+// ── CONST ────────────────────────────────────────────────
+const DOK_ICONS={rechnung:'🧾',arztbrief:'📋',befund:'🔬',rezept:'💊',impfung:'💉',sonstiges:'📄'};
+const DOK_LABELS={rechnung:'Rechnung',arztbrief:'Arztbrief',befund:'Befund',rezept:'Rezept',impfung:'Impfung',sonstiges:'Sonstiges'};
+const PERSON_COLORS={sven:'sven',heidi:'heidi',julian:'julian',theresa:'theresa'};
+// Token aus URL-Hash lesen (Safari-Fallback)
+(function(){
+  const hash = window.location.hash;
+  if (hash && hash.startsWith('#token=')) {
+    const t = hash.slice(7);
+    try { localStorage.setItem('hl_token', t); } catch(e) {}
+    sessionStorage.setItem('hl_token', t);
+    history.replaceState(null, '', window.location.pathname);
+  }
+})();
+
+function getToken() {
+  try { return localStorage.getItem('hl_token') || sessionStorage.getItem('hl_token'); }
+  catch(e) { return sessionStorage.getItem('hl_token'); }
+}
+
+// GET-Antworten mit ETag: url → {etag, body} — bei 304 liefert apiFetch den Body von hier
+const _etags = new Map();
+
+async function apiFetch(url, opts={}) {
+  const token = getToken();
+  const headers = {'Authorization': 'Bearer ' + token, ...(opts.headers||{})};
+  // Kein Content-Type bei FormData — Browser setzt es automatisch mit Boundary
+  if (opts.body && !(opts.body instanceof FormData) && !headers['Content-Type']) {
+    headers['Content-Type'] = 'application/json';
+  }
+  if (opts.body instanceof FormData) delete headers['Content-Type'];
+  const isGet = (opts.method||'GET').toUpperCase() === 'GET';
+  const cached = isGet ? _etags.get(url) : null;
+  if (cached) headers['If-None-Match'] = cached.etag;
+  const r = await fetch(url, {...opts, headers, credentials:'include', ...(isGet ? {cache:'no-store'} : {})});
+  if (r.status === 401) { window.location.href = '/'; return null; }
+  if (r.status === 304 && cached) {
+    return new Response(cached.body, {status:200, headers:{'Content-Type':'application/json', 'ETag':cached.etag}});
+  }
+  const etag = r.headers.get('ETag');
+  if (isGet && r.ok && etag) _etags.set(url, {etag, body: await r.clone().text()});
+  return r;
+}
+
+// ── LOKALER STAND (IndexedDB) ────────────────────────────
+// Dashboard, Personen, Medikamente, Notfall und die letzten Dokumente liegen
+// auf dem Gerät: url → {etag, body, zeit}. ladeLokal() rendert sofort den
+// gespeicherten Stand, fragt dann mit If-None-Match nach und rendert nur bei
+// Änderung neu (stale-while-revalidate). Offline bleibt der lokale Stand stehen.
+const LOKAL = /^\/api\/(dashboard|personen|medikamente(\?.*)?|notfall\/\d+|dokumente\?limit=100)$/;
+
+const lokal = (()=>{
+  let dbp=null;
+  const open=()=>dbp||(dbp=new Promise((ok,err)=>{
+    const req=indexedDB.open('healthledger',1);
+    req.onupgradeneeded=()=>req.result.createObjectStore('antworten');
+    req.onsuccess=()=>ok(req.result);
+    req.onerror=()=>err(req.error);
+  }));
+  const tx=(mode,fn)=>open().then(db=>new Promise((ok,err)=>{
+    const t=db.transaction('antworten',mode);
+    const r=fn(t.objectStore('antworten'));
+    t.oncomplete=()=>ok(r.result);
+    t.onerror=()=>err(t.error);
+  }));
+  return {
+    get:url=>tx('readonly',s=>s.get(url)).catch(()=>null),
+    put:(url,v)=>tx('readwrite',s=>s.put({...v,zeit:Date.now()},url)).catch(()=>{}),
+  };
+})();
+
+// render(daten) läuft bis zu zweimal: lokaler Stand, dann Serverstand (falls anders).
+// Wirft nur, wenn weder lokal noch vom Server etwas kommt.
+async function ladeLokal(url, render){
+  const merken=LOKAL.test(url);
+  const alt=merken?await lokal.get(url):null;
+  if(alt){
+    if(alt.etag&&!_etags.has(url))_etags.set(url,{etag:alt.etag,body:alt.body});
+    render(JSON.parse(alt.body));
+  }
+  try{
+    const r=await apiFetch(url);
+    if(!r||!r.ok)throw new Error('HTTP '+(r&&r.status));
+    const body=await r.text();
+    if(alt&&alt.body===body)return;
+    if(merken)lokal.put(url,{etag:r.headers.get('ETag'),body});
+    render(JSON.parse(body));
+  }catch(err){if(!alt)throw err}
+}
+
+const PERSON_EMOJIS={sven:'👨',heidi:'👩',julian:'👦',theresa:'👧'};
+
+let personen=[], dokumente=[], selUploadPerson='', selMedPerson='', selValPerson='', selEvPerson='', selNotfallPerson=null;
+
+// ── UTILS ─────────────────────────────────────────────────
+const e=s=>String(s||'').replace(/&/g,'&amp;').replace(/</g,'&lt;').replace(/>/g,'&gt;');
+const eur=n=>n==null?'—':new Intl.NumberFormat('de-DE',{style:'currency',currency:'EUR'}).format(n);
+const fdate=s=>{if(!s)return'';try{return new Date(s).toLocaleDateString('de-DE')}catch{return s}};
+function toast(msg,d=2800){const t=document.getElementById('toast');t.textContent=msg;t.classList.add('show');setTimeout(()=>t.classList.remove('show'),d)}
+
+// ── MODULE ────────────────────────────────────────────────
+// Upload, Chat und Beihilfe werden erst beim ersten Öffnen ihres Tabs geladen,
+// bild.js als Worker (oder bei Bedarf als Script, siehe FOTOS).
+// statisch.py ersetzt die Pfade beim Ausliefern durch gehashte /assets/-URLs.
+const MODULE={upload:'/static/upload.js',chat:'/static/chat.js',beihilfe:'/static/beihilfe.js',bild:'/static/bild.js'};
+const _module={};
+
+function ladeModul(name){
+  return _module[name]||(_module[name]=new Promise((ok,err)=>{
+    const s=document.createElement('script');
+    s.src=MODULE[name];
+    s.onload=ok;
+    s.onerror=()=>{delete _module[name];err(new Error(name))};
+    document.head.appendChild(s);
+  }));
+}
+
+// Der Kamera-Button im Chat nutzt das Upload-Feld, bevor der Upload-Tab offen war —
+// upload.js überschreibt diese Funktion beim Laden.
+function handleFile(input){ladeModul('upload').then(()=>handleFile(input))}
+
+// ── FOTOS ─────────────────────────────────────────────────
+// Kamerafotos vor dem Upload verkleinern: max. Kante, Neukodierung, EXIF-Drehung
+// (static/bild.js). Läuft im Worker, ohne OffscreenCanvas im Hauptthread.
+// JPEG als Standard — das Vision-Modell dekodiert WebP nicht zuverlässig.
+const BILD={maxKante:2048, typ:'image/jpeg', qualitaet:0.85};
+let _bildWorker=null, _bildId=0;
+const _bildAuftraege=new Map();
+
+function bildWorker(){
+  if(_bildWorker!==null)return _bildWorker;
+  _bildWorker=false;
+  if(typeof Worker==='undefined'||typeof OffscreenCanvas==='undefined')return false;
+  try{
+    const w=new Worker(MODULE.bild);
+    w.onmessage=ev=>{
+      const a=_bildAuftraege.get(ev.data.id);
+      if(!a)return;
+      _bildAuftraege.delete(ev.data.id);
+      if(ev.data.fehler)a.err(new Error(ev.data.fehler));else a.ok(ev.data);
+    };
+    w.onerror=()=>{_bildAuftraege.forEach(a=>a.err(new Error('worker')));_bildAuftraege.clear();};
+    _bildWorker=w;
+  }catch{}
+  return _bildWorker;
+}
+
+// → verkleinerte Datei; die Originaldatei bei PDFs, Fehlern oder wenn nichts gespart wird
+async function bildVerkleinern(file){
+  if(!file||!/^image\/(jpeg|png|webp|heic|heif)$/.test(file.type))return file;
+  try{
+    const w=bildWorker();
+    let r;
+    if(w){
+      r=await new Promise((ok,err)=>{const id=++_bildId;_bildAuftraege.set(id,{ok,err});w.postMessage({id,blob:file,opt:BILD});});
+    }else{
+      await ladeModul('bild');
+      r=await bildVerarbeiten(file,BILD);
+    }
+    if(!r.blob||r.blob.size>=file.size)return file;
+    const ext=BILD.typ==='image/webp'?'.webp':'.jpg';
+    return new File([r.blob],file.name.replace(/\.[^.]*$/,'')+ext,{type:BILD.typ});
+  }catch{return file}
+}
+
+// ── NAVIGATION ────────────────────────────────────────────
+async function sw(v,btn){
+  if(MODULE[v]){
+    try{await ladeModul(v)}catch{toast('⚠️ Offline — Bereich nicht verfügbar');return}
+  }
+  document.getElementById('chat-view').style.display='none';
+  document.querySelectorAll('.view').forEach(x=>x.classList.remove('active'));
+  document.querySelectorAll('.nb').forEach(b=>b.classList.remove('active'));
+  if(v==='chat'){document.getElementById('chat-view').style.display='flex';}
+  else{const el=document.getElementById(v+'-view');if(el)el.classList.add('active');}
+  if(btn)btn.classList.add('active');
+  if(v==='dash')loadDash();
+  if(v==='docs')loadDocs();
+  if(v==='notfall')renderNotfallChips();
+  if(v==='beihilfe')loadBeihilfe();
+}
+
+// ── PERSONEN CHIPS ────────────────────────────────────────
+function makeChips(containerId, selVar, callback, includeAll=false){
+  const c=document.getElementById(containerId);
+  if(!c)return;
+  c.innerHTML='';
+  if(includeAll){
+    const all=document.createElement('div');
+    all.className='chip sel';
+    all.textContent='Alle';
+    all.onclick=function(){window[selVar]='';document.querySelectorAll('#'+containerId+' .chip').forEach(x=>x.classList.remove('sel'));this.classList.add('sel');callback('');};
+    c.appendChild(all);
+  }
+  personen.forEach(p=>{
+    const d=document.createElement('div');
+    d.className='chip';
+    d.textContent=(PERSON_EMOJIS[p.name.toLowerCase()]||'👤')+' '+p.name;
+    d.onclick=function(){window[selVar]=p.name;document.querySelectorAll('#'+containerId+' .chip').forEach(x=>x.classList.remove('sel'));this.classList.add('sel');callback(p.name);};
+    c.appendChild(d);
+  });
+}
+
+// ── DASHBOARD ─────────────────────────────────────────────
+async function loadDash(){
+  try{
+    await ladeLokal('/api/dashboard',renderDash);
+  }catch{document.getElementById('dash-content').innerHTML='<div style="padding:20px;color:var(--red)">⚠️ Ladefehler</div>'}
+}
+
+function renderDash(d){
+  const now=new Date();
+  let h=`<div class="stats-grid">
+    <div class="stat"><div class="sv" style="color:var(--green)">${d.dok_gesamt}</div><div class="sk">Dokumente</div></div>
+    <div class="stat"><div class="sv" style="color:var(--blue)">${d.med_gesamt}</div><div class="sk">Medikamente aktiv</div></div>
+  </div>`;
+
+  h+='<div class="sec">Familienmitglieder</div>';
+  d.personen.forEach(p=>{
+    const em=PERSON_EMOJIS[p.name.toLowerCase()]||'👤';
+    const colorClass=PERSON_COLORS[p.name.toLowerCase()]||'';
+    h+=`<div class="card person-card" onclick="showPerson(${p.id})">
+      <div class="avatar ${colorClass}">${em}</div>
+      <div class="person-info">
+        <div class="person-name">${e(p.name)}</div>
+        <div class="person-meta">${p.versicherung_name||'Keine Versicherung'} ${p.beihilfesatz>0?'· Beihilfe '+Math.round(p.beihilfesatz*100)+'%':''}</div>
+        <div class="person-badges">
+          <span class="badge badge-blue">📄 ${p.dok_count} Dok.</span>
+          <span class="badge badge-green">💊 ${p.med_count} Medik.</span>
+          ${p.blutgruppe?`<span class="badge badge-red">🩸 ${e(p.blutgruppe)}</span>`:''}
+        </div>
+      </div>
+      <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" style="width:16px;color:var(--text-dim)"><polyline points="9 18 15 12 9 6"/></svg>
+    </div>`;
+  });
+
+  if(d.letzte_dok.length){
+    h+='<div class="sec">Zuletzt hinzugefügt</div><div class="card" style="padding:0 14px">';
+    d.letzte_dok.forEach((dok,i)=>{
+      h+=`<div class="titem">
+        <div class="ticon">${DOK_ICONS[dok.typ]||'📄'}</div>
+        <div class="tbody">
+          <div class="ttitle">${e(dok.aussteller||'Unbekannt')}</div>
+          <div class="tmeta">${e(dok.person)} · ${DOK_LABELS[dok.typ]||dok.typ} · ${fdate(dok.datum)}</div>
+        </div>
+        ${dok.betrag?`<div class="tamt">${eur(dok.betrag)}</div>`:''}
+      </div>`;
+    });
+    h+='</div>';
+  }
+  document.getElementById('dash-content').innerHTML=h;
+}
+
+function showPerson(pid){
+  const p=personen.find(x=>x.id===pid);
+  if(!p)return;
+  const em=PERSON_EMOJIS[p.name.toLowerCase()]||'👤';
+  document.getElementById('modal-body').innerHTML=`
+    <div style="display:flex;align-items:center;gap:14px;margin-bottom:20px">
+      <div class="avatar ${PERSON_COLORS[p.name.toLowerCase()]||''}" style="width:54px;height:54px;font-size:24px">${em}</div>
+      <div>
+        <div style="font-size:20px;font-weight:600">${e(p.name)}</div>
+        <div style="font-size:12px;color:var(--text-dim)">${p.versicherung_name||''} ${p.versicherung_nr?'#'+p.versicherung_nr:''}</div>
+      </div>
+    </div>
+    <div class="card" style="margin-bottom:12px">
+      ${row('Geburtsdatum', fdate(p.geburtsdatum)||'—')}
+      ${row('Blutgruppe', p.blutgruppe||'—')}
+      ${row('Beihilfesatz', p.beihilfesatz>0?Math.round(p.beihilfesatz*100)+'%':'—')}
+      ${row('Hausarzt', p.arzt_hausarzt||'—')}
+      ${row('Notfallkontakt', p.notfallkontakt||'—')}
+      ${row('Allergien', p.allergien&&p.allergien!='[]'?JSON.parse(p.allergien||'[]').join(', '):'keine bekannt')}
+    </div>
+    <button class="btn-primary" onclick="openEditPerson(${pid});closeModal()">✏️ Bearbeiten</button>
+  `;
+  document.getElementById('modal').classList.add('open');
+}
+
+function row(lbl,val){return`<div style="display:flex;justify-content:space-between;padding:7px 0;border-bottom:1px solid var(--border);font-size:13px"><span style="color:var(--text-dim)">${lbl}</span><span>${e(val)}</span></div>`}
+
+function openEditPerson(pid){
+  const p=personen.find(x=>x.id===pid);
+  if(!p)return;
+  document.getElementById('modal-body').innerHTML=`
+    <h3 style="font-size:17px;margin-bottom:16px">✏️ ${e(p.name)} bearbeiten</h3>
+    <div class="form-group"><label class="form-label">Geburtsdatum</label><input class="form-input" id="ep-geb" type="date" value="${p.geburtsdatum||''}"></div>
+    <div class="form-group"><label class="form-label">Blutgruppe</label>
+      <select class="form-input form-select" id="ep-bl">
+        ${['','0+','0-','A+','A-','B+','B-','AB+','AB-'].map(v=>`<option value="${v}" ${p.blutgruppe===v?'selected':''}>${v||'Unbekannt'}</option>`).join('')}
+      </select></div>
+    <div class="form-group"><label class="form-label">Versicherung</label><input class="form-input" id="ep-vers" type="text" value="${e(p.versicherung_name||'')}"></div>
+    <div class="form-group"><label class="form-label">Beihilfesatz (%)</label><input class="form-input" id="ep-bh" type="number" min="0" max="100" step="5" value="${Math.round((p.beihilfesatz||0)*100)}"></div>
+    <div class="form-group"><label class="form-label">Hausarzt</label><input class="form-input" id="ep-arzt" type="text" value="${e(p.arzt_hausarzt||'')}"></div>
+    <div class="form-group"><label class="form-label">Notfallkontakt</label><input class="form-input" id="ep-notfall" type="text" placeholder="Name, Tel." value="${e(p.notfallkontakt||'')}"></div>
+    <div class="form-group"><label class="form-label">Allergien (kommagetrennt)</label><input class="form-input" id="ep-allergien" type="text" placeholder="Penicillin, Latex…" value="${JSON.parse(p.allergien||'[]').join(', ')}"></div>
+    <button class="btn-primary" onclick="savePerson(${pid})">💾 Speichern</button>
+  `;
+  document.getElementById('modal').classList.add('open');
+}
+
+async function savePerson(pid){
+  const allergienRaw=document.getElementById('ep-allergien').value.trim();
+  const allergien=allergienRaw?allergienRaw.split(',').map(s=>s.trim()).filter(Boolean):[];
+  const body={
+    geburtsdatum: document.getElementById('ep-geb').value,
+    blutgruppe:   document.getElementById('ep-bl').value,
+    versicherung_name: document.getElementById('ep-vers').value,
+    beihilfesatz: parseFloat(document.getElementById('ep-bh').value)/100||0,
+    arzt_hausarzt: document.getElementById('ep-arzt').value,
+    notfallkontakt: document.getElementById('ep-notfall').value,
+    allergien: JSON.stringify(allergien)
+  };
+  try{
+    const r=await apiFetch('/api/personen/'+pid,{method:'PUT',headers:{'Content-Type':'application/json'},body:JSON.stringify(body)});
+    if(r.ok){toast('✅ Gespeichert!');closeModal();await loadPersonen();loadDash();}
+    else{toast('⚠️ Fehler')}
+  }catch{toast('⚠️ Verbindungsfehler')}
+}
+
+// ── DOKUMENTE ─────────────────────────────────────────────
+// Listen sind virtuell (static/vliste.js): nur sichtbare Zeilen im DOM,
+// weitere Seiten kommen beim Scrollen per offset nach.
+const DOK_SEITE=100;
+let docFilter={person:'',typ:''};
+
+function docsUrl(offset=0){
+  let url='/api/dokumente?limit='+DOK_SEITE;
+  if(docFilter.person)url+='&person='+encodeURIComponent(docFilter.person);
+  if(docFilter.typ)url+='&typ='+encodeURIComponent(docFilter.typ);
+  if(offset)url+='&offset='+offset;
+  return url;
+}
+
+async function loadDocs(person='',typ=''){
+  docFilter={person,typ};
+  try{
+    await ladeLokal(docsUrl(),d=>{dokumente=d;renderDokumente(dokumente)});
+  }catch{document.getElementById('docs-list').innerHTML='<div style="padding:20px;color:var(--red)">⚠️ Ladefehler</div>'}
+}
+
+function filterDok(typ,el){
+  document.querySelectorAll('.dtype').forEach(x=>x.classList.remove('active'));el.classList.add('active');
+  loadDocs('',typ==='alle'?'':typ);
+}
+
+function renderDokumente(list){
+  // Ende erst bei leerer Seite: Live-Einfügungen verschieben offset, Dubletten fliegen raus
+  vliste(document.getElementById('docs-list'),{
+    hoehe:88, zeile:dokZeile,
+    leer:'<div style="text-align:center;padding:40px;color:var(--text-dim)">Keine Dokumente</div>',
+    nachladen:async n=>{
+      const r=await apiFetch(docsUrl(n));
+      const ids=new Set(dokumente.map(d=>d.id));
+      const neu=(await r.json()).filter(d=>!ids.has(d.id));
+      dokumente=dokumente.concat(neu);
+      return neu;
+    },
+  }).setze(list||[],!list||list.length<DOK_SEITE);
+}
+
+function dokZeile(d){
+  return `
+    <div class="card" style="cursor:pointer;padding:12px;height:78px;overflow:hidden" onclick="showDok(${d.id})">
+      <div style="display:flex;align-items:center;gap:10px">
+        <div style="font-size:28px">${DOK_ICONS[d.typ]||'📄'}</div>
+        <div style="flex:1;min-width:0">
+          <div style="font-size:13px;font-weight:500;white-space:nowrap;overflow:hidden;text-overflow:ellipsis">${e(d.aussteller||'Unbekannt')}</div>
+          <div style="font-size:11px;color:var(--text-dim);margin-top:2px">${e(d.person||'')} · ${DOK_LABELS[d.typ]||d.typ} · ${fdate(d.datum)}</div>
+          ${d.beschreibung?`<div style="font-size:11px;color:var(--text-dim);margin-top:2px;white-space:nowrap;overflow:hidden;text-overflow:ellipsis">${e(d.beschreibung)}</div>`:''}
+        </div>
+        ${d.betrag?`<div style="font-family:var(--mono);font-size:13px;color:var(--green);flex-shrink:0">${eur(d.betrag)}</div>`:''}
+      </div>
+    </div>`;
+}
+
+function showDok(id){
+  const d=dokumente.find(x=>x.id===id);if(!d)return;
+  const tags=JSON.parse(d.tags||'[]');
+  document.getElementById('modal-body').innerHTML=`
+    <div style="text-align:center;font-size:48px;margin-bottom:12px">${DOK_ICONS[d.typ]||'📄'}</div>
+    <h3 style="font-size:17px;margin-bottom:4px;text-align:center">${e(d.aussteller||'Unbekannt')}</h3>
+    <div style="text-align:center;font-size:12px;color:var(--text-dim);margin-bottom:16px">${DOK_LABELS[d.typ]||d.typ}</div>
+    <div class="card" style="margin-bottom:12px">
+      ${row('Patient', d.person||'—')}
+      ${row('Datum', fdate(d.datum)||'—')}
+      ${d.betrag?row('Betrag', eur(d.betrag)):''}
+      ${d.diagnose?row('Diagnose', d.diagnose):''}
+    </div>
+    ${d.beschreibung?`<div style="background:var(--bg3);border:1px solid var(--border);border-radius:var(--r-sm);padding:12px;font-size:13px;color:var(--text-mid);margin-bottom:12px;line-height:1.5">${e(d.beschreibung)}</div>`:''}
+    ${tags.length?`<div style="display:flex;gap:6px;flex-wrap:wrap;margin-bottom:14px">${tags.map(t=>`<span class="badge badge-blue">${e(t)}</span>`).join('')}</div>`:''}
+    <div style="display:flex;gap:8px">
+      ${d.file_path?`<a href="/api/uploads/${e(d.file_path.split('/').pop())}" target="_blank" style="flex:1"><button class="btn-primary" style="background:var(--blue)">👁 Ansehen</button></a>`:''}
+      <button class="btn-sec" style="color:var(--red);border-color:var(--red)" onclick="delDok(${id})">🗑 Löschen</button>
+    </div>
+  `;
+  document.getElementById('modal').classList.add('open');
+}
+
+async function delDok(id){
+  if(!confirm('Dokument wirklich löschen?'))return;
+  try{
+    await apiFetch('/api/dokumente/'+id,{method:'DELETE'});
+    toast('🗑 Gelöscht');closeModal();loadDocs();loadDash();
+  }catch{toast('⚠️ Fehler')}
+}
+
+// ── GESUNDHEIT ─────────────────────────────────────────────
+function healthTab(tab,btn){
+  document.getElementById('health-meds').style.display=tab==='meds'?'block':'none';
+  document.getElementById('health-values').style.display=tab==='values'?'block':'none';
+  document.getElementById('health-events').style.display=tab==='events'?'block':'none';
+  document.querySelectorAll('.tab-btn').forEach(b=>b.classList.remove('active'));
+  btn.classList.add('active');
+  if(tab==='meds')loadMeds();
+  if(tab==='values')loadVals();
+  if(tab==='events')loadEvents();
+}
+
+async function loadHealth(){
+  makeChips('med-person-chips','selMedPerson',()=>loadMeds(),true);
+  makeChips('val-person-chips','selValPerson',()=>loadVals(),true);
+  makeChips('ev-person-chips','selEvPerson',()=>loadEvents(),true);
+  loadMeds();
+}
+
+async function loadMeds(){
+  try{
+    let url='/api/medikamente';
+    if(selMedPerson)url+='?person='+encodeURIComponent(selMedPerson);
+    await ladeLokal(url,renderMeds);
+  }catch{document.getElementById('med-list').innerHTML='<div style="padding:20px;color:var(--red)">⚠️ Fehler</div>'}
+}
+
+function renderMeds(meds){
+  const c=document.getElementById('med-list');
+  if(!meds.length){c.innerHTML='<div style="text-align:center;padding:30px;color:var(--text-dim)">Keine aktiven Medikamente</div>';return}
+  c.innerHTML=meds.map(m=>`
+    <div class="med-item">
+      <div class="med-icon">💊</div>
+      <div class="med-info">
+        <div class="med-name">${e(m.name)}</div>
+        <div class="med-meta">${e(m.person)} · ${e(m.dosierung||'?')} · ${e(m.haeufigkeit||'täglich')}</div>
+        ${m.wirkstoff?`<div class="med-meta">${e(m.wirkstoff)}</div>`:''}
+      </div>
+      <span class="med-badge">${m.typ==='dauermedikation'?'dauerhaft':'Bedarf'}</span>
+      <button class="med-del" onclick="delMed(${m.id})">
+        <svg viewBox="0 0 24 24" fill="none" stroke="currentColor" style="width:16px"><polyline points="3 6 5 6 21 6"/><path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a1 1 0 0 1 1-1h4a1 1 0 0 1 1 1v2"/></svg>
+      </button>
+    </div>`).join('');
+}
+
+function openAddMed(){
+  document.getElementById('modal-body').innerHTML=`
+    <h3 style="font-size:17px;margin-bottom:16px">💊 Medikament hinzufügen</h3>
+    <div class="form-group"><label class="form-label">Person *</label>
+      <select class="form-input form-select" id="m-person">
+        ${personen.map(p=>`<option value="${e(p.name)}">${e(p.name)}</option>`).join('')}
+      </select></div>
+    <div class="form-group"><label class="form-label">Medikament *</label><input class="form-input" id="m-name" type="text" placeholder="z.B. Ibuprofen 400mg"></div>
+    <div class="form-group"><label class="form-label">Wirkstoff</label><input class="form-input" id="m-wirkstoff" type="text" placeholder="z.B. Ibuprofen"></div>
+    <div class="form-row">
+      <div class="form-group"><label class="form-label">Dosierung</label><input class="form-input" id="m-dos" type="text" placeholder="z.B. 1x täglich"></div>
+      <div class="form-group"><label class="form-label">Häufigkeit</label>
+        <select class="form-input form-select" id="m-hf">
+          <option value="täglich">täglich</option>
+          <option value="2x täglich">2x täglich</option>
+          <option value="wöchentlich">wöchentlich</option>
+          <option value="bei Bedarf">bei Bedarf</option>
+        </select></div>
+    </div>
+    <div class="form-group"><label class="form-label">Typ</label>
+      <select class="form-input form-select" id="m-typ">
+        <option value="dauermedikation">Dauermedikation</option>
+        <option value="bedarfsmedikation">Bedarfsmedikation</option>
+      </select></div>
+    <div class="form-group"><label class="form-label">Notiz</label><input class="form-input" id="m-notiz" type="text" placeholder="z.B. Morgens nüchtern"></div>
+    <button class="btn-primary" onclick="saveMed()">💾 Speichern</button>
+  `;
+  document.getElementById('modal').classList.add('open');
+}
+
+async function saveMed(){
+  const body={
+    person:document.getElementById('m-person').value,
+    name:document.getElementById('m-name').value.trim(),
+    wirkstoff:document.getElementById('m-wirkstoff').value.trim(),
+    dosierung:document.getElementById('m-dos').value.trim(),
+    haeufigkeit:document.getElementById('m-hf').value,
+    typ:document.getElementById('m-typ').value,
+    notiz:document.getElementById('m-notiz').value.trim()
+  };
+  if(!body.name){toast('⚠️ Name fehlt');return}
+  try{
+    const r=await apiFetch('/api/medikamente', {credentials:'include', method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(body)});
+    if(r.ok){toast('✅ Medikament gespeichert');closeModal();loadMeds();}
+    else{toast('⚠️ Fehler')}
+  }catch{toast('⚠️ Verbindungsfehler')}
+}
+
+async function delMed(id){
+  if(!confirm('Medikament als inaktiv markieren?'))return;
+  try{await apiFetch('/api/medikamente/'+id,{method:'DELETE'});toast('✅ Deaktiviert');loadMeds();}
+  catch{toast('⚠️ Fehler')}
+}
+
+const VAL_SEITE=100;
+const VAL_ICONS={gewicht:'⚖️',blutdruck:'❤️',blutzucker:'🩸',laborwert:'🔬',temperatur:'🌡️',puls:'💓'};
+
+async function loadVals(){
+  const url=n=>'/api/messwerte?limit='+VAL_SEITE+(n?'&offset='+n:'')+(selValPerson?'&person='+encodeURIComponent(selValPerson):'');
+  try{
+    const r=await apiFetch(url(0));
+    const vals=await r.json();
+    vliste(document.getElementById('val-list'),{
+      hoehe:58, seite:VAL_SEITE, zeile:valZeile,
+      leer:'<div style="text-align:center;padding:30px;color:var(--text-dim)">Keine Messwerte</div>',
+      nachladen:async n=>(await apiFetch(url(n))).json(),
+    }).setze(vals);
+  }catch{}
+}
+
+function valZeile(v){
+  return `
+    <div class="titem" style="height:58px;overflow:hidden;border-bottom:1px solid var(--border)">
+      <div class="ticon">${VAL_ICONS[v.typ]||'📊'}</div>
+      <div class="tbody">
+        <div class="ttitle" style="text-transform:capitalize">${e(v.typ)}: <strong>${v.wert}${v.wert2?'/'+v.wert2:''} ${e(v.einheit||'')}</strong></div>
+        <div class="tmeta" style="white-space:nowrap;overflow:hidden;text-overflow:ellipsis">${e(v.person)} · ${fdate(v.datum)}${v.zeit?' '+v.zeit.slice(0,5):''} ${v.notiz?'· '+e(v.notiz):''}</div>
+      </div>
+    </div>`;
+}
+
+function openAddVal(){
+  document.getElementById('modal-body').innerHTML=`
+    <h3 style="font-size:17px;margin-bottom:16px">📊 Messwert eintragen</h3>
+    <div class="form-group"><label class="form-label">Person *</label>
+      <select class="form-input form-select" id="v-person">
+        ${personen.map(p=>`<option value="${e(p.name)}">${e(p.name)}</option>`).join('')}
+      </select></div>
+    <div class="form-group"><label class="form-label">Typ *</label>
+      <select class="form-input form-select" id="v-typ" onchange="updateUnit()">
+        <option value="gewicht">⚖️ Gewicht</option>
+        <option value="blutdruck">❤️ Blutdruck</option>
+        <option value="blutzucker">🩸 Blutzucker</option>
+        <option value="temperatur">🌡️ Temperatur</option>
+        <option value="puls">💓 Puls</option>
+        <option value="laborwert">🔬 Laborwert</option>
+      </select></div>
+    <div class="form-row">
+      <div class="form-group"><label class="form-label">Wert *</label><input class="form-input" id="v-wert" type="number" step="0.1"></div>
+      <div class="form-group"><label class="form-label" id="v2-lbl" style="display:none">Diastolisch</label><input class="form-input" id="v-wert2" type="number" style="display:none"></div>
+    </div>
+    <div class="form-group"><label class="form-label">Einheit</label><input class="form-input" id="v-einheit" type="text" placeholder="kg, mmHg…" value="kg"></div>
+    <div class="form-group"><label class="form-label">Datum</label><input class="form-input" id="v-datum" type="date" value="${new Date().toISOString().split('T')[0]}"></div>
+    <button class="btn-primary" onclick="saveVal()">💾 Speichern</button>
+  `;
+  document.getElementById('modal').classList.add('open');
+}
+
+function updateUnit(){
+  const typ=document.getElementById('v-typ').value;
+  const units={gewicht:'kg',blutdruck:'mmHg',blutzucker:'mg/dl',temperatur:'°C',puls:'bpm',laborwert:''};
+  document.getElementById('v-einheit').value=units[typ]||'';
+  const showBP=typ==='blutdruck';
+  document.getElementById('v-wert2').style.display=showBP?'block':'none';
+  document.getElementById('v2-lbl').style.display=showBP?'block':'none';
+}
+
+async function saveVal(){
+  const body={
+    person:document.getElementById('v-person').value,
+    typ:document.getElementById('v-typ').value,
+    wert:parseFloat(document.getElementById('v-wert').value),
+    wert2:parseFloat(document.getElementById('v-wert2').value)||null,
+    einheit:document.getElementById('v-einheit').value,
+    datum:document.getElementById('v-datum').value
+  };
+  try{
+    const r=await apiFetch('/api/messwerte', {credentials:'include', method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(body)});
+    if(r.ok){toast('✅ Messwert gespeichert');closeModal();loadVals();}
+    else{toast('⚠️ Fehler')}
+  }catch{toast('⚠️ Verbindungsfehler')}
+}
+
+async function loadEvents(){
+  try{
+    let url='/api/ereignisse?limit=30';
+    if(selEvPerson)url+='&person='+encodeURIComponent(selEvPerson);
+    const r=await apiFetch(url);
+    const evs=await r.json();
+    const c=document.getElementById('ev-list');
+    if(!evs.length){c.innerHTML='<div style="text-align:center;padding:30px;color:var(--text-dim)">Keine Ereignisse</div>';return}
+    const icons={arztbesuch:'🩺',krankenhausaufenthalt:'🏥',operation:'🔪',impfung:'💉',diagnose:'📋'};
+    c.innerHTML=evs.map(ev=>`
+      <div class="titem">
+        <div class="ticon">${icons[ev.typ]||'📋'}</div>
+        <div class="tbody">
+          <div class="ttitle">${e(ev.titel||ev.typ)}</div>
+          <div class="tmeta">${e(ev.person)} · ${fdate(ev.datum)} ${ev.arzt?'· Dr. '+e(ev.arzt):''} ${ev.einrichtung?'· '+e(ev.einrichtung):''}</div>
+          ${ev.notizen?`<div class="tmeta" style="margin-top:3px">${e(ev.notizen)}</div>`:''}
+        </div>
+      </div>`).join('');
+  }catch{}
+}
+
+function openAddEvent(){
+  document.getElementById('modal-body').innerHTML=`
+    <h3 style="font-size:17px;margin-bottom:16px">📅 Ereignis eintragen</h3>
+    <div class="form-group"><label class="form-label">Person *</label>
+      <select class="form-input form-select" id="ev-person">
+        ${personen.map(p=>`<option value="${e(p.name)}">${e(p.name)}</option>`).join('')}
+      </select></div>
+    <div class="form-group"><label class="form-label">Typ</label>
+      <select class="form-input form-select" id="ev-typ">
+        <option value="arztbesuch">🩺 Arztbesuch</option>
+        <option value="krankenhausaufenthalt">🏥 Krankenhausaufenthalt</option>
+        <option value="operation">🔪 Operation</option>
+        <option value="impfung">💉 Impfung</option>
+        <option value="diagnose">📋 Diagnose</option>
+      </select></div>
+    <div class="form-group"><label class="form-label">Titel *</label><input class="form-input" id="ev-titel" type="text" placeholder="z.B. Grippeschutzimpfung"></div>
+    <div class="form-row">
+      <div class="form-group"><label class="form-label">Datum</label><input class="form-input" id="ev-datum" type="date" value="${new Date().toISOString().split('T')[0]}"></div>
+      <div class="form-group"><label class="form-label">Arzt</label><input class="form-input" id="ev-arzt" type="text" placeholder="Name"></div>
+    </div>
+    <div class="form-group"><label class="form-label">Einrichtung</label><input class="form-input" id="ev-einrichtung" type="text" placeholder="Praxis, Klinik…"></div>
+    <div class="form-group"><label class="form-label">Notizen</label><textarea class="form-input" id="ev-notizen" rows="3" placeholder="Diagnose, Ergebnis, nächster Termin…"></textarea></div>
+    <button class="btn-primary" onclick="saveEvent()">💾 Speichern</button>
+  `;
+  document.getElementById('modal').classList.add('open');
+}
+
+async function saveEvent(){
+  const body={
+    person:document.getElementById('ev-person').value,
+    typ:document.getElementById('ev-typ').value,
+    titel:document.getElementById('ev-titel').value.trim(),
+    datum:document.getElementById('ev-datum').value,
+    arzt:document.getElementById('ev-arzt').value.trim(),
+    einrichtung:document.getElementById('ev-einrichtung').value.trim(),
+    notizen:document.getElementById('ev-notizen').value.trim()
+  };
+  try{
+    const r=await apiFetch('/api/ereignisse', {credentials:'include', method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(body)});
+    if(r.ok){toast('✅ Ereignis gespeichert');closeModal();loadEvents();}
+    else{toast('⚠️ Fehler')}
+  }catch{toast('⚠️ Verbindungsfehler')}
+}
+
+// ── NOTFALL ───────────────────────────────────────────────
+function renderNotfallChips(){
+  const c=document.getElementById('notfall-person-chips');
+  c.innerHTML='';
+  personen.forEach(p=>{
+    const d=document.createElement('div');
+    d.className='chip';
+    d.textContent=(PERSON_EMOJIS[p.name.toLowerCase()]||'👤')+' '+p.name;
+    d.onclick=function(){selNotfallPerson=p.id;document.querySelectorAll('#notfall-person-chips .chip').forEach(x=>x.classList.remove('sel'));this.classList.add('sel');loadNotfall(p.id);};
+    c.appendChild(d);
+  });
+}
+
+async function loadNotfall(pid){
+  const c=document.getElementById('notfall-content');
+  c.innerHTML='<div style="text-align:center;padding:20px">⏳ Laden…</div>';
+  try{
+    await ladeLokal('/api/notfall/'+pid,d=>{if(selNotfallPerson===pid)renderNotfall(c,d,pid)});
+  }catch{c.innerHTML='<div style="color:var(--red);padding:20px">⚠️ Fehler beim Laden</div>'}
+}
+
+function renderNotfall(c,d,pid){
+  c.innerHTML=`
+    <div class="notfall-card" style="margin-bottom:14px">
+      <div class="notfall-title">🚨 Notfallausweis — ${e(d.name)}</div>
+      <div class="notfall-row"><span class="notfall-lbl">Geburtsdatum</span><span class="notfall-val">${fdate(d.geburtsdatum)||'—'}</span></div>
+      <div class="notfall-row"><span class="notfall-lbl">Blutgruppe</span><span class="notfall-val" style="color:var(--red);font-weight:700">${e(d.blutgruppe||'Unbekannt')}</span></div>
+      <div class="notfall-row"><span class="notfall-lbl">Allergien</span><span class="notfall-val" style="color:var(--amber)">${d.allergien&&d.allergien.length?d.allergien.join(', '):'keine bekannt'}</span></div>
+      <div class="notfall-row"><span class="notfall-lbl">Notfallkontakt</span><span class="notfall-val">${e(d.notfallkontakt||'—')}</span></div>
+      <div class="notfall-row"><span class="notfall-lbl">Hausarzt</span><span class="notfall-val">${e(d.hausarzt||'—')}</span></div>
+    </div>
+    ${d.medikamente.length?`
+      <div style="font-size:11px;color:var(--text-dim);font-family:var(--mono);letter-spacing:.08em;text-transform:uppercase;margin-bottom:8px">Aktuelle Medikamente</div>
+      ${d.medikamente.map(m=>`<div class="med-item">
+        <div class="med-icon">💊</div>
+        <div class="med-info">
+          <div class="med-name">${e(m.name)}</div>
+          <div class="med-meta">${e(m.dosierung||'?')} · ${e(m.haeufigkeit||'täglich')}</div>
+        </div>
+      </div>`).join('')}`:''}
+    <div style="margin-top:16px;text-align:center">
+      <img src="/api/notfall/${pid}/qr.svg" alt="Notfall-QR" onerror="this.parentElement.remove()"
+        style="width:200px;max-width:70%;background:#fff;border-radius:var(--r-sm)">
+      <div style="font-size:11px;color:var(--text-dim);margin-top:6px">QR enthält die Karte als Text — lesbar ohne App und ohne Netz.
+        <a href="/api/notfall/${pid}/qr.png" download="notfall-${pid}.png" style="color:var(--green)">PNG</a></div>
+    </div>
+    <div style="margin-top:16px;padding:12px;background:var(--bg3);border-radius:var(--r-sm);font-size:11px;color:var(--text-dim);font-family:var(--mono)">
+      Generiert: ${new Date(d.generiert_am).toLocaleString('de-DE')}
+    </div>
+  `;
+}
+
+// ── MODAL ─────────────────────────────────────────────────
+function closeModal(){document.getElementById('modal').classList.remove('open')}
+
+// ── INIT ──────────────────────────────────────────────────
+async function loadPersonen(){
+  try{await ladeLokal('/api/personen',d=>{personen=d;makeChips('up-person-chips','selUploadPerson',()=>{},{})});}
+  catch{makeChips('up-person-chips','selUploadPerson',()=>{},{});}
+}
+
+// Mehrere GETs in einem Roundtrip (/api/batch) → {id: body}, null bei Fehler.
+// ETags der Teilantworten landen in _etags, spätere Einzel-Loads bekommen dann 304.
+async function batchFetch(anfragen){
+  try{
+    const r=await apiFetch('/api/batch',{method:'POST',body:JSON.stringify({anfragen:anfragen.map(([id,pfad])=>({id,pfad}))})});
+    if(!r||!r.ok)return null;
+    const out={};
+    for(const a of (await r.json()).antworten){
+      if(a.status!==200)continue;
+      out[a.id]=a.body;
+      if(a.etag)_etags.set(a.pfad,{etag:a.etag,body:JSON.stringify(a.body)});
+      if(LOKAL.test(a.pfad))lokal.put(a.pfad,{etag:a.etag,body:JSON.stringify(a.body)});
+    }
+    return out;
+  }catch{return null}
+}
+
+// ── LIVE-UPDATES ──────────────────────────────────────────
+// /api/events per fetch-Stream (EventSource kann keinen Bearer-Header senden).
+// Meldungen {tabelle, aktion, id} werden 300 ms gesammelt; Dokumente werden
+// per /api/zeilen einzeln nachgeladen, sonst lädt nur die sichtbare Liste neu.
+let _liveId='', _livePending=[], _liveTimer=null;
+
+async function startLive(){
+  try{
+    const headers={'Authorization':'Bearer '+getToken()};
+    if(_liveId)headers['Last-Event-ID']=_liveId;
+    const r=await fetch('/api/events',{headers,credentials:'include',cache:'no-store'});
+    if(r.status===401)return;
+    const reader=r.body.getReader(), dec=new TextDecoder();
+    let buf='';
+    for(;;){
+      const {value,done}=await reader.read();
+      if(done)break;
+      buf+=dec.decode(value,{stream:true});
+      let i;
+      while((i=buf.indexOf('\n\n'))>=0){
+        const block=buf.slice(0,i);buf=buf.slice(i+2);
+        let ev='message',data='';
+        for(const line of block.split('\n')){
+          if(line.startsWith('id: '))_liveId=line.slice(4);
+          else if(line.startsWith('event: '))ev=line.slice(7);
+          else if(line.startsWith('data: '))data+=line.slice(6);
+        }
+        if(ev==='aenderung')liveMeldung(JSON.parse(data));
+        else if(ev==='reset')liveMeldung({tabelle:'*',aktion:'RESET'});
+      }
+    }
+  }catch{}
+  setTimeout(startLive,3000);
+}
+
+function liveMeldung(m){
+  _livePending.push(m);
+  clearTimeout(_liveTimer);
+  _liveTimer=setTimeout(liveAnwenden,300);
+}
+
+const isActive=id=>document.getElementById(id)?.classList.contains('active');
+const isShown=id=>document.getElementById(id)?.style.display!=='none';
+
+async function liveAnwenden(){
+  const ms=_livePending;_livePending=[];
+  const tabellen=new Set(ms.map(m=>m.tabelle));
+  const alle=tabellen.has('*');
+  // Dokumente inkrementell: gelöschte raus, neue/geänderte einzeln holen
+  const docMs=ms.filter(m=>m.tabelle==='dokumente'&&m.id!=null);
+  if(!alle&&docMs.length){
+    const weg=new Set(docMs.filter(m=>m.aktion==='DELETE').map(m=>m.id));
+    const neu=[...new Set(docMs.filter(m=>m.aktion!=='DELETE').map(m=>m.id))].filter(id=>!weg.has(id));
+    let rows=[];
+    if(neu.length){try{const r=await apiFetch('/api/zeilen/dokumente?ids='+neu.join(','));rows=await r.json();}catch{}}
+    const ids=new Set(rows.map(d=>d.id));
+    dokumente=rows.concat(dokumente.filter(d=>!weg.has(d.id)&&!ids.has(d.id)))
+      .sort((a,b)=>(b.datum||'').localeCompare(a.datum||'')||(b.erstellt_am||'').localeCompare(a.erstellt_am||''));
+    if(isActive('docs-view'))renderDokumente(dokumente);
+  }else if(alle&&isActive('docs-view'))loadDocs();
+  if(isActive('dash-view')&&(alle||tabellen.has('dokumente')||tabellen.has('medikamente')||tabellen.has('personen')))loadDash();
+  if(isActive('health-view')){
+    if((alle||tabellen.has('medikamente'))&&isShown('health-meds'))loadMeds();
+    if((alle||tabellen.has('messwerte'))&&isShown('health-values'))loadVals();
+    if((alle||tabellen.has('ereignisse'))&&isShown('health-events'))loadEvents();
+  }
+  if(alle||tabellen.has('personen'))loadPersonen();
+}
+
+async function init(){
+  if('serviceWorker' in navigator)navigator.serviceWorker.register('/sw.js',{scope:'/',updateViaCache:'none'}).catch(()=>{});
+  // Lokaler Stand sofort (auch offline), der Batch ersetzt ihn danach
+  const [lp,ld,ldo]=await Promise.all(['/api/personen','/api/dashboard','/api/dokumente?limit=100'].map(lokal.get));
+  if(lp){personen=JSON.parse(lp.body);makeChips('up-person-chips','selUploadPerson',()=>{},{});}
+  if(ld)renderDash(JSON.parse(ld.body));
+  if(ldo){dokumente=JSON.parse(ldo.body);renderDokumente(dokumente);}
+  // Start: Personen, Dashboard und Dokumente in einem Request statt drei nacheinander
+  const b=await batchFetch([['personen','/api/personen'],['dash','/api/dashboard'],['docs','/api/dokumente?limit=100']]);
+  if(b&&b.personen){personen=b.personen;makeChips('up-person-chips','selUploadPerson',()=>{},{});}
+  else await loadPersonen();
+  if(b&&b.dash)renderDash(b.dash);else loadDash();
+  if(b&&b.docs){dokumente=b.docs;renderDokumente(dokumente);}else loadDocs();
+  document.getElementById('chat-view').style.display='none';
+  startLive();
+  // Notfallkarten + Medikamente vorab lokal ablegen → öffnen auch offline sofort
+  setTimeout(()=>{
+    personen.forEach(p=>ladeLokal('/api/notfall/'+p.id,()=>{}).catch(()=>{}));
+    ladeLokal('/api/medikamente',()=>{}).catch(()=>{});
+  },2000);
+}
+init();
+
+// ═══ GERÄT HINZUFÜGEN ═══════════════════════════════════════
+async function geraetHinzufuegen() {
+  try {
+    const r = await apiFetch('/api/auth/register/begin', {method:'POST', body:JSON.stringify({})});
+    if(!r) return;
+    const d = await r.json();
+    
+    const cred = await navigator.credentials.create({publicKey: {
+      challenge: Uint8Array.from(atob(d.options.challenge.replace(/-/g,'+').replace(/_/g,'/')), c=>c.charCodeAt(0)),
+      rp: d.options.rp,
+      user: {
+        id: Uint8Array.from(atob(d.options.user.id.replace(/-/g,'+').replace(/_/g,'/')), c=>c.charCodeAt(0)),
+        name: d.options.user.name,
+        displayName: d.options.user.displayName
+      },
+      pubKeyCredParams: d.options.pubKeyCredParams,
+      timeout: d.options.timeout,
+      attestation: d.options.attestation,
+      authenticatorSelection: d.options.authenticatorSelection
+    }});
+    
+    const finish = await apiFetch('/api/auth/register/finish', {
+      method:'POST',
+      body: JSON.stringify({
+        session_id: d.session_id,
+        credential: {
+          id: cred.id,
+          rawId: btoa(String.fromCharCode(...new Uint8Array(cred.rawId))),
+          type: cred.type,
+          response: {
+            clientDataJSON: btoa(String.fromCharCode(...new Uint8Array(cred.response.clientDataJSON))),
+            attestationObject: btoa(String.fromCharCode(...new Uint8Array(cred.response.attestationObject)))
+          }
+        },
+        display_name: 'Sven'
+      })
+    });
+    if(!finish) return;
+    toast('✅ Gerät erfolgreich registriert!');
+  } catch(e) {
+    toast('❌ ' + e.message);
+  }
+}
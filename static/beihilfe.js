@@ -0,0 +1,250 @@
+// ═══ BEIHILFE ═══════════════════════════════════════════════
+let bhPersonFilter = '';
+let bhAktuellesErgebnis = null;
+let bhLetztesGespeicherteId = null;
+
+function loadBeihilfe() {
+  ladeBhKarten();
+}
+
+async function ladeBhKarten() {
+  try {
+    const r = await apiFetch('/api/beihilfe/antraege?person='+encodeURIComponent(bhPersonFilter));
+    if(!r) return;
+    const d = await r.json();
+    const el1 = document.getElementById('bh-anzahl-offen');
+    const el2 = document.getElementById('bh-summe-offen');
+    const el3 = document.getElementById('bh-anzahl-eingereicht');
+    if(el1) el1.textContent = d.offen ?? '0';
+    if(el2) el2.textContent = d.summe_offen ? d.summe_offen.toFixed(2)+' €' : '';
+    if(el3) el3.textContent = d.eingereicht ?? '0';
+  } catch(e) { console.log('BH Fehler:', e); }
+}
+
+function bhTab(tab) {
+  ['analyse','antraege','goae'].forEach(t => {
+    const el = document.getElementById('bh-tab-'+t);
+    const btn = document.getElementById('bhtab-'+t);
+    if(el) el.style.display = t===tab ? 'block' : 'none';
+    if(btn) btn.classList.toggle('active', t===tab);
+  });
+  if(tab==='antraege') ladeBhAntraege();
+}
+
+async function analysiereRechnung() {
+  const btn = document.getElementById('bh-analyse-btn');
+  const text = document.getElementById('bh-rechnungstext').value.trim();
+  const person = document.getElementById('bh-analyse-person').value;
+  if(!text) { alert('Bitte Rechnungstext einfügen'); return; }
+  btn.disabled = true; btn.textContent = '🤖 Analysiere...';
+  try {
+    // Einfache GOÄ-Extraktion aus Text (ohne KI)
+    const positionen = [];
+    const regex = /GOÄ\s*(\d+)\s*[x×]\s*([\d,.]+)\s*=\s*([\d,.]+)/gi;
+    let m;
+    while((m = regex.exec(text)) !== null) {
+      positionen.push({
+        ziffer: m[1],
+        faktor: parseFloat(m[2].replace(',','.')),
+        betrag: parseFloat(m[3].replace(',','.')),
+        anzahl: 1
+      });
+    }
+    const r = await apiFetch('/api/beihilfe/rechnung/analysieren', {
+      method:'POST',
+      body: JSON.stringify({positionen, person})
+    });
+    if(!r) return;
+    const d = await r.json();
+    zeigeErgebnis(d);
+  } catch(e) { alert('Fehler: '+e.message); }
+  finally { btn.disabled=false; btn.textContent='🤖 Beihilfe berechnen'; }
+}
+
+async function analysiereFoto(input) {
+  const file = input.files[0];
+  if(!file) return;
+  
+  // Vorschau zeigen
+  const preview = document.getElementById('bh-foto-preview');
+  const img = document.getElementById('bh-foto-img');
+  const status = document.getElementById('bh-foto-status');
+  img.src = URL.createObjectURL(file);
+  preview.style.display = 'block';
+  status.textContent = '🤖 KI analysiert Rechnung...';
+  status.style.color = 'var(--amber)';
+
+  const person = document.getElementById('bh-analyse-person').value;
+  const fd = new FormData();
+  fd.append('person', person);
+
+  try {
+    fd.append('file', await bildVerkleinern(file));
+    const r = await apiFetch('/api/beihilfe/foto-analysieren', {
+      method: 'POST',
+      body: fd,
+      headers: {}  // kein Content-Type — FormData setzt es selbst
+    });
+    if(!r) return;
+    const d = await r.json();
+    
+    if(d.positionen_erkannt === 0) {
+      status.textContent = '⚠️ Keine GOÄ-Ziffern erkannt — bitte manuell eingeben';
+      status.style.color = 'var(--amber)';
+      return;
+    }
+    
+    status.textContent = `✅ ${d.positionen_erkannt || d.positionen?.length || 0} Positionen erkannt`;
+    status.style.color = 'var(--green)';
+    zeigeErgebnis(d);
+    
+  } catch(e) {
+    status.textContent = '❌ Fehler: ' + e.message;
+    status.style.color = 'var(--red)';
+  }
+}
+
+function zeigeErgebnis(d) {
+  bhAktuellesErgebnis = d;
+  document.getElementById('bh-ergebnis').style.display = 'block';
+  document.getElementById('bh-erg-gesamt').textContent     = (d.gesamt_rechnung||0).toFixed(2)+' €';
+  document.getElementById('bh-erg-bh-faehig').textContent  = (d.gesamt_beihilfefaehig||0).toFixed(2)+' €';
+  document.getElementById('bh-erg-erstattung').textContent = (d.erstattung||0).toFixed(2)+' €';
+  document.getElementById('bh-erg-eigenanteil').textContent= (d.eigenanteil||0).toFixed(2)+' €';
+  document.getElementById('bh-erg-satz').textContent       = d.beihilfesatz_prozent||'—';
+  document.getElementById('bh-positionen-liste').innerHTML = (d.positionen||[]).map(p=>`
+    <div style="display:grid;grid-template-columns:65px 1fr 65px 70px;gap:6px;padding:7px 8px;
+                background:var(--bg3);border:1px solid var(--border);border-radius:var(--r-sm);
+                margin-bottom:5px;font-size:0.82rem;align-items:start">
+      <span style="font-family:var(--mono);color:var(--blue)">GOÄ ${p.ziffer||'?'}</span>
+      <span style="color:var(--text-mid)">${p.beschreibung_goae||'—'}</span>
+      <span style="text-align:right">${(p.betrag||0).toFixed(2)} €</span>
+      <span style="text-align:right;color:${p.beihilfefaehig?'var(--green)':'var(--red)'}">
+        ${p.beihilfefaehig?(p.beihilfefaehiger_betrag||0).toFixed(2)+' €':'❌'}
+      </span>
+      ${p.hinweis?`<div style="grid-column:1/-1;color:var(--amber);font-size:0.78rem">⚠️ ${p.hinweis}</div>`:''}
+    </div>`).join('');
+  const hw = document.getElementById('bh-hinweise');
+  if(d.hinweise?.length) { hw.style.display='block'; hw.innerHTML='<strong>⚠️</strong> '+d.hinweise.join('<br>'); }
+  else hw.style.display='none';
+  document.getElementById('bh-ergebnis').scrollIntoView({behavior:'smooth'});
+}
+
+async function ladeBhAntraege() {
+  const r = await apiFetch('/api/beihilfe/antraege?person='+encodeURIComponent(bhPersonFilter));
+  if(!r) return;
+  const d = await r.json();
+  const offen = (d.antraege||[]).filter(a=>!a.eingereicht);
+  const eingereicht = (d.antraege||[]).filter(a=>a.eingereicht);
+  const liste = document.getElementById('bh-antraege-liste');
+
+  const karteHtml = (a, istOffen) => `
+    <div style="display:flex;justify-content:space-between;align-items:start;
+                padding:10px;background:var(--bg3);border:1px solid var(--border);
+                border-radius:var(--r-sm);height:80px;overflow:hidden">
+      <div>
+        <div style="font-weight:600;font-size:0.9rem">${a.titel||'Rechnung'}</div>
+        <div style="color:var(--text-dim);font-size:0.78rem">${a.person} · ${a.datum||'—'}</div>
+        ${a.erstattung_erwartet ? `<div style="color:var(--green);font-size:0.78rem">Erstattung: ${Number(a.erstattung_erwartet).toFixed(2)} €</div>` : ''}
+      </div>
+      <div style="text-align:right">
+        <div style="font-weight:700;color:var(--blue)">${(a.betrag||0).toFixed(2)} €</div>
+        ${istOffen ? `<button onclick="markiereEingereicht(${a.id})"
+          style="margin-top:6px;padding:4px 8px;background:var(--bg2);border:1px solid var(--green);
+                 border-radius:var(--r-sm);color:var(--green);cursor:pointer;font-size:0.75rem">
+          ✅ Eingereicht
+        </button>` : '<div style="color:var(--text-dim);font-size:0.75rem;margin-top:4px">🏛️ eingereicht</div>'}
+      </div>
+    </div>`;
+
+  // Flache Liste aus Überschriften und Karten → virtuell (ein Jahrzehnt Rechnungen)
+  const zeilen = [];
+  if(offen.length) {
+    zeilen.push({kopf:`<div style="color:var(--amber);font-size:0.8rem;font-weight:600;padding-top:6px">⏳ OFFEN (${offen.length})</div>`});
+    offen.forEach(a=>zeilen.push({a, offen:true}));
+  } else {
+    zeilen.push({kopf:'<div style="color:var(--green);text-align:center;padding:10px">🎉 Keine offenen Anträge</div>', h:44});
+  }
+  if(eingereicht.length) {
+    zeilen.push({kopf:`<div style="color:var(--text-dim);font-size:0.8rem;font-weight:600;padding-top:12px">✅ EINGEREICHT (${eingereicht.length})</div>`, h:38});
+    eingereicht.forEach(a=>zeilen.push({a, offen:false}));
+  }
+  vliste(liste, {
+    hoehe: z => z.kopf ? (z.h||30) : 88,
+    zeile: z => z.kopf || karteHtml(z.a, z.offen),
+  }).setze(zeilen);
+}
+
+async function markiereEingereicht(id) {
+  await apiFetch('/api/beihilfe/antraege/'+id+'/eingereicht',{method:'POST'});
+  ladeBhKarten(); ladeBhAntraege();
+}
+
+
+async function speichereBeihilfe() {
+  if(!bhAktuellesErgebnis) return;
+  const d = bhAktuellesErgebnis;
+  const person = document.getElementById('bh-analyse-person').value;
+  const text = document.getElementById('bh-rechnungstext').value.trim();
+  const body = {
+    person: person,
+    typ: 'rechnung',
+    titel: 'Arztrechnung ' + new Date().toLocaleDateString('de-DE'),
+    betrag: d.gesamt_rechnung,
+    beschreibung: text,
+    ki_extraktion: JSON.stringify({
+      erstattung: d.erstattung,
+      beihilfefaehig: d.gesamt_beihilfefaehig,
+      positionen: d.positionen
+    })
+  };
+  try {
+    const r = await apiFetch('/api/dokumente', {method:'POST', body:JSON.stringify(body)});
+    if(!r) return;
+    const result = await r.json();
+    if(result.id) {
+      bhLetztesGespeicherteId = result.id;
+      toast('✅ Gespeichert!');
+      const btn = document.getElementById('bh-btn-eingereicht');
+      if(btn) btn.style.display = 'block';
+      ladeBhKarten();
+    }
+  } catch(e) { alert('Fehler: '+e.message); }
+}
+
+async function markiereAktuellEingereicht() {
+  if(!bhLetztesGespeicherteId) return;
+  await apiFetch('/api/beihilfe/antraege/'+bhLetztesGespeicherteId+'/eingereicht',{method:'POST'});
+  toast('🏛️ Als eingereicht markiert!');
+  const btn = document.getElementById('bh-btn-eingereicht');
+  if(btn) btn.style.display = 'none';
+  bhLetztesGespeicherteId = null;
+  ladeBhKarten();
+  bhTab('antraege');
+}
+
+let goaeTimer = null, goaeStand = 0;   // Stand: ältere Antworten verwerfen
+async function goaeSuche(q) {
+  clearTimeout(goaeTimer);
+  goaeTimer = setTimeout(async () => {
+    const c = document.getElementById('goae-ergebnisse');
+    if(!q.trim()) { c.innerHTML='<div style="color:var(--text-dim)">Suchbegriff eingeben...</div>'; return; }
+    const stand = ++goaeStand;
+    const r = await apiFetch('/api/beihilfe/goae/suche?q='+encodeURIComponent(q));
+    if(!r || stand !== goaeStand) return;
+    const d = await r.json();
+    if(stand !== goaeStand) return;
+    if(!d.ziffern?.length) { c.innerHTML='<div style="color:var(--text-dim)">Keine Treffer</div>'; return; }
+    c.innerHTML = d.ziffern.map(z=>`
+      <div style="display:grid;grid-template-columns:65px 1fr 65px 75px 28px;gap:5px;
+                  padding:6px 8px;background:var(--bg3);border:1px solid var(--border);
+                  border-radius:var(--r-sm);margin-bottom:4px;font-size:0.8rem;align-items:center">
+        <span style="font-family:var(--mono);color:var(--blue)">${z.ziffer}</span>
+        <span style="color:var(--text-mid)">${e(z.beschreibung)}</span>
+        <span style="text-align:right;color:var(--text-dim)">${(z.einfachsatz||0).toFixed(2)} €</span>
+        <span style="text-align:right">${(z.faktor_2_3||0).toFixed(2)} €</span>
+        <span style="text-align:center">${z.beihilfefaehig_bund?'✅':'❌'}</span>
+      </div>`).join('');
+  }, 120);
+}
+// ════════════════════════════════════════════════════════════════
@@ -0,0 +1,82 @@
+// HealthLedger — Fotos vor dem Upload verkleinern
+// ================================================
+// Läuft als Web Worker (OffscreenCanvas) oder, wo Worker-Canvas fehlt
+// (Safari < 16.4), als normales Script im Hauptthread — gleiche Funktion.
+//
+//   bildVerarbeiten(blob, {maxKante: 2048, typ: 'image/jpeg', qualitaet: 0.85})
+//     → {blob, breite, hoehe}
+//
+// EXIF-Orientierung: Browser, die imageOrientation:'from-image' kennen,
+// drehen beim Dekodieren selbst. Ältere werfen bei der unbekannten Option —
+// dann wird roh dekodiert und die Orientierung aus dem EXIF-Block
+// (Tag 0x0112) per Canvas-Transformation angewendet.
+
+function exifOrientierung(buf) {
+  const v = new DataView(buf);
+  if (v.byteLength < 4 || v.getUint16(0) !== 0xFFD8) return 1;         // kein JPEG
+  let o = 2;
+  while (o + 4 <= v.byteLength) {
+    const marker = v.getUint16(o), laenge = v.getUint16(o + 2);
+    if (marker === 0xFFE1 && v.getUint32(o + 4) === 0x45786966) {       // APP1 "Exif"
+      const tiff = o + 10, le = v.getUint16(tiff) === 0x4949;
+      const ifd = tiff + v.getUint32(tiff + 4, le);
+      if (ifd + 2 > v.byteLength) return 1;
+      const n = v.getUint16(ifd, le);
+      for (let i = 0; i < n; i++) {
+        const e = ifd + 2 + i * 12;
+        if (e + 10 > v.byteLength) break;
+        if (v.getUint16(e, le) === 0x0112) return v.getUint16(e + 8, le) || 1;
+      }
+      return 1;
+    }
+    if ((marker & 0xFF00) !== 0xFF00 || marker === 0xFFDA) break;       // Bilddaten erreicht
+    o += 2 + laenge;
+  }
+  return 1;
+}
+
+function leinwand(b, h) {
+  if (typeof OffscreenCanvas !== 'undefined') return new OffscreenCanvas(b, h);
+  const c = document.createElement('canvas');
+  c.width = b; c.height = h;
+  return c;
+}
+
+function alsBlob(c, typ, qualitaet) {
+  if (c.convertToBlob) return c.convertToBlob({type: typ, quality: qualitaet});
+  return new Promise(ok => c.toBlob(ok, typ, qualitaet));
+}
+
+async function bildVerarbeiten(blob, opt) {
+  const {maxKante = 2048, typ = 'image/jpeg', qualitaet = 0.85} = opt || {};
+  let bild, orientierung = 1;
+  try {
+    bild = await createImageBitmap(blob, {imageOrientation: 'from-image'});
+  } catch {
+    bild = await createImageBitmap(blob);
+    orientierung = exifOrientierung(await blob.slice(0, 128 * 1024).arrayBuffer());
+  }
+  const faktor = Math.min(1, maxKante / Math.max(bild.width, bild.height));
+  const b = Math.round(bild.width * faktor), h = Math.round(bild.height * faktor);
+  const gedreht = orientierung >= 5;
+  const c = leinwand(gedreht ? h : b, gedreht ? b : h);
+  const ctx = c.getContext('2d');
+  ctx.imageSmoothingQuality = 'high';
+  const T = {2: [-1, 0, 0, 1, b, 0], 3: [-1, 0, 0, -1, b, h], 4: [1, 0, 0, -1, 0, h],
+             5: [0, 1, 1, 0, 0, 0], 6: [0, 1, -1, 0, h, 0], 7: [0, -1, -1, 0, h, b], 8: [0, -1, 1, 0, 0, b]};
+  if (T[orientierung]) ctx.setTransform(...T[orientierung]);
+  ctx.drawImage(bild, 0, 0, b, h);
+  bild.close && bild.close();
+  return {blob: await alsBlob(c, typ, qualitaet), breite: c.width, hoehe: c.height};
+}
+
+if (typeof WorkerGlobalScope !== 'undefined' && self instanceof WorkerGlobalScope) {
+  self.onmessage = async ev => {
+    const {id, blob, opt} = ev.data;
+    try {
+      self.postMessage({id, ...(await bildVerarbeiten(blob, opt))});
+    } catch (err) {
+      self.postMessage({id, fehler: String(err && err.message || err)});
+    }
+  };
+}
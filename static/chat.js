@@ -0,0 +1,35 @@
+// ── CHAT ──────────────────────────────────────────────────
+let chatBusy=false;
+
+function chatKey(e){if(e.key==='Enter'&&!e.shiftKey){e.preventDefault();sendChat()}}
+function autoResize(el){el.style.height='auto';el.style.height=Math.min(el.scrollHeight,100)+'px'}
+
+async function sendChat(){
+  if(chatBusy)return;
+  const ci=document.getElementById('chat-in');
+  const msg=ci.value.trim();if(!msg)return;
+  ci.value='';ci.style.height='auto';
+  addMsg('user',msg);chatBusy=true;
+  document.getElementById('send-btn').disabled=true;
+  const tid=addTyping();
+  try{
+    const r=await apiFetch('/api/chat', {credentials:'include', method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({message:msg})});
+    const d=await r.json();rmTyping(tid);addMsg('bot',d.antwort);
+  }catch{rmTyping(tid);addMsg('bot','⚠️ Verbindungsfehler')}
+  chatBusy=false;document.getElementById('send-btn').disabled=false;
+}
+
+function addMsg(role,content){
+  const msgs=document.getElementById('chat-msgs');
+  const t=new Date().toLocaleTimeString('de-DE',{hour:'2-digit',minute:'2-digit'});
+  const d=document.createElement('div');d.className='msg '+role;
+  d.innerHTML=`<div class="bubble">${e(content).replace(/\n/g,'<br>')}</div><div class="mtime">${t}</div>`;
+  msgs.appendChild(d);msgs.scrollTop=msgs.scrollHeight;
+}
+function addTyping(){
+  const msgs=document.getElementById('chat-msgs'),id='ty'+Date.now();
+  const d=document.createElement('div');d.id=id;d.className='msg bot';
+  d.innerHTML='<div class="bubble" style="display:flex;gap:4px"><div class="typing-dot"></div><div class="typing-dot"></div><div class="typing-dot"></div></div>';
+  msgs.appendChild(d);msgs.scrollTop=msgs.scrollHeight;return id;
+}
+function rmTyping(id){document.getElementById(id)?.remove()}
@@ -0,0 +1,75 @@
+// HealthLedger Service Worker
+// ============================
+// App-Shell (Login + SPA) und Schriften kommen sofort aus dem Cache und
+// werden im Hintergrund aktualisiert (stale-while-revalidate) — ein Deploy
+// ist damit ab dem zweiten Öffnen sichtbar. Gehashte /assets/ ändern sich
+// nie und kommen cache-first; statisch.py setzt beim Ausliefern die
+// gehashten URLs und die Version (neuer Cache je Deploy) ein. /api/* läuft nie über diesen
+// Cache: Daten hält die SPA selbst in IndexedDB (siehe `lokal` in app.js).
+//
+// Nur in sicherem Kontext aktiv (HTTPS oder localhost) — per VPN über
+// http://<pi>:8080 registriert der Browser keinen Service Worker, die
+// IndexedDB-Daten funktionieren trotzdem.
+
+const SHELL_CACHE = 'hl-shell-{{version}}';
+const SHELL = ['/', '/app', '/static/app.css', '/static/vliste.js', '/static/app.js',
+               '/static/bild.js', '/static/upload.js', '/static/chat.js', '/static/beihilfe.js'];
+const SCHRIFTEN = ['fonts.googleapis.com', 'fonts.gstatic.com'];
+
+self.addEventListener('install', ev => {
+  ev.waitUntil(caches.open(SHELL_CACHE).then(c => c.addAll(SHELL)).then(() => self.skipWaiting()));
+});
+
+self.addEventListener('activate', ev => {
+  ev.waitUntil(caches.keys()
+    .then(keys => Promise.all(keys.filter(k => k !== SHELL_CACHE).map(k => caches.delete(k))))
+    .then(() => self.clients.claim()));
+});
+
+async function cacheFirst(req) {
+  const cache = await caches.open(SHELL_CACHE);
+  const cached = await cache.match(req);
+  if (cached) return cached;
+  const r = await fetch(req);
+  if (r.ok) cache.put(req, r.clone());
+  return r;
+}
+
+async function staleWhileRevalidate(req, ersatz) {
+  const cache = await caches.open(SHELL_CACHE);
+  const cached = await cache.match(req, {ignoreSearch: req.mode === 'navigate'});
+  const netz = fetch(req).then(r => {
+    if (r.ok || r.type === 'opaque') cache.put(req, r.clone());
+    return r;
+  });
+  if (cached) {
+    netz.catch(() => {});           // offline — Cache reicht
+    return cached;
+  }
+  try {
+    return await netz;
+  } catch (err) {
+    const alt = ersatz && await cache.match(ersatz);
+    if (alt) return alt;
+    throw err;
+  }
+}
+
+self.addEventListener('fetch', ev => {
+  const req = ev.request;
+  if (req.method !== 'GET') return;
+  const url = new URL(req.url);
+  if (url.origin === location.origin) {
+    if (url.pathname.startsWith('/api/') || url.pathname.startsWith('/uploads/')) return;
+    if (req.mode === 'navigate') {
+      // SPA-Routen (Catch-all) offline auf die gecachte /app abbilden
+      ev.respondWith(staleWhileRevalidate(req, url.pathname === '/' ? '/' : '/app'));
+    } else if (url.pathname.startsWith('/assets/')) {
+      ev.respondWith(cacheFirst(req));
+    } else if (url.pathname.startsWith('/static/')) {
+      ev.respondWith(staleWhileRevalidate(req));
+    }
+  } else if (SCHRIFTEN.includes(url.hostname)) {
+    ev.respondWith(staleWhileRevalidate(req));
+  }
+});
@@ -0,0 +1,38 @@
+// ── UPLOAD ────────────────────────────────────────────────
+function dzOver(ev){ev.preventDefault();document.getElementById('drop-zone').classList.add('drag-over')}
+function dzLeave(){document.getElementById('drop-zone').classList.remove('drag-over')}
+function dzDrop(ev){ev.preventDefault();document.getElementById('drop-zone').classList.remove('drag-over');const f=ev.dataTransfer.files[0];if(f)doUpload(f)}
+function handleFile(input){const f=input.files[0];if(f){doUpload(f);input.value=''}}
+
+async function doUpload(file){
+  const prog=document.getElementById('uprog');
+  const bar=document.getElementById('prog-bar');
+  const txt=document.getElementById('prog-text');
+  prog.classList.add('show'); bar.style.width='10%'; txt.textContent='Vorbereiten…';
+
+  try{
+    file=await bildVerkleinern(file);
+    bar.style.width='20%'; txt.textContent='Hochladen…';
+    const fd=new FormData();
+    fd.append('file',file);
+    fd.append('person',selUploadPerson);
+    fd.append('typ','auto');
+    bar.style.width='50%'; txt.textContent='KI analysiert Dokument…';
+    const resp=await apiFetch('/api/upload', {credentials:'include', method:'POST',body:fd});
+    const res=await resp.json();
+    bar.style.width='100%';
+    if(res.erfolg){
+      const ex=res.extrahiert;
+      txt.textContent='✅ '+e(ex.aussteller||'Dokument')+' gespeichert';
+      toast('✅ '+(ex.aussteller||'Dokument')+' gespeichert');
+      setTimeout(()=>{prog.classList.remove('show');bar.style.width='0'},2000);
+      loadDash(); loadDocs();
+      // Zur Dokumente-Ansicht wechseln
+      setTimeout(()=>sw('docs',document.querySelectorAll('.nb')[2]),1200);
+    }else{txt.textContent='⚠️ Fehler';toast('⚠️ Fehler beim Upload')}
+  }catch(err){
+    txt.textContent='⚠️ Fehler';
+    toast('⚠️ Verbindungsfehler');
+    setTimeout(()=>prog.classList.remove('show'),2000);
+  }
+}
@@ -0,0 +1,127 @@
+// HealthLedger — virtuelle Listen
+// ================================
+// Nur die sichtbaren Zeilen (+ PUFFER davor/danach) stehen im DOM, absolut
+// positioniert in einem Platzhalter mit der Gesamthöhe. Zeilenhöhen sind fest:
+// `hoehe` als Zahl oder Funktion(eintrag) — Positionen werden einmal pro
+// setze()/anhaengen() als Präfixsumme berechnet, die Suche ist binär.
+//
+//   const l = vliste(document.getElementById('docs-list'), {
+//     hoehe: 84, zeile: (d, i) => `<div>…</div>`, leer: '<div>Keine Dokumente</div>',
+//     nachladen: async n => (await apiFetch(`/api/dokumente?offset=${n}`)).json(), seite: 100,
+//   });
+//   l.setze(ersteSeite);
+//
+// nachladen(anzahlGeladen) holt die nächste Seite, sobald das Ende näher als
+// zwei Puffer ist; weniger als `seite` Einträge = Ende erreicht. Gescrollt wird
+// das nächste Element mit overflow-y (in der SPA die .view), Größenänderungen
+// (Tab/View wird sichtbar) zeichnen per ResizeObserver neu. Ein erneuter
+// vliste()-Aufruf auf demselben Container räumt den vorigen ab.
+
+const VLISTE_PUFFER = 8;
+
+function vliste(c, opt) {
+  if (c._vliste) c._vliste.weg();
+  const scroller = (() => {
+    for (let el = c.parentElement; el; el = el.parentElement) {
+      const o = getComputedStyle(el).overflowY;
+      if (o === 'auto' || o === 'scroll') return el;
+    }
+    return document.scrollingElement;
+  })();
+  const hoeheVon = typeof opt.hoehe === 'function' ? opt.hoehe : () => opt.hoehe;
+  const innen = document.createElement('div');
+  innen.style.position = 'relative';
+  c.innerHTML = '';
+  c.appendChild(innen);
+
+  let daten = [], pos = new Float64Array(1), von = -1, bis = -1;
+  let laedt = false, ende = !opt.nachladen, rahmen = 0, stand = 0;
+
+  function positionen(ab) {
+    const neu = new Float64Array(daten.length + 1);
+    neu.set(pos.subarray(0, ab + 1));
+    for (let i = ab; i < daten.length; i++) neu[i + 1] = neu[i] + hoeheVon(daten[i]);
+    pos = neu;
+  }
+
+  function index(y) {               // erster Eintrag, dessen Unterkante unter y liegt
+    let lo = 0, hi = daten.length;
+    while (lo < hi) {
+      const m = (lo + hi) >> 1;
+      if (pos[m + 1] <= y) lo = m + 1; else hi = m;
+    }
+    return lo;
+  }
+
+  function zeichnen(erzwingen) {
+    const n = daten.length;
+    if (!n) {
+      innen.style.height = '';
+      innen.innerHTML = ende ? (opt.leer || '') : '';
+      von = bis = -1;
+      return;
+    }
+    innen.style.height = pos[n] + 'px';
+    const oben = scroller.getBoundingClientRect().top - innen.getBoundingClientRect().top;
+    const a = Math.max(0, index(oben) - VLISTE_PUFFER);
+    const b = Math.min(n, index(oben + scroller.clientHeight) + 1 + VLISTE_PUFFER);
+    if (erzwingen || a !== von || b !== bis) {
+      von = a; bis = b;
+      let html = '';
+      for (let i = a; i < b; i++) {
+        html += `<div style="position:absolute;left:0;right:0;top:${pos[i]}px;height:${pos[i + 1] - pos[i]}px">${opt.zeile(daten[i], i)}</div>`;
+      }
+      innen.innerHTML = html;
+    }
+    if (!ende && !laedt && b >= n - 2 * VLISTE_PUFFER) mehr();
+  }
+
+  async function mehr() {
+    laedt = true;
+    const s = stand;
+    try {
+      const neu = await opt.nachladen(daten.length);
+      if (s !== stand) return;      // inzwischen neu gesetzt (Filter gewechselt)
+      if (!neu || neu.length < (opt.seite || 1)) ende = true;
+      if (neu && neu.length) anhaengen(neu);
+      else zeichnen(true);
+    } catch { if (s === stand) ende = true; }
+    finally { if (s === stand) { laedt = false; planen(); } }
+  }
+
+  function anhaengen(neu) {
+    const ab = daten.length;
+    daten = daten.concat(neu);
+    positionen(ab);
+    zeichnen(true);
+  }
+
+  function planen() {
+    if (!rahmen) rahmen = requestAnimationFrame(() => { rahmen = 0; zeichnen(false); });
+  }
+
+  scroller.addEventListener('scroll', planen, {passive: true});
+  const ro = typeof ResizeObserver !== 'undefined' ? new ResizeObserver(planen) : null;
+  if (ro) { ro.observe(scroller); ro.observe(c); }
+
+  const api = {
+    setze(liste, fertig) {
+      stand++;
+      laedt = false;
+      daten = liste ? liste.slice() : [];
+      ende = fertig != null ? fertig : (!opt.nachladen || daten.length < (opt.seite || 1));
+      positionen(0);
+      zeichnen(true);
+    },
+    anhaengen,
+    daten: () => daten,
+    weg() {
+      scroller.removeEventListener('scroll', planen);
+      if (ro) ro.disconnect();
+      if (rahmen) cancelAnimationFrame(rahmen);
+      c._vliste = null;
+    },
+  };
+  c._vliste = api;
+  return api;
+}
@@ -0,0 +1,105 @@
+"""
+Statisch — gehashte, vorkomprimierte Frontend-Dateien
+=====================================================
+static/ enthält die Quellen: index.html, app.css, app.js und die erst bei
+Bedarf geladenen Module (upload.js, chat.js, beihilfe.js, Worker bild.js).
+Daraus wird beim ersten Aufruf — und nach jeder Änderung einer Quelldatei —
+ein Stand im Speicher gebaut:
+
+  ASSETS  → /assets/<name>.<hash>.<ext>   Cache-Control: immutable, 1 Jahr
+  SEITEN  → /, /app, /sw.js               no-cache + ETag (→ 304)
+
+Verweise "/static/<asset>" werden durch die gehashten URLs ersetzt. Die
+Reihenfolge in ASSETS ist Abhängigkeitsreihenfolge: app.js kommt zuletzt,
+sein Hash deckt damit auch die Modul-URLs ab. "{{version}}" in Seiten
+(Cache-Name im Service Worker) wird zum Hash über alle Assets.
+
+Jede Datei liegt roh, gzip (Stufe 9) und — falls brotli installiert ist —
+br (Qualität 11) vor; ausgeliefert wird je nach Accept-Encoding, ohne pro
+Request zu komprimieren. /static/ bleibt als ungehashter Pfad erhalten.
+
+Übersicht der gebauten Dateien:
+  python statisch.py
+"""
+
+import gzip, hashlib
+from pathlib import Path
+
+from starlette.responses import Response
+
+import antwort, versionen
+
+ASSETS    = ("app.css", "vliste.js", "bild.js", "upload.js", "chat.js", "beihilfe.js", "app.js")
+SEITEN    = ("index.html", "login.html", "sw.js")
+TYPEN     = {"css": "text/css; charset=utf-8", "js": "application/javascript; charset=utf-8",
+             "html": "text/html; charset=utf-8"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_stand = {"mtimes": None, "assets": {}, "seiten": {}, "urls": {}}
+
+def _varianten(roh: bytes, typ: str) -> dict:
+    h = hashlib.sha256(roh).hexdigest()[:16]
+    v = {"typ": typ, "hash": h, "": roh, "gzip": gzip.compress(roh, compresslevel=9, mtime=0)}
+    if antwort.brotli is not None:
+        v["br"] = antwort.brotli.compress(roh, quality=11)
+    return v
+
+def _ersetze(text: str, urls: dict) -> str:
+    for name, url in urls.items():
+        text = text.replace(f"/static/{name}", url)
+    return text
+
+def baue(verzeichnis: Path) -> dict:
+    """Quellen lesen, Verweise ersetzen, hashen, komprimieren → neuer Stand"""
+    urls, assets = {}, {}
+    for name in ASSETS:
+        stamm, _, ext = name.rpartition(".")
+        roh = _ersetze((verzeichnis / name).read_text(encoding="utf-8"), urls).encode()
+        v = _varianten(roh, TYPEN[ext])
+        datei = f"{stamm}.{v['hash'][:10]}.{ext}"
+        urls[name] = f"/assets/{datei}"
+        assets[datei] = v
+    version = hashlib.sha256("".join(urls.values()).encode()).hexdigest()[:10]
+    seiten = {}
+    for name in SEITEN:
+        text = _ersetze((verzeichnis / name).read_text(encoding="utf-8"), urls)
+        seiten[name] = _varianten(text.replace("{{version}}", version).encode(),
+                                  TYPEN[name.rpartition(".")[2]])
+    return {"assets": assets, "seiten": seiten, "urls": urls, "version": version}
+
+def aktuell(verzeichnis: Path) -> dict:
+    """Stand holen, bei geänderten Quelldateien (mtime) neu bauen"""
+    mtimes = tuple((verzeichnis / n).stat().st_mtime_ns for n in ASSETS + SEITEN)
+    if mtimes != _stand["mtimes"]:
+        _stand.update(baue(verzeichnis), mtimes=mtimes)
+    return _stand
+
+def _antwort(v: dict, request, cache_control: str, headers: dict | None = None) -> Response:
+    namen = antwort.angeboten(request.headers.get("accept-encoding", ""))
+    kodierung = next((k for k in ("br", "gzip") if k in v and k in namen), "")
+    etag = f'"{v["hash"]}-{kodierung}"' if kodierung else f'"{v["hash"]}"'
+    kopf = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept-Encoding", **(headers or {})}
+    if versionen.passt(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=kopf)
+    if kodierung:
+        kopf["Content-Encoding"] = kodierung
+    return Response(v[kodierung], media_type=v["typ"], headers=kopf)
+
+def asset(verzeichnis: Path, datei: str, request) -> Response | None:
+    """Gehashtes Asset → Response (immutable), None falls unbekannt"""
+    v = aktuell(verzeichnis)["assets"].get(datei)
+    return _antwort(v, request, IMMUTABLE) if v else None
+
+def seite(verzeichnis: Path, name: str, request, headers: dict | None = None) -> Response:
+    """Seite mit eingesetzten Asset-URLs → Response (no-cache, ETag)"""
+    return _antwort(aktuell(verzeichnis)["seiten"][name], request, "no-cache", headers)
+
+if __name__ == "__main__":
+    stand = baue(Path(__file__).resolve().parent / "static")
+    print(f"\n🏥 HealthLedger — statische Dateien (Version {stand['version']})")
+    print(f"{'─'*72}")
+    print(f"  {'Datei':34} {'roh':>9} {'gzip':>9} {'br':>9}")
+    for datei, v in list(stand["assets"].items()) + list(stand["seiten"].items()):
+        br = f"{len(v['br']):>7,} B" if "br" in v else f"{'—':>9}"
+        print(f"  {datei:34} {len(v['']):>7,} B {len(v['gzip']):>7,} B {br}")
+    print(f"{'─'*72}\n")
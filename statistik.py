@@ -0,0 +1,258 @@
+"""
+Statistik — Trends und Kennzahlen pro Person + Messwert-Typ
+==========================================================
+GET /api/messwerte/statistik lädt eine Reihe (messwerte + messreihen) einmal
+in NumPy-Arrays und rechnet pro Zeitfenster (7/30/90 Tage, 0 = alles)
+vektorisiert:
+
+  Mittel, Min/Max, Streuung, Perzentile (10/25/50/75/90), Trend pro Woche
+  (lineare Regression), Anteil der Messungen im Zielbereich und einen
+  gleitenden 7-Tage-Mittelwert
+
+Geladene Reihen und Ergebnisse liegen in zwei LRU-Caches (begrenzt auf
+MAX_REIHEN/MAX_REIHEN_BYTES bzw. MAX_ERGEBNISSE), gültig solange der
+Datenstand von messwerte/messreihen (versionen.py, sieht auch
+tools/apple_health_importer.py) und der Tag gleich sind. invalidiere() nach
+Inserts gibt den Speicher sofort frei. Ohne NumPy liefert der Endpoint 503.
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import versionen
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FENSTER = (7, 30, 90)
+MAX_FENSTER = 3650   # Tage; 0 = alles
+PERZENTILE = (10, 25, 50, 75, 90)
+
+# Zielbereiche (Heimmessung) — wert, wert2 jeweils (min, max), None = offen
+ZIELBEREICHE = {
+    "blutdruck":  {"wert": (90, 135), "wert2": (60, 85)},   # mmHg, Heim-Grenzwert 135/85
+    "blutzucker": {"wert": (3.9, 10.0)},                    # mmol/L (70–180 mg/dL)
+    "puls":       {"wert": (50, 100)},
+    "temperatur": {"wert": (36.0, 37.5)},
+}
+
+def verfuegbar() -> bool:
+    return np is not None
+
+# ── CACHE ────────────────────────────────────────────────────────────────
+
+MAX_REIHEN       = 8
+MAX_REIHEN_BYTES = 64 * 1024 * 1024
+MAX_ERGEBNISSE   = 256
+
+_lock    = threading.Lock()
+_reihen  = OrderedDict()   # (person_id, typ)                → (db_stand, bytes, (x, wert, wert2))
+_cache   = OrderedDict()   # (person_id, typ, fenster, ziel) → (tag, db_stand, ergebnis)
+_bytes   = 0
+_stand   = 0    # wird bei jeder Invalidierung hochgezählt
+
+def db_stand(db) -> tuple:
+    """Datenstand von messwerte + messreihen — zwei Lookups, unabhängig von der Datenmenge"""
+    v = versionen.versionen(db, ("messwerte", "messreihen"))
+    return v.get("messwerte", 0), v.get("messreihen", 0)
+
+def _entferne_reihe(key) -> None:
+    global _bytes
+    _bytes -= _reihen.pop(key)[1]
+
+def invalidiere(person_id: int | None = None, typ: str | None = None) -> None:
+    """Nach Inserts aufrufen — ohne Argumente wird alles verworfen"""
+    global _stand
+    with _lock:
+        _stand += 1
+        treffer = lambda k: (person_id is None or k[0] == person_id) and (typ is None or k[1] == typ)
+        for key in [k for k in _reihen if treffer(k)]:
+            _entferne_reihe(key)
+        for key in [k for k in _cache if treffer(k)]:
+            del _cache[key]
+
+def cache_info() -> dict:
+    return {"reihen": len(_reihen), "reihen_bytes": _bytes, "ergebnisse": len(_cache)}
+
+# ── LADEN ────────────────────────────────────────────────────────────────
+
+# POST /api/messwerte nimmt jedes datum an ("2025-1-5", ""), solche Zeilen
+# haben keinen Platz auf der Zeitachse und bleiben außen vor
+ISO_DATUM = "datum GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'"
+
+def _tag(datum: str) -> int | None:
+    try:
+        return date.fromisoformat(datum[:10]).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+def lade_reihe(db, person_id: int, typ: str, stand_db: tuple | None = None) -> tuple:
+    """
+    Reihe einmal laden → (x, wert, wert2) als float64-Arrays, nach x sortiert
+
+    x ist die Tageszahl (date.toordinal) inkl. Tagesanteil der Uhrzeit,
+    wert2 ist NaN wo nicht vorhanden. Blutzucker in mg/dL wird auf mmol/L
+    umgerechnet. stand_db: bereits gelesener db_stand().
+    """
+    global _bytes
+    key = (person_id, typ)
+    stand_db = stand_db if stand_db is not None else db_stand(db)
+    with _lock:
+        hit = _reihen.get(key)
+        if hit and hit[0] == stand_db:
+            _reihen.move_to_end(key)
+            return hit[2]
+        if hit:
+            _entferne_reihe(key)
+        stand = _stand
+
+    rows = db.execute("SELECT datum, wert, wert2, einheit FROM messwerte WHERE person_id=? "
+                      f"AND typ=? AND wert IS NOT NULL AND {ISO_DATUM}",
+                      (person_id, typ)).fetchall()
+    tage = [_tag(r[0]) for r in rows]
+    rows = [r for r, t in zip(rows, tage) if t is not None]        # "2025-02-30" passt durchs GLOB
+    xs, ws, w2s = [], [], []
+    if rows:
+        x = np.array([t for t in tage if t is not None], dtype=np.float64)
+        w = np.array([r[1] for r in rows], dtype=np.float64)
+        w2 = np.array([r[2] if r[2] is not None else np.nan for r in rows], dtype=np.float64)
+        if typ == "blutzucker":
+            mgdl = np.array([(r[3] or "").lower().startswith("mg") for r in rows])
+            w = np.where(mgdl, w / 18.0, w)
+        xs.append(x); ws.append(w); w2s.append(w2)
+
+    for r in db.execute("SELECT datum, offsets, werte FROM messreihen WHERE person_id=? AND typ=?",
+                        (person_id, typ)):
+        tag = _tag(r[0])
+        if tag is None:
+            continue
+        offsets = np.frombuffer(r[1], dtype="<i4")
+        werte = np.frombuffer(r[2], dtype="<f4").astype(np.float64)
+        xs.append(tag + offsets / 86400.0)
+        ws.append(werte)
+        w2s.append(np.full(len(werte), np.nan))
+
+    if xs:
+        x, w, w2 = np.concatenate(xs), np.concatenate(ws), np.concatenate(w2s)
+        order = np.argsort(x, kind="stable")
+        reihe = (x[order], w[order], w2[order])
+    else:
+        reihe = (np.empty(0), np.empty(0), np.empty(0))
+    groesse = sum(a.nbytes for a in reihe)
+    with _lock:
+        # zwischendurch invalidiert → nicht cachen; Riesen-Reihen verdrängen sonst alles
+        if stand == _stand and groesse <= MAX_REIHEN_BYTES // 2:
+            if key in _reihen:
+                _entferne_reihe(key)
+            _reihen[key] = (stand_db, groesse, reihe)
+            _bytes += groesse
+            while len(_reihen) > MAX_REIHEN or _bytes > MAX_REIHEN_BYTES:
+                _entferne_reihe(next(iter(_reihen)))
+    return reihe
+
+# ── KENNZAHLEN ───────────────────────────────────────────────────────────
+
+def _kennzahlen(x, v) -> dict | None:
+    ok = ~np.isnan(v)
+    x, v = x[ok], v[ok]
+    if not len(v):
+        return None
+    p = np.percentile(v, PERZENTILE)
+    trend = None
+    if len(v) >= 2 and np.ptp(x) > 0:
+        trend = float(np.polyfit(x, v, 1)[0]) * 7   # Steigung pro Tag → pro Woche
+    return {
+        "mittel": round(float(v.mean()), 2),
+        "min":    float(v.min()),
+        "max":    float(v.max()),
+        "std":    round(float(v.std()), 2),
+        **{f"p{q}": round(float(pq), 2) for q, pq in zip(PERZENTILE, p)},
+        "trend_pro_woche": round(trend, 3) if trend is not None else None,
+    }
+
+def _im_zielbereich(w, w2, ziel: dict) -> float | None:
+    if not ziel or not len(w):
+        return None
+    ok = np.ones(len(w), dtype=bool)
+    for feld, werte in (("wert", w), ("wert2", w2)):
+        if ziel.get(feld):
+            lo, hi = ziel[feld]
+            if lo is not None: ok &= werte >= lo
+            if hi is not None: ok &= werte <= hi
+    return round(float(ok.mean()), 3)
+
+def _gleitend(x, v, bis: int, tage: int, breite: int = 7) -> list:
+    """Gleitender Mittelwert über `breite` Kalendertage, ein Wert pro Tag"""
+    ok = ~np.isnan(v)
+    start = bis - tage - breite + 2
+    tag = np.floor(x[ok]).astype(np.int64) - start
+    sel = (tag >= 0) & (tag < tage + breite - 1)
+    summe = np.bincount(tag[sel], weights=v[ok][sel], minlength=tage + breite - 1)
+    anzahl = np.bincount(tag[sel], minlength=tage + breite - 1)
+    kern = np.ones(breite)
+    s = np.convolve(summe, kern, mode="valid")
+    n = np.convolve(anzahl, kern, mode="valid")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mittel = np.where(n > 0, s / np.maximum(n, 1), np.nan)
+    return [None if np.isnan(m) else round(float(m), 2) for m in mittel]
+
+def berechne(x, w, w2, fenster: int, heute: int, ziel: dict | None) -> dict:
+    """Kennzahlen für ein Fenster (Tage bis einschließlich heute, 0 = alles)"""
+    if fenster:
+        sel = x >= heute - fenster + 1
+        x, w, w2 = x[sel], w[sel], w2[sel]
+    ergebnis = {
+        "fenster": fenster, "n": int(len(w)),
+        "von": date.fromordinal(int(x[0])).isoformat() if len(x) else None,
+        "bis": date.fromordinal(int(x[-1])).isoformat() if len(x) else None,
+        "wert": _kennzahlen(x, w),
+        "wert2": _kennzahlen(x, w2),
+        "im_zielbereich": _im_zielbereich(w, w2, ziel),
+    }
+    tage = fenster or (min(int(heute - x[0]) + 1, 365) if len(x) else 0)
+    if tage:
+        ergebnis["gleitend_7d"] = {
+            "von": date.fromordinal(heute - tage + 1).isoformat(),
+            "wert": _gleitend(x, w, heute, tage),
+        }
+        if not np.isnan(w2).all():
+            ergebnis["gleitend_7d"]["wert2"] = _gleitend(x, w2, heute, tage)
+    return ergebnis
+
+def statistik(db, person_id: int, typ: str, fenster: tuple = FENSTER,
+              ziel: dict | None = None) -> list:
+    """Kennzahlen pro Fenster — gecacht pro (person_id, typ, fenster, ziel)"""
+    ziel = ziel if ziel is not None else ZIELBEREICHE.get(typ)
+    ziel_key = tuple(sorted((k, tuple(v)) for k, v in (ziel or {}).items() if v))
+    heute = date.today().toordinal()
+    stand_db = db_stand(db)
+
+    ergebnisse, fehlend = {}, []
+    with _lock:
+        stand = _stand
+        for f in fenster:
+            key = (person_id, typ, f, ziel_key)
+            hit = _cache.get(key)
+            if hit and hit[0] == heute and hit[1] == stand_db:
+                _cache.move_to_end(key)
+                ergebnisse[f] = hit[2]
+            else:
+                if hit:
+                    del _cache[key]
+                fehlend.append(f)
+    if fehlend:
+        x, w, w2 = lade_reihe(db, person_id, typ, stand_db)
+        for f in fehlend:
+            ergebnisse[f] = berechne(x, w, w2, f, heute, ziel)
+        with _lock:
+            if stand == _stand:
+                if _cache and next(reversed(_cache.values()))[0] != heute:
+                    _cache.clear()      # neuer Tag → alle Fenster verschoben
+                for f in fehlend:
+                    _cache[(person_id, typ, f, ziel_key)] = (heute, stand_db, ergebnisse[f])
+                while len(_cache) > MAX_ERGEBNISSE:
+                    _cache.popitem(last=False)
+    return [ergebnisse[f] for f in fenster]
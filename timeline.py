@@ -0,0 +1,133 @@
+"""
+Timeline — chronologische Sicht über alle Tabellen
+==================================================
+GET /api/timeline mischt Dokumente, Ereignisse, Messwerte, Medikamente
+(Beginn + Ende) und Policen zu einer Liste, neueste zuerst.
+
+Jede Quelle ist ein eigener Strom, der per Index in der Reihenfolge
+(datum DESC, id DESC) gelesen wird — mit LIMIT seite+1, mehr braucht eine
+Seite nie aus einer Tabelle. heapq.merge mischt die Ströme; der Cursor ist
+der Sortierschlüssel (datum, quelle, id) des letzten Eintrags, die nächste
+Seite setzt pro Quelle per Keyset-Bedingung genau dahinter an (kein OFFSET).
+
+Hochfrequente Samples aus messreihen sind nicht enthalten.
+"""
+
+import base64, heapq, json
+
+# quelle → (tabelle, datumsspalte, zusätzliche Bedingung)
+# Die Reihenfolge hier ist der Tie-Breaker bei gleichem Datum.
+QUELLEN = {
+    "dokument":         ("dokumente",   "datum",  ""),
+    "ereignis":         ("ereignisse",  "datum",  ""),
+    "medikament_start": ("medikamente", "seit",   ""),
+    "medikament_stop":  ("medikamente", "bis",    ""),
+    "police":           ("policen",     "beginn", ""),
+    "messwert":         ("messwerte",   "datum",  " AND wert IS NOT NULL"),
+}
+_RANG = {q: i for i, q in enumerate(QUELLEN)}
+
+# Filter-Kurznamen → Quellen
+TYPEN = {
+    "dokument":   ("dokument",),
+    "ereignis":   ("ereignis",),
+    "medikament": ("medikament_start", "medikament_stop"),
+    "police":     ("police",),
+    "messwert":   ("messwert",),
+}
+
+SCHEMA = "\n".join(
+    f"CREATE INDEX IF NOT EXISTS idx_{t}_{s} ON {t}({s});\n"
+    f"CREATE INDEX IF NOT EXISTS idx_{t}_person_{s} ON {t}(person_id, {s});"
+    for t, s, _ in QUELLEN.values())
+
+# ── EINTRÄGE ─────────────────────────────────────────────────────────────
+
+def _zahl(x) -> str:
+    return f"{x:g}" if isinstance(x, float) else str(x)
+
+def _eintrag(quelle: str, r) -> dict:
+    """DB-Zeile → einheitlicher Timeline-Eintrag"""
+    if quelle == "dokument":
+        typ, titel = r["typ"], r["titel"] or r["aussteller"] or r["typ"]
+        detail = r["diagnose"] or r["beschreibung"]
+    elif quelle == "ereignis":
+        typ, titel = r["typ"], r["titel"]
+        detail = ", ".join(x for x in (r["arzt"], r["einrichtung"]) if x) or r["notizen"]
+    elif quelle.startswith("medikament"):
+        typ = "beginn" if quelle == "medikament_start" else "ende"
+        titel = f"{r['name']} {r['dosierung'] or ''}".strip()
+        detail = r["wirkstoff"] or r["notiz"]
+    elif quelle == "police":
+        typ, titel = r["art"], f"{r['versicherung'] or ''} {r['tarif'] or ''}".strip()
+        detail = r["versicherungs_nr"]
+    else:
+        wert = _zahl(r["wert"]) + (f"/{_zahl(r['wert2'])}" if r["wert2"] is not None else "")
+        typ, titel, detail = r["typ"], f"{wert} {r['einheit'] or ''}".strip(), r["notiz"]
+    return {"quelle": quelle.split("_")[0], "art": quelle, "id": r["id"],
+            "datum": r["datum"], "person_id": r["person_id"], "person": r["person"],
+            "typ": typ, "titel": titel, "detail": detail or None}
+
+# ── CURSOR ───────────────────────────────────────────────────────────────
+
+def cursor_kodieren(datum: str, quelle: str, id_: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([datum, quelle, id_]).encode()).decode().rstrip("=")
+
+def cursor_dekodieren(cursor: str) -> tuple:
+    """→ (datum, quelle, id); ValueError bei kaputtem Cursor"""
+    try:
+        datum, quelle, id_ = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Ungültiger Cursor")
+    if quelle not in QUELLEN or not isinstance(datum, str) or not isinstance(id_, int):
+        raise ValueError("Ungültiger Cursor")
+    return datum, quelle, id_
+
+# ── STRÖME ───────────────────────────────────────────────────────────────
+
+def _strom(db, quelle: str, person_id: int | None, von: str | None, bis: str | None,
+           nach: tuple | None, limit: int) -> list:
+    """
+    Bis zu `limit` Zeilen einer Quelle in Timeline-Reihenfolge, strikt nach
+    dem Cursor `nach` = (datum, quelle, id).
+    """
+    tabelle, spalte, bedingung = QUELLEN[quelle]
+    q = (f"SELECT *, {spalte} AS datum FROM {tabelle} "
+         f"WHERE {spalte} IS NOT NULL AND {spalte} != ''{bedingung}")
+    params = []
+    if person_id is not None: q += " AND person_id=?"; params.append(person_id)
+    if von: q += f" AND {spalte} >= ?"; params.append(von)
+    if bis: q += f" AND {spalte} <= ?"; params.append(bis)
+    if nach:
+        datum, c_quelle, c_id = nach
+        if _RANG[quelle] < _RANG[c_quelle]:
+            q += f" AND {spalte} <= ?"; params.append(datum)
+        elif quelle == c_quelle:
+            q += f" AND ({spalte}, id) < (?, ?)"; params += [datum, c_id]
+        else:
+            q += f" AND {spalte} < ?"; params.append(datum)
+    q += f" ORDER BY {spalte} DESC, id DESC LIMIT ?"; params.append(limit)
+    return [(r["datum"], _RANG[quelle], r["id"], quelle, r) for r in db.execute(q, params)]
+
+def timeline(db, person_id: int | None = None, typen: list | None = None,
+             von: str | None = None, bis: str | None = None,
+             cursor: str | None = None, limit: int = 50) -> dict:
+    """
+    Eine Seite der Timeline → {"eintraege": [...], "naechster_cursor": str|None}
+
+    typen: Kurznamen aus TYPEN (None = alle)
+    """
+    quellen = [q for t in (typen or TYPEN) for q in TYPEN[t]]
+    nach = cursor_dekodieren(cursor) if cursor else None
+    stroeme = [_strom(db, q, person_id, von, bis, nach, limit + 1) for q in quellen]
+    seite = []
+    for zeile in heapq.merge(*stroeme, key=lambda z: z[:3], reverse=True):
+        seite.append(zeile)
+        if len(seite) > limit:
+            break
+    mehr = len(seite) > limit
+    seite = seite[:limit]
+    return {
+        "eintraege": [_eintrag(q, r) for *_, q, r in seite],
+        "naechster_cursor": cursor_kodieren(seite[-1][0], seite[-1][3], seite[-1][2]) if mehr else None,
+    }
@@ -1,7 +1,9 @@
 """
 Apple Health Importer für HealthLedger Pi
 =========================================
-Importiert export.xml aus dem Apple Health Export ZIP
+Importiert export.xml aus dem Apple Health Export ZIP.
+Parser, Mapping und Write-Pfad liegen im Paket importer/ (geteilt mit
+dem HTTP-Endpoint in main.py) — dieses Skript ist nur das CLI.
 
 Apple Health XML Struktur:
   <HealthData locale="de_DE">
@@ -31,126 +33,24 @@ HealthKit → HealthLedger Mapping:
   HKQuantityTypeIdentifierActiveEnergyBurned → (Skip)
 """
 
-import xml.etree.ElementTree as ET
-import zipfile, json, sqlite3, os, sys
-from datetime import datetime, date
+import sqlite3, sys
 from pathlib import Path
-from collections import defaultdict
 
-DB_PATH = Path(__file__).parent / "data" / "healthledger.db"
-
-# ── MAPPING ──────────────────────────────────────────────────────────────
-# HKType → (hl_typ, einheit_override, umrechnung_fn)
-HK_MAP = {
-    # Gewicht
-    "HKQuantityTypeIdentifierBodyMass": {
-        "typ": "gewicht", "feld": "wert", "einheit": "kg",
-        "conv": lambda v, u: (round(float(v), 1), None)
-    },
-    # Blutdruck (werden zusammengeführt)
-    "HKQuantityTypeIdentifierBloodPressureSystolic": {
-        "typ": "blutdruck", "feld": "wert", "einheit": "mmHg",
-        "conv": lambda v, u: (int(float(v)), None)
-    },
-    "HKQuantityTypeIdentifierBloodPressureDiastolic": {
-        "typ": "blutdruck", "feld": "wert2", "einheit": "mmHg",
-        "conv": lambda v, u: (int(float(v)), None)
-    },
-    # Blutzucker
-    "HKQuantityTypeIdentifierBloodGlucose": {
-        "typ": "blutzucker", "feld": "wert", "einheit": "mmol/L",
-        "conv": lambda v, u: (
-            round(float(v), 1) if u in ("mmol/L","mmol/l")
-            else round(float(v) / 18.0, 1),  # mg/dL → mmol/L
-            None
-        )
-    },
-    # Temperatur
-    "HKQuantityTypeIdentifierBodyTemperature": {
-        "typ": "temperatur", "feld": "wert", "einheit": "°C",
-        "conv": lambda v, u: (
-            round(float(v), 1) if u in ("°C","degC","C")
-            else round((float(v) - 32) * 5/9, 1),  # °F → °C
-            None
-        )
-    },
-    # Puls / Herzfrequenz
-    "HKQuantityTypeIdentifierHeartRate": {
-        "typ": "puls", "feld": "wert", "einheit": "BPM",
-        "conv": lambda v, u: (int(float(v)), None)
-    },
-    "HKQuantityTypeIdentifierRestingHeartRate": {
-        "typ": "puls", "feld": "wert", "einheit": "BPM",
-        "conv": lambda v, u: (int(float(v)), None)
-    },
-    # SpO2 / Sauerstoffsättigung
-    "HKQuantityTypeIdentifierOxygenSaturation": {
-        "typ": "laborwert", "feld": "wert", "einheit": "%",
-        "name": "SpO2",
-        "conv": lambda v, u: (round(float(v) * 100, 1) if float(v) <= 1.0
-                              else round(float(v), 1), None)
-    },
-    # BMI
-    "HKQuantityTypeIdentifierBodyMassIndex": {
-        "typ": "laborwert", "feld": "wert", "einheit": "BMI",
-        "name": "BMI",
-        "conv": lambda v, u: (round(float(v), 1), None)
-    },
-    # Körperfett
-    "HKQuantityTypeIdentifierBodyFatPercentage": {
-        "typ": "laborwert", "feld": "wert", "einheit": "%",
-        "name": "Körperfett",
-        "conv": lambda v, u: (round(float(v) * 100, 1) if float(v) <= 1.0
-                              else round(float(v), 1), None)
-    },
-}
-
-# Diese Types komplett ignorieren (zu viel Rauschen)
-HK_SKIP = {
-    "HKQuantityTypeIdentifierStepCount",
-    "HKQuantityTypeIdentifierDistanceWalkingRunning",
-    "HKQuantityTypeIdentifierActiveEnergyBurned",
-    "HKQuantityTypeIdentifierBasalEnergyBurned",
-    "HKQuantityTypeIdentifierFlightsClimbed",
-    "HKQuantityTypeIdentifierDistanceCycling",
-    "HKCategoryTypeIdentifierSleepAnalysis",
-    "HKCategoryTypeIdentifierAppleStandHour",
-    "HKQuantityTypeIdentifierAppleExerciseTime",
-    "HKQuantityTypeIdentifierAppleStandTime",
-    "HKQuantityTypeIdentifierWalkingSpeed",
-    "HKQuantityTypeIdentifierWalkingStepLength",
-    "HKQuantityTypeIdentifierWalkingDoubleSupportPercentage",
-    "HKQuantityTypeIdentifierWalkingAsymmetryPercentage",
-    "HKQuantityTypeIdentifierStairAscentSpeed",
-    "HKQuantityTypeIdentifierStairDescentSpeed",
-    "HKQuantityTypeIdentifierVO2Max",
-    "HKQuantityTypeIdentifierEnvironmentalAudioExposure",
-    "HKQuantityTypeIdentifierHeadphoneAudioExposure",
-    "HKCategoryTypeIdentifierHandwashingEvent",
-    "HKCategoryTypeIdentifierMindfulSession",
-    "HKQuantityTypeIdentifierSixMinuteWalkTestDistance",
-}
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from importer import AppleHealthQuelle, finde_person, importiere, importiere_und_auswerten
+import anomalien, verlauf
+import zeitreihen as zr
 
-def parse_date(dt_str: str) -> str:
-    """Apple Health Datum → YYYY-MM-DD"""
-    if not dt_str: return date.today().isoformat()
-    for fmt in ("%Y-%m-%d %H:%M:%S %z", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d"):
-        try:
-            return datetime.strptime(dt_str[:19], fmt[:len(dt_str[:19])]).strftime("%Y-%m-%d")
-        except: pass
-    return dt_str[:10]
+DB_PATH = Path(__file__).parent / "data" / "healthledger.db"
 
-def get_person_id(db, person_name: str) -> int | None:
-    if not person_name: return None
-    row = db.execute("SELECT id FROM personen WHERE name=?", (person_name,)).fetchone()
-    if row: return row[0]
-    row = db.execute("SELECT id FROM personen WHERE name LIKE ?", (person_name.split()[0]+"%",)).fetchone()
-    return row[0] if row else None
+MESSWERT_TYPEN = ('gewicht','blutdruck','blutzucker','temperatur','puls','laborwert')
 
 def import_apple_health(source_path: str, person_name: str,
                         dry_run: bool = False,
                         deduplicate: bool = True,
-                        max_per_day: int = 3) -> dict:
+                        max_per_day: int = 3,
+                        workers: int = 0,
+                        zeitreihen: bool = False) -> dict:
     """
     Hauptfunktion: Importiert Apple Health Export in HealthLedger
 
@@ -160,150 +60,31 @@ def import_apple_health(source_path: str, person_name: str,
         dry_run:      Nur analysieren, nicht schreiben
         deduplicate:  Doppelte Messungen pro Tag überspringen
         max_per_day:  Max. Messungen pro Typ pro Tag (verhindert Watch-Spam)
+        workers:      0 = Streaming (ein Kern), ≥1 = Parallel-Modus mit
+                      so vielen Prozessen
+        zeitreihen:   Puls + SpO2 komplett (ohne max_per_day) in den
+                      Zeitreihen-Speicher messreihen schreiben
 
     Returns:
         dict mit Statistiken
     """
     source = Path(source_path)
-    stats = defaultdict(int)
-    stats["person"] = person_name
-    stats["source"] = str(source)
-
-    # ── XML laden ────────────────────────────────────────────────────────
-    if source.suffix.lower() == ".zip":
-        print(f"📦 Entpacke {source.name}…")
-        with zipfile.ZipFile(source) as z:
-            # Suche export.xml
-            xml_files = [f for f in z.namelist() if "export.xml" in f and "cda" not in f.lower()]
-            if not xml_files:
-                raise FileNotFoundError("export.xml nicht in ZIP gefunden")
-            xml_file = xml_files[0]
-            print(f"   → {xml_file} ({z.getinfo(xml_file).file_size / 1024 / 1024:.1f} MB)")
-            xml_data = z.read(xml_file)
-    elif source.suffix.lower() == ".xml":
-        xml_data = source.read_bytes()
-    else:
-        raise ValueError(f"Unbekanntes Format: {source.suffix}")
-
-    # Apple Health DTD-Bug umgehen (iOS 16+)
-    # Entferne die problematische DOCTYPE-Zeile
-    if b"<!DOCTYPE" in xml_data[:2000]:
-        lines = xml_data.split(b"\n")
-        cleaned = []
-        skip = False
-        for line in lines:
-            if b"<!DOCTYPE" in line:
-                skip = True
-            if skip:
-                if b"]>" in line or (b">" in line and b"<!ATTLIST" not in line and b"<!ELEMENT" not in line):
-                    skip = False
-                continue
-            cleaned.append(line)
-        xml_data = b"\n".join(cleaned)
-
-    print(f"🔍 Parse XML…")
-    try:
-        root = ET.fromstring(xml_data)
-    except ET.ParseError as e:
-        # Fallback: iterparse mit Error-Recovery
-        print(f"   ⚠️ Parse-Fehler: {e} — versuche Fallback…")
-        import io
-        root = ET.parse(io.BytesIO(xml_data)).getroot()
-
-    # ── Records sammeln ──────────────────────────────────────────────────
-    records_raw = defaultdict(list)  # date → [(typ, wert, wert2, einheit, notiz)]
-    bp_buffer = defaultdict(dict)    # date+time → {systolic: x, diastolic: y}
-
-    total_records = 0
-    skipped_types = set()
-
-    for record in root.iter("Record"):
-        hk_type = record.get("type", "")
-        total_records += 1
-
-        if hk_type in HK_SKIP:
-            continue
-        if hk_type not in HK_MAP:
-            skipped_types.add(hk_type)
-            continue
-
-        mapping = HK_MAP[hk_type]
-        value_str = record.get("value", "")
-        unit_str  = record.get("unit", "")
-        dt_str    = record.get("startDate", record.get("endDate", ""))
-        datum     = parse_date(dt_str)
-
-        if not value_str:
-            continue
-
-        try:
-            conv_val, _ = mapping["conv"](value_str, unit_str)
-        except (ValueError, ZeroDivisionError):
-            stats["fehler"] += 1
-            continue
-
-        entry = {
-            "typ":    mapping["typ"],
-            "einheit": mapping.get("einheit", unit_str),
-            "datum":  datum,
-            "notiz":  mapping.get("name", ""),
-            "feld":   mapping["feld"],
-            "wert":   None,
-            "wert2":  None,
-            "hk_type": hk_type,
-        }
-        entry[mapping["feld"]] = conv_val
-
-        # Blutdruck: Systolisch + Diastolisch zusammenführen
-        if hk_type in ("HKQuantityTypeIdentifierBloodPressureSystolic",
-                       "HKQuantityTypeIdentifierBloodPressureDiastolic"):
-            key = dt_str[:16]  # Minuten-genau für Pairing
-            if "Systolic" in hk_type:
-                bp_buffer[key]["sys"]   = conv_val
-                bp_buffer[key]["datum"] = datum
-            else:
-                bp_buffer[key]["dia"] = conv_val
-                bp_buffer[key]["datum"] = datum
-            # Wenn beide vorhanden → als eine Messung speichern
-            if "sys" in bp_buffer[key] and "dia" in bp_buffer[key]:
-                bp = bp_buffer.pop(key)
-                records_raw[datum].append({
-                    "typ": "blutdruck", "wert": bp["sys"], "wert2": bp["dia"],
-                    "einheit": "mmHg", "datum": datum, "notiz": ""
-                })
-                stats["blutdruck"] += 1
-        else:
-            records_raw[datum].append(entry)
-            stats[mapping["typ"]] += 1
-
-    stats["total_raw"] = total_records
-    stats["unbekannte_typen"] = len(skipped_types)
-
-    # ── Deduplizierung ────────────────────────────────────────────────────
-    # Pro Tag + Typ max. max_per_day Messungen (Watch sendet oft stündlich)
-    records_final = []
-    day_type_count = defaultdict(int)
-
-    for datum in sorted(records_raw.keys()):
-        for entry in records_raw[datum]:
-            key = f"{datum}_{entry['typ']}"
-            if deduplicate and day_type_count[key] >= max_per_day:
-                stats["dedupliziert"] += 1
-                continue
-            day_type_count[key] += 1
-            records_final.append(entry)
-
-    stats["zu_importieren"] = len(records_final)
+    quelle = AppleHealthQuelle(source, workers=workers)
 
     if dry_run:
+        print(f"🔍 Parse XML…")
+        stats = importiere(None, quelle, None, person_name, dry_run=True, zeitreihen=zeitreihen,
+                           deduplicate=deduplicate, max_per_day=max_per_day)
+        stats["person"] = person_name
+        stats["source"] = str(source)
         print(f"\n📊 DRY RUN — Analyse für {person_name}:")
-        print(f"   Records in XML:     {total_records:,}")
-        print(f"   Gemappt:            {sum(v for k,v in stats.items() if k in ['gewicht','blutdruck','blutzucker','temperatur','puls','laborwert']):,}")
-        print(f"   Nach Deduplizierung: {len(records_final):,}")
+        print(f"   Records in XML:     {stats['total_raw']:,}")
+        print(f"   Gemappt:            {stats['gemappt']:,}")
+        print(f"   Nach Deduplizierung: {stats['zu_importieren']:,}")
         print(f"   Übersprungen (Typ): {stats['unbekannte_typen']} unbekannte Typen")
-        if skipped_types:
+        if quelle.skipped_types:
             print(f"\n   Nicht importierte Typen (erste 10):")
-            for t in sorted(skipped_types)[:10]:
+            for t in sorted(quelle.skipped_types)[:10]:
                 print(f"     - {t.replace('HKQuantityTypeIdentifier','').replace('HKCategoryTypeIdentifier','')}")
         return dict(stats)
 
@@ -311,56 +92,30 @@ def import_apple_health(source_path: str, person_name: str,
     db = sqlite3.connect(DB_PATH)
     db.row_factory = sqlite3.Row
 
-    person_id = get_person_id(db, person_name)
-    if not person_id:
+    person = finde_person(db, person_name)
+    if not person:
+        verfuegbar = [r[0] for r in db.execute("SELECT name FROM personen").fetchall()]
         db.close()
         raise ValueError(f"Person '{person_name}' nicht in HealthLedger gefunden. "
-                         f"Verfügbare Personen: " +
-                         str([r[0] for r in db.execute("SELECT name FROM personen").fetchall()]))
-
-    # Bestehende Messungen laden für Deduplizierung
-    existing = set()
-    if deduplicate:
-        for row in db.execute(
-            "SELECT typ, datum FROM messwerte WHERE person_id=?", (person_id,)
-        ).fetchall():
-            existing.add(f"{row['typ']}_{row['datum']}")
-
-    imported = 0
-    skipped_existing = 0
-
-    for entry in records_final:
-        # Bereits vorhanden?
-        if deduplicate:
-            day_key = f"{entry['typ']}_{entry['datum']}"
-            if day_key in existing:
-                skipped_existing += 1
-                continue
+                         f"Verfügbare Personen: " + str(verfuegbar))
 
-        notiz = f"Apple Health Import"
-        if entry.get("notiz"): notiz += f" ({entry['notiz']})"
+    # Tabellen, die sonst erst main.py beim Start anlegt
+    db.executescript(zr.SCHEMA + anomalien.SCHEMA + verlauf.SCHEMA)
 
-        db.execute("""
-            INSERT INTO messwerte (person_id, person, typ, wert, wert2, einheit, datum, notiz)
-            VALUES (?,?,?,?,?,?,?,?)
-        """, (
-            person_id, person_name,
-            entry["typ"], entry.get("wert"), entry.get("wert2"),
-            entry["einheit"], entry["datum"], notiz
-        ))
-        imported += 1
+    print(f"🔍 Parse XML…")
+    stats = importiere_und_auswerten(db, quelle, person["id"], person["name"], zeitreihen=zeitreihen,
+                                     deduplicate=deduplicate, max_per_day=max_per_day)
+    stats["person"] = person_name
+    stats["source"] = str(source)
 
     db.execute("""
         INSERT INTO audit_log (aktion, tabelle, datensatz_id, details, user)
         VALUES ('IMPORT', 'messwerte', ?, ?, 'apple_health')
-    """, (person_id, f"Apple Health Import: {imported} Messungen für {person_name}"))
+    """, (person["id"], f"Apple Health Import: {stats['importiert']} Messungen für {person['name']}"))
 
     db.commit()
     db.close()
 
-    stats["importiert"]        = imported
-    stats["bereits_vorhanden"] = skipped_existing
-
     return dict(stats)
 
 
@@ -378,6 +133,10 @@ def main():
                         help="Max. Messungen pro Typ pro Tag (default: 3)")
     parser.add_argument("--no-dedup", action="store_true",
                         help="Keine Deduplizierung")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Parallel-Modus: XML in N Prozessen parsen (default: 0 = aus)")
+    parser.add_argument("--zeitreihen", action="store_true",
+                        help="Puls + SpO2 vollständig als kompakte Zeitreihe speichern")
     args = parser.parse_args()
 
     print(f"\n🏥 HealthLedger — Apple Health Importer")
@@ -385,6 +144,8 @@ def main():
     print(f"Quelle: {args.source}")
     print(f"Person: {args.person}")
     print(f"Modus:  {'DRY RUN' if args.dry_run else 'IMPORT'}")
+    if args.workers:
+        print(f"Worker: {args.workers}")
     print(f"{'─'*45}\n")
 
     try:
@@ -394,6 +155,8 @@ def main():
             dry_run=args.dry_run,
             deduplicate=not args.no_dedup,
             max_per_day=args.max_per_day,
+            workers=args.workers,
+            zeitreihen=args.zeitreihen,
         )
 
         print(f"\n{'─'*45}")
@@ -404,9 +167,12 @@ def main():
             print(f"   ✅ Importiert:      {stats.get('importiert', 0):,}")
             print(f"   ⏭️  Übersprungen:   {stats.get('bereits_vorhanden', 0):,} (bereits vorhanden)")
             print(f"   📊 Dedupliziert:    {stats.get('dedupliziert', 0):,}")
+            if stats.get("zeitreihe"):
+                print(f"   📈 Zeitreihe:       {stats['zeitreihe']:,} Samples (Puls/SpO2)")
+            if stats.get("auffaellig"):
+                print(f"   ⚠️  Auffällig:       {stats['auffaellig']:,} Werte (siehe /api/messwerte/auffaellig)")
 
-        typen = {k: v for k, v in stats.items()
-                 if k in ('gewicht','blutdruck','blutzucker','temperatur','puls','laborwert') and v > 0}
+        typen = {k: v for k, v in stats.items() if k in MESSWERT_TYPEN and v > 0}
         if typen:
             print(f"\n   Typen:")
             for t, n in sorted(typen.items()):
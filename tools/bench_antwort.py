@@ -0,0 +1,96 @@
+"""
+Benchmark Antwort-Größe + Serialisierung
+========================================
+Misst für typische Payloads — Dokumentliste (mit ki_extraktion-JSON pro
+Zeile) und Dashboard — die Bytes auf der Leitung:
+
+  roh     FastAPI-Standard (jsonable_encoder + JSONResponse)
+  gzip    immer verfügbar
+  br      falls brotli installiert
+  zstd    falls zstandard installiert
+
+sowie die Serialisierungszeit Standardpfad vs. antwort.json_bytes()
+(orjson falls installiert, sonst json.dumps ohne jsonable_encoder).
+
+Usage:
+  python tools/bench_antwort.py [--dokumente 100]
+"""
+
+import argparse, json, random, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import antwort
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+PERSONEN   = ["Sven", "Heidi", "Julian", "Theresa"]
+AUSSTELLER = ["Dr. med. Weber, Allgemeinmedizin", "Radiologie am Markt", "Zahnarztpraxis Hoffmann",
+              "Labor Dr. Krause MVZ", "Apotheke am Dom", "Klinikum Süd, Innere Medizin"]
+DIAGNOSEN  = ["Akute Bronchitis (J20.9)", "Hypertonie (I10.90)", "Kontrolluntersuchung",
+              "Zahnsteinentfernung, PZR", "Blutbild, HbA1c", "Lumbago (M54.5)"]
+
+def dokument(rnd: random.Random, i: int) -> dict:
+    person = rnd.choice(PERSONEN)
+    ki = {"typ": "rechnung", "aussteller": rnd.choice(AUSSTELLER), "patient": person,
+          "datum": f"2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+          "betrag": round(rnd.uniform(20, 900), 2), "diagnose": rnd.choice(DIAGNOSEN),
+          "beschreibung": "Privatliquidation nach GOÄ, Leistungen lt. Aufstellung",
+          "tags": ["goä", "beihilfe", "pkv"], "konfidenz": "hoch",
+          "positionen": [{"ziffer": z, "faktor": 2.3, "betrag": round(rnd.uniform(5, 80), 2)}
+                         for z in rnd.sample(["1", "3", "5", "7", "250", "3550", "5", "34"], 4)]}
+    return {"id": i, "person_id": PERSONEN.index(person) + 1, "person": person, "typ": "rechnung",
+            "titel": None, "aussteller": ki["aussteller"], "datum": ki["datum"], "betrag": ki["betrag"],
+            "diagnose": ki["diagnose"], "beschreibung": ki["beschreibung"],
+            "tags": json.dumps(ki["tags"]), "file_path": f"/app/uploads/2025_{i:05d}_{person}.jpg",
+            "eingereicht_beihilfe": rnd.randint(0, 1), "eingereicht_pkv": 0,
+            "ki_extraktion": json.dumps(ki, ensure_ascii=False), "erstellt_am": "2025-06-01 10:00:00"}
+
+def dashboard(doks: list) -> dict:
+    personen = [{"id": i + 1, "name": n, "geburtsdatum": None, "blutgruppe": None, "allergien": "[]",
+                 "notfallkontakt": None, "arzt_hausarzt": None, "versicherung_name": "DKV",
+                 "versicherung_nr": None, "beihilfesatz": 0.7, "aktiv": 1,
+                 "erstellt_am": "2025-01-01 00:00:00", "dok_count": 25, "med_count": 2}
+                for i, n in enumerate(PERSONEN)]
+    return {"personen": personen, "dok_gesamt": len(doks), "med_gesamt": 8, "letzte_dok": doks[:8]}
+
+def standard(daten) -> bytes:
+    return JSONResponse(jsonable_encoder(daten)).body
+
+def zeit(fn, daten, n: int = 200) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(daten)
+    return (time.perf_counter() - t0) / n
+
+def main():
+    parser = argparse.ArgumentParser(description="Antwort-Benchmark")
+    parser.add_argument("--dokumente", type=int, default=100)
+    args = parser.parse_args()
+
+    rnd = random.Random(42)
+    doks = [dokument(rnd, i) for i in range(args.dokumente)]
+    payloads = {f"/api/dokumente ({args.dokumente})": doks, "/api/dashboard": dashboard(doks)}
+
+    print(f"\n🏥 HealthLedger — Antwort-Benchmark")
+    print(f"{'─'*72}")
+    print(f"  JSON: {'orjson' if antwort.orjson else 'json.dumps'} · "
+          f"Kompression: {', '.join(antwort.verfahren())}\n")
+    print(f"  {'Payload':24} {'roh':>9} " + " ".join(f"{v:>15}" for v in antwort.verfahren()))
+    for name, daten in payloads.items():
+        roh = standard(daten)
+        assert json.loads(roh) == json.loads(antwort.json_bytes(daten))
+        spalten = []
+        for v, fn in antwort.verfahren().items():
+            n = len(fn(roh))
+            spalten.append(f"{n:>7,} B {len(roh) / n:4.1f}×")
+        print(f"  {name:24} {len(roh):>7,} B " + " ".join(f"{s:>15}" for s in spalten))
+
+    print(f"\n  {'Serialisierung':24} {'Standard':>10} {'json_bytes':>11}")
+    for name, daten in payloads.items():
+        t_std, t_neu = zeit(standard, daten), zeit(antwort.json_bytes, daten)
+        print(f"  {name:24} {t_std * 1000:7.2f} ms {t_neu * 1000:8.2f} ms  ({t_std / t_neu:.1f}×)")
+    print(f"{'─'*72}\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark Apple Health Import
+=============================
+Erzeugt einen synthetischen export.xml und misst den Durchsatz des
+Importers (Dry-Run, ohne DB): Umrechnung pro Record vs. spaltenweise mit
+NumPy, und Parallel-Modus mit 1 vs. 4 Workern.
+
+Usage:
+  python tools/bench_apple_health_import.py [--records 1000000] [--keep]
+"""
+
+import argparse, random, sys, tempfile, time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from importer import AppleHealthQuelle, importiere, spalten
+from importer.apple_health import (_stream_records, _batches, konvertiere,
+                                   sammle_events, sammle_gruppen)
+from importer.schreiber import schreibe_gruppen, schreibe_messungen
+
+HEADER = b"""<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE HealthData [
+<!ELEMENT HealthData (ExportDate,Me,(Record|Correlation|Workout|ActivitySummary)*)>
+<!ATTLIST Record
+  type          CDATA #REQUIRED
+  unit          CDATA #IMPLIED
+  value         CDATA #IMPLIED
+>
+]>
+<HealthData locale="de_DE">
+ <ExportDate value="2026-01-01 08:00:00 +0100"/>
+"""
+
+# (HK-Typ, Einheit, Wertebereich) — grob wie ein echter Watch-Export gemischt
+MIX = [
+    ("HKQuantityTypeIdentifierHeartRate",          "count/min", (55, 140)),
+    ("HKQuantityTypeIdentifierHeartRate",          "count/min", (55, 140)),
+    ("HKQuantityTypeIdentifierStepCount",          "count",     (10, 900)),
+    ("HKQuantityTypeIdentifierActiveEnergyBurned", "kcal",      (1, 40)),
+    ("HKQuantityTypeIdentifierOxygenSaturation",   "%",         (0.92, 1.0)),
+    ("HKQuantityTypeIdentifierBodyMass",           "kg",        (78, 86)),
+    ("HKQuantityTypeIdentifierBloodGlucose",       "mg/dL",     (80, 140)),
+    ("HKQuantityTypeIdentifierBodyTemperature",    "degF",      (97, 100)),
+]
+
+def schreibe_export(path: Path, n_records: int, seed: int = 42) -> None:
+    rnd = random.Random(seed)
+    t = datetime(2016, 1, 1, 7, 0)
+    with open(path, "wb") as f:
+        f.write(HEADER)
+        i = 0
+        while i < n_records:
+            t += timedelta(minutes=rnd.randint(1, 20))
+            ts = t.strftime("%Y-%m-%d %H:%M:%S +0100")
+            if rnd.random() < 0.02:
+                # Blutdruck: Systolisch + Diastolisch mit identischem Zeitstempel
+                sys_v, dia_v = rnd.randint(110, 150), rnd.randint(65, 95)
+                f.write(f' <Record type="HKQuantityTypeIdentifierBloodPressureSystolic" sourceName="Omron" unit="mmHg" '
+                        f'creationDate="{ts}" startDate="{ts}" endDate="{ts}" value="{sys_v}"/>\n'
+                        f' <Record type="HKQuantityTypeIdentifierBloodPressureDiastolic" sourceName="Omron" unit="mmHg" '
+                        f'creationDate="{ts}" startDate="{ts}" endDate="{ts}" value="{dia_v}"/>\n'.encode())
+                i += 2
+                continue
+            hk, unit, (lo, hi) = rnd.choice(MIX)
+            val = round(rnd.uniform(lo, hi), 3)
+            f.write(f' <Record type="{hk}" sourceName="Sven&#x2019;s Apple Watch" unit="{unit}" '
+                    f'creationDate="{ts}" startDate="{ts}" endDate="{ts}" value="{val}">\n'
+                    f'  <MetadataEntry key="HKMetadataKeyHeartRateMotionContext" value="0"/>\n'
+                    f' </Record>\n'.encode())
+            i += 1
+        f.write(b"</HealthData>\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="Apple Health Import Benchmark")
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--keep", action="store_true", help="export.xml nicht löschen")
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="hl_bench_"))
+    xml_path = tmp / "export.xml"
+    print(f"\n🏥 HealthLedger — Import-Benchmark")
+    print(f"{'─'*55}")
+    print(f"Erzeuge {args.records:,} Records → {xml_path}")
+    schreibe_export(xml_path, args.records)
+    print(f"Dateigröße: {xml_path.stat().st_size / 1024 / 1024:.1f} MB\n")
+
+    def run(workers, spaltenweise):
+        quelle = AppleHealthQuelle(xml_path, workers=workers, spaltenweise=spaltenweise)
+        return importiere(None, quelle, None, "Bench", dry_run=True)
+
+    laeufe = [("Streaming, pro Record", 0, False)]
+    if spalten.verfuegbar():
+        laeufe.append(("Streaming, spaltenweise", 0, True))
+    else:
+        print("  (NumPy nicht installiert — spaltenweise Läufe entfallen)")
+    sp = spalten.verfuegbar()
+    laeufe += [("parallel, 1 Worker", 1, sp), ("parallel, 4 Worker", 4, sp)]
+
+    ergebnisse = {}
+    for label, w, spw in laeufe:
+        t0 = time.perf_counter()
+        stats = run(w, spw)
+        dt = time.perf_counter() - t0
+        ergebnisse[label] = (stats, dt)
+        print(f"  {label:28} {dt:7.2f} s   ({stats['total_raw'] / dt:>10,.0f} Records/s)")
+
+    # Alle Modi müssen dasselbe Ergebnis liefern
+    ref = ergebnisse[laeufe[0][0]][0]
+    for label, (stats, _) in ergebnisse.items():
+        for k in ("total_raw", "zu_importieren", "blutdruck", "puls", "dedupliziert", "unplausibel"):
+            if stats.get(k, 0) != ref.get(k, 0):
+                print(f"  ❌ Abweichung bei {label}: {k} {stats.get(k, 0)} ≠ {ref.get(k, 0)}")
+
+    # Umrechnung + Deduplizierung isoliert (ohne XML-Parsing): Rohdaten
+    # einmal einlesen, dann beide Pfade bis vor den Insert
+    if sp:
+        with open(xml_path, "rb") as f:
+            raw = list(_stream_records(f, defaultdict(int)))
+        pfade = {
+            False: lambda st: schreibe_messungen(
+                None, sammle_events([konvertiere(raw, st, set())], st), None, "Bench",
+                dry_run=True, stats=st),
+            True: lambda st: schreibe_gruppen(
+                None, sammle_gruppen(_batches(raw, st, set()), st), None, "Bench",
+                dry_run=True, stats=st),
+        }
+        print()
+        for label, spw in (("Umrechnung pro Record", False), ("Umrechnung spaltenweise", True)):
+            st = defaultdict(int)
+            t0 = time.perf_counter()
+            pfade[spw](st)
+            dt = time.perf_counter() - t0
+            ergebnisse[label] = (st, dt)
+            print(f"  {label:28} {dt:7.2f} s   ({len(raw) / dt:>10,.0f} Records/s, "
+                  f"{st['zu_importieren']:,} Messungen)")
+        del raw
+
+    zeit = lambda label: ergebnisse[label][1]
+    if sp:
+        print(f"\n  Speedup spaltenweise vs. pro Record: "
+              f"{zeit('Streaming, pro Record') / zeit('Streaming, spaltenweise'):.2f}× gesamt, "
+              f"{zeit('Umrechnung pro Record') / zeit('Umrechnung spaltenweise'):.2f}× Umrechnung")
+    print(f"  Speedup 4 vs. 1 Worker:              "
+          f"{zeit('parallel, 1 Worker') / zeit('parallel, 4 Worker'):.2f}×")
+    print(f"{'─'*55}\n")
+
+    if args.keep:
+        print(f"export.xml behalten: {xml_path}")
+    else:
+        xml_path.unlink()
+        tmp.rmdir()
+
+if __name__ == "__main__":
+    main()
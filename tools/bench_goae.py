@@ -0,0 +1,89 @@
+"""
+Benchmark GOÄ-Suche
+===================
+Vergleicht auf dem mitgelieferten Katalog und einem synthetischen
+Vollkatalog (~2.500 Ziffern, Beschreibungen aus echten GOÄ-Wörtern):
+
+  linear   bisheriger Scan (lower() + "in" über alle Beschreibungen)
+  index    goae.Index — Trie, Token-, Präfix- und Trigramm-Index
+
+gemessen ohne lru_cache (Caches vor jeder Suche geleert), p50 / p99 pro
+Suche, dazu die Bauzeit des Index und Treffer für Tippfehler-Suchen.
+
+Usage:
+  python tools/bench_goae.py [--ziffern 2500] [--runden 200]
+"""
+
+import argparse, random, statistics, sys, time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import goae
+
+WOERTER = ["Beratung", "Untersuchung", "Blutentnahme", "Röntgenaufnahme", "Sonographie", "Injektion",
+           "Infusion", "Verband", "Wundversorgung", "Elektrokardiogramm", "Langzeit", "Belastung",
+           "Gelenk", "Wirbelsäule", "Thorax", "Schädel", "Abdomen", "Schilddrüse", "Haut", "Auge",
+           "Ohr", "Nase", "Kehlkopf", "Lunge", "Herz", "Niere", "Leber", "Magen", "Darm", "Zahn",
+           "symptombezogen", "eingehend", "telefonisch", "Hausbesuch", "Zuschlag", "Nacht",
+           "Bestimmung", "quantitativ", "Antikörper", "Kultur", "Gewebeprobe", "Punktion", "Narkose",
+           "Lokalanästhesie", "Exzision", "Naht", "Kontrolle", "Bericht", "Gutachten", "Ganzkörper"]
+KATEGORIEN = ["Beratung", "Untersuchung", "Labor", "Radiologie", "Chirurgie", "Innere Medizin",
+              "Orthopädie", "HNO", "Augenheilkunde", "Dermatologie", "Zuschläge"]
+SUCHEN = ["beratung", "bertaung", "röntgen", "roentgen", "blut", "schilddruese", "35", "5",
+          "untersuchng ganzkoerper", "sonografie", "zuschlag nacht", "1"]
+
+def synthetisch(n: int, rnd: random.Random) -> dict:
+    # Wortschatz wie im echten Katalog: Grundwörter + Komposita ("Schilddrüsensonographie")
+    woerter = WOERTER + [a + b.lower() for a in WOERTER for b in WOERTER if a != b][::3]
+    eintraege = {}
+    for i in range(n):
+        z = str(rnd.randint(1, 5855)) if i else "1"
+        while z in eintraege:
+            z = str(rnd.randint(1, 5855))
+        einfach = round(rnd.uniform(2, 120), 2)
+        eintraege[z] = {"ziffer": z, "beschreibung": " ".join(rnd.choice(woerter) for _ in range(rnd.randint(2, 7))),
+                        "punkte": int(einfach / 0.0582873), "einfachsatz": einfach,
+                        "faktor_2_3": round(einfach * 2.3, 2), "kategorie": rnd.choice(KATEGORIEN),
+                        "beihilfefaehig_bund": rnd.random() > 0.05}
+    return eintraege
+
+def linear(eintraege: dict, q: str) -> list:
+    q = q.lower().strip()
+    return [v for v in eintraege.values() if not q or q in v["ziffer"] or q in v["beschreibung"].lower()
+            or q in v["kategorie"].lower()][:30]
+
+def messe(fn, runden: int) -> tuple:
+    zeiten = []
+    for _ in range(runden):
+        t0 = time.perf_counter()
+        fn()
+        zeiten.append(time.perf_counter() - t0)
+    zeiten.sort()
+    return statistics.median(zeiten) * 1e6, zeiten[int(len(zeiten) * 0.99) - 1] * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="GOÄ-Such-Benchmark")
+    parser.add_argument("--ziffern", type=int, default=2500)
+    parser.add_argument("--runden", type=int, default=200)
+    args = parser.parse_args()
+
+    kataloge = {"mitgeliefert": goae.lade(), f"synthetisch": synthetisch(args.ziffern, random.Random(42))}
+    print(f"\n🏥 HealthLedger — GOÄ-Suche")
+    print(f"{'─'*72}")
+    for name, eintraege in kataloge.items():
+        t0 = time.perf_counter()
+        idx = goae.Index(eintraege)
+        bau = (time.perf_counter() - t0) * 1000
+        print(f"\n  Katalog {name}: {len(eintraege):,} Ziffern, {len(idx.wortliste):,} Wörter, "
+              f"Index in {bau:.1f} ms")
+        print(f"  {'Suche':26} {'linear p50':>11} {'index p50':>10} {'p99':>8}  Treffer  bester")
+        for q in SUCHEN:
+            lin, _ = messe(lambda: linear(eintraege, q), args.runden)
+            p50, p99 = messe(lambda: (idx.wort_punkte.cache_clear(), idx._suche(q)), args.runden)
+            treffer = idx._suche(q)
+            bester = f"{treffer[0]} {eintraege[treffer[0]]['beschreibung'][:22]}" if treffer else "—"
+            print(f"  {q!r:26} {lin:8.0f} µs {p50:7.0f} µs {p99:5.0f} µs {len(treffer):>7}  {bester}")
+    print(f"{'─'*72}\n")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Benchmark Zeitreihen-Speicher
+=============================
+Vergleicht Platzbedarf und Lesezeit für minütlichen Puls + 5-minütiges
+SpO2 (Watch) in zwei Layouts:
+
+  messwerte    eine Zeile pro Sample (aktuelles Layout)
+  messreihen   eine Zeile pro Person + Typ + Tag, Werte als array('f')-BLOB
+
+Usage:
+  python tools/bench_zeitreihen.py [--tage 365]
+"""
+
+import argparse, random, sqlite3, sys, tempfile, time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import zeitreihen
+
+# Schema wie in main.py init_db()
+MESSWERTE_SCHEMA = """
+CREATE TABLE messwerte (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    person_id INTEGER, person TEXT, typ TEXT,
+    wert REAL, wert2 REAL, einheit TEXT, datum TEXT, notiz TEXT,
+    erstellt_am TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE personen (id INTEGER PRIMARY KEY, name TEXT);
+INSERT INTO personen VALUES (1, 'Sven');
+"""
+
+# (typ, notiz, einheit, Abstand in Sekunden, Wertebereich)
+REIHEN = [
+    ("puls",      "Apple Health Import",        "BPM", 60,  (52, 140)),
+    ("laborwert", "Apple Health Import (SpO2)", "%",   300, (93, 100)),
+]
+
+def tages_samples(rnd: random.Random, schritt: int, bereich: tuple) -> tuple:
+    offsets = list(range(0, 86400, schritt))
+    lo, hi = bereich
+    werte = [round(rnd.uniform(lo, hi), 1 if hi <= 100 else 0) for _ in offsets]
+    return offsets, werte
+
+def db_groesse(pfad: Path) -> int:
+    db = sqlite3.connect(pfad)
+    db.execute("VACUUM")
+    db.close()
+    return pfad.stat().st_size
+
+def main():
+    parser = argparse.ArgumentParser(description="Zeitreihen-Speicher Benchmark")
+    parser.add_argument("--tage", type=int, default=365)
+    args = parser.parse_args()
+
+    tmp = Path(tempfile.mkdtemp(prefix="hl_zr_"))
+    zeilen_db, reihen_db = tmp / "zeilen.db", tmp / "reihen.db"
+    a = sqlite3.connect(zeilen_db); a.executescript(MESSWERTE_SCHEMA)
+    b = sqlite3.connect(reihen_db); b.executescript(MESSWERTE_SCHEMA + zeitreihen.SCHEMA)
+
+    print(f"\n🏥 HealthLedger — Zeitreihen-Benchmark")
+    print(f"{'─'*55}")
+    rnd = random.Random(42)
+    start, n_samples = date(2025, 1, 1), 0
+    for i in range(args.tage):
+        tag = (start + timedelta(days=i)).isoformat()
+        for typ, notiz, einheit, schritt, bereich in REIHEN:
+            offsets, werte = tages_samples(rnd, schritt, bereich)
+            n_samples += len(werte)
+            a.executemany("INSERT INTO messwerte (person_id,person,typ,wert,wert2,einheit,datum,notiz) "
+                          "VALUES (1,'Sven',?,?,NULL,?,?,?)",
+                          [(typ, w, einheit, tag, notiz) for w in werte])
+            zeitreihen.schreibe_tag(b, 1, typ, tag, notiz, einheit, offsets, werte)
+    a.execute("CREATE INDEX idx_messwerte_datum ON messwerte(datum)")
+    a.commit(); b.commit()
+
+    # Lesen: ein Tag Puls
+    tag = (start + timedelta(days=args.tage // 2)).isoformat()
+    t0 = time.perf_counter()
+    for _ in range(50):
+        werte_a = [r[0] for r in a.execute(
+            "SELECT wert FROM messwerte WHERE person_id=1 AND typ='puls' AND datum=?", (tag,))]
+    t_a = (time.perf_counter() - t0) / 50
+    t0 = time.perf_counter()
+    for _ in range(50):
+        _, werte_b = zeitreihen.lese_tag(b, 1, "puls", tag, "Apple Health Import")
+    t_b = (time.perf_counter() - t0) / 50
+    a.close(); b.close()
+
+    groesse_a, groesse_b = db_groesse(zeilen_db), db_groesse(reihen_db)
+    print(f"  {args.tage} Tage, {n_samples:,} Samples (Puls 1/min, SpO2 1/5min)\n")
+    print(f"  {'Layout':14} {'Größe':>10} {'Bytes/Sample':>13} {'Tag lesen':>11}")
+    print(f"  {'messwerte':14} {groesse_a / 1024 / 1024:8.1f} MB {groesse_a / n_samples:13.1f} "
+          f"{t_a * 1000:8.2f} ms")
+    print(f"  {'messreihen':14} {groesse_b / 1024 / 1024:8.1f} MB {groesse_b / n_samples:13.1f} "
+          f"{t_b * 1000:8.2f} ms")
+    print(f"\n  Faktor: {groesse_a / groesse_b:.1f}× kleiner, {t_a / t_b:.1f}× schneller "
+          f"gelesen ({len(werte_a)} = {len(werte_b)} Werte)")
+    print(f"{'─'*55}\n")
+
+    zeilen_db.unlink(); reihen_db.unlink(); tmp.rmdir()
+
+if __name__ == "__main__":
+    main()
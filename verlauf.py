@@ -0,0 +1,312 @@
+"""
+Verlauf — Zeitraum-Abfragen für Charts
+======================================
+GET /api/messwerte/verlauf liefert für einen Zeitraum höchstens max_points
+Punkte, egal ob die Reihe 30 Messungen oder zehn Jahre Watch-Puls enthält:
+
+  ≤ max_points Rohwerte       → Rohwerte
+  ≤ LTTB_LIMIT Rohwerte       → LTTB (Largest-Triangle-Three-Buckets),
+                                formerhaltend, echte Messpunkte
+  darüber                     → vorberechnete Rollups (tag/woche/monat) mit
+                                Mittel + Min/Max-Hülle, feinste Stufe die passt
+
+Rollups liegen in messwerte_rollups und werden auf dem Write-Pfad gepflegt:
+
+  Insert / Bulk      addiere_ids() — nur die Buckets (Tag, Woche, Monat) des
+                     neuen datum, O(1) pro Zeile, ohne die Historie zu lesen
+  Import / Start     aktualisiere_alle() — Neuberechnung pro Person + Typ,
+                     sobald sich der Datenstand (Anzahl/max. id in messwerte
+                     und messreihen) geändert hat; läuft im Executor bzw.
+                     vor dem ersten Request
+
+verlauf() selbst liest nur — kein Schreib-Lock pro Chart.
+"""
+
+from datetime import date, timedelta
+
+import zeitreihen
+
+LTTB_LIMIT = 20_000
+STUFEN     = ("tag", "woche", "monat")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messwerte_rollups (
+    person_id INTEGER NOT NULL, typ TEXT NOT NULL, stufe TEXT NOT NULL, periode TEXT NOT NULL,
+    n INTEGER, wert_min REAL, wert_max REAL, wert_summe REAL,
+    wert2_n INTEGER, wert2_min REAL, wert2_max REAL, wert2_summe REAL,
+    PRIMARY KEY (person_id, typ, stufe, periode)
+);
+CREATE TABLE IF NOT EXISTS messwerte_rollup_stand (
+    person_id INTEGER NOT NULL, typ TEXT NOT NULL, stand TEXT,
+    PRIMARY KEY (person_id, typ)
+);
+CREATE INDEX IF NOT EXISTS idx_messwerte_person_typ ON messwerte(person_id, typ, datum);
+"""
+
+# ── LTTB ─────────────────────────────────────────────────────────────────
+
+def lttb(x: list, y: list, n_out: int) -> list:
+    """Largest-Triangle-Three-Buckets → Indizes der behaltenen Punkte
+
+    Erster und letzter Punkt bleiben, aus jedem der n_out-2 Buckets dazwischen
+    der Punkt, der mit dem Vorgänger und dem Mittel des nächsten Buckets das
+    größte Dreieck bildet — Spitzen und Einbrüche bleiben sichtbar.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return list(range(n))
+    idx = [0]
+    groesse = (n - 2) / (n_out - 2)
+    a = 0
+    for i in range(n_out - 2):
+        start, ende = int(i * groesse) + 1, int((i + 1) * groesse) + 1
+        n_start, n_ende = ende, min(int((i + 2) * groesse) + 1, n)
+        if n_start >= n_ende:
+            n_start, n_ende = n - 1, n
+        avg_x = sum(x[n_start:n_ende]) / (n_ende - n_start)
+        avg_y = sum(y[n_start:n_ende]) / (n_ende - n_start)
+        ax, ay = x[a], y[a]
+        best, best_flaeche = start, -1.0
+        for j in range(start, ende):
+            flaeche = abs((ax - avg_x) * (y[j] - ay) - (ax - x[j]) * (avg_y - ay))
+            if flaeche > best_flaeche:
+                best, best_flaeche = j, flaeche
+        idx.append(best)
+        a = best
+    idx.append(n - 1)
+    return idx
+
+# ── ROHDATEN ─────────────────────────────────────────────────────────────
+
+# POST /api/messwerte nimmt jedes datum an ("2025-1-5", ""), solche Zeilen
+# liegen nicht auf der Zeitachse und bleiben außen vor
+ISO_DATUM = "datum GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'"
+
+def _x(datum: str, sekunden: int = 0) -> float | None:
+    """Datum (+ Uhrzeit) → fortlaufende Tageszahl für LTTB, None wenn kein gültiges Datum"""
+    try:
+        return date.fromisoformat(datum[:10]).toordinal() + sekunden / 86400
+    except (TypeError, ValueError):
+        return None
+
+def rohwerte(db, person_id: int, typ: str, von: str, bis: str) -> list:
+    """Alle Punkte im Zeitraum aus messwerte + messreihen → [(x, datum, zeit, wert, wert2)]"""
+    punkte = [(x, r[0], None, r[1], r[2]) for r in db.execute(
+        "SELECT datum, wert, wert2 FROM messwerte WHERE person_id=? AND typ=? "
+        f"AND datum BETWEEN ? AND ? AND wert IS NOT NULL AND {ISO_DATUM}", (person_id, typ, von, bis))
+        if (x := _x(r[0])) is not None]
+    for r in db.execute("SELECT datum, offsets, werte FROM messreihen WHERE person_id=? AND typ=? "
+                        "AND datum BETWEEN ? AND ?", (person_id, typ, von, bis)):
+        basis = _x(r[0])
+        if basis is None:
+            continue
+        offsets, werte = zeitreihen.entpacke(r[1], r[2])
+        punkte += [(basis + o / 86400, r[0], zeitreihen.uhrzeit(o), round(w, 1), None)
+                   for o, w in zip(offsets, werte)]
+    punkte.sort(key=lambda p: p[0])
+    return punkte
+
+def anzahl_roh(db, person_id: int, typ: str, von: str, bis: str) -> int:
+    n = db.execute("SELECT COUNT(*) FROM messwerte WHERE person_id=? AND typ=? "
+                   f"AND datum BETWEEN ? AND ? AND wert IS NOT NULL AND {ISO_DATUM}",
+                   (person_id, typ, von, bis)).fetchone()[0]
+    n += db.execute("SELECT COALESCE(SUM(anzahl), 0) FROM messreihen WHERE person_id=? AND typ=? "
+                    "AND datum BETWEEN ? AND ?", (person_id, typ, von, bis)).fetchone()[0]
+    return n
+
+# ── ROLLUPS ──────────────────────────────────────────────────────────────
+
+def _periode(datum: str, stufe: str) -> str:
+    """Bucket-Beginn: Tag, Montag der Woche oder Monatserster (datum: gültiges YYYY-MM-DD)"""
+    if stufe == "tag":
+        return datum
+    if stufe == "monat":
+        return datum[:7] + "-01"
+    d = date.fromisoformat(datum)
+    return (d - timedelta(days=d.weekday())).isoformat()
+
+def _stand(db, person_id: int, typ: str) -> str:
+    a = db.execute("SELECT COUNT(*), MAX(id) FROM messwerte WHERE person_id=? AND typ=?",
+                   (person_id, typ)).fetchone()
+    b = db.execute("SELECT COALESCE(SUM(anzahl), 0), MAX(id) FROM messreihen WHERE person_id=? AND typ=?",
+                   (person_id, typ)).fetchone()
+    return f"{a[0]}:{a[1]}:{b[0]}:{b[1]}"
+
+def _leer():
+    return [0, None, None, 0.0, 0, None, None, 0.0]
+
+def _addiere(acc: list, n, w_min, w_max, w_sum, n2, w2_min, w2_max, w2_sum) -> None:
+    acc[0] += n
+    acc[1] = w_min if acc[1] is None else min(acc[1], w_min)
+    acc[2] = w_max if acc[2] is None else max(acc[2], w_max)
+    acc[3] += w_sum
+    if n2:
+        acc[4] += n2
+        acc[5] = w2_min if acc[5] is None else min(acc[5], w2_min)
+        acc[6] = w2_max if acc[6] is None else max(acc[6], w2_max)
+        acc[7] += w2_sum
+
+def aktualisiere_rollups(db, person_id: int, typ: str) -> bool:
+    """Rollups neu berechnen, falls sich der Datenstand geändert hat → True wenn neu"""
+    stand = _stand(db, person_id, typ)
+    alt = db.execute("SELECT stand FROM messwerte_rollup_stand WHERE person_id=? AND typ=?",
+                     (person_id, typ)).fetchone()
+    if alt and alt[0] == stand:
+        return False
+
+    tage = {}
+    # nur echte Zahlen, wie in addiere_ids() ("80,5" bleibt Text in messwerte)
+    for r in db.execute(f"""
+        SELECT tag, COUNT(*), MIN(wert), MAX(wert), SUM(wert),
+               COUNT(w2), MIN(w2), MAX(w2), COALESCE(SUM(w2), 0)
+        FROM (SELECT substr(datum, 1, 10) AS tag, wert,
+                     CASE WHEN typeof(wert2) IN ('integer', 'real') THEN wert2 END AS w2
+              FROM messwerte WHERE person_id=? AND typ=? AND typeof(wert) IN ('integer', 'real')
+                                   AND {ISO_DATUM})
+        GROUP BY tag""", (person_id, typ)):
+        if _x(r[0]) is not None:   # "2025-02-30" passt aufs Muster, ist aber kein Tag
+            _addiere(tage.setdefault(r[0], _leer()), *r[1:])
+    for r in db.execute("SELECT datum, offsets, werte FROM messreihen WHERE person_id=? AND typ=?",
+                        (person_id, typ)):
+        _, werte = zeitreihen.entpacke(r[1], r[2])
+        if werte and _x(r[0]) is not None:
+            _addiere(tage.setdefault(r[0], _leer()), len(werte), min(werte), max(werte),
+                     sum(werte), 0, None, None, 0.0)
+
+    zeilen = []
+    for stufe in STUFEN:
+        buckets = tage if stufe == "tag" else {}
+        if stufe != "tag":
+            for datum, acc in tage.items():
+                b = buckets.setdefault(_periode(datum, stufe), _leer())
+                _addiere(b, *acc)
+        zeilen += [(person_id, typ, stufe, p, *acc) for p, acc in buckets.items()]
+
+    db.execute("DELETE FROM messwerte_rollups WHERE person_id=? AND typ=?", (person_id, typ))
+    db.executemany("INSERT INTO messwerte_rollups VALUES (?,?,?,?,?,?,?,?,?,?,?,?)", zeilen)
+    db.execute("INSERT OR REPLACE INTO messwerte_rollup_stand VALUES (?,?,?)", (person_id, typ, stand))
+    db.commit()
+    return True
+
+def aktualisiere_alle(db, person_id: int | None = None) -> int:
+    """
+    Rollups aller Reihen (einer Person) gegen den Datenstand prüfen und
+    geänderte neu berechnen → Anzahl neu berechneter Reihen.
+
+    Liest die ganze Historie — nur für Start und Import (Executor), nie pro
+    Insert; dort reicht addiere_ids().
+    """
+    bedingung, params = ("person_id=?", (person_id,)) if person_id is not None else ("person_id IS NOT NULL", ())
+    groesse = {}
+    for r in db.execute(f"SELECT person_id, typ, COUNT(*) FROM messwerte WHERE {bedingung} "
+                        "GROUP BY person_id, typ", params):
+        groesse[(r[0], r[1])] = r[2]
+    for r in db.execute(f"SELECT person_id, typ, SUM(anzahl) FROM messreihen WHERE {bedingung} "
+                        "GROUP BY person_id, typ", params):
+        groesse[(r[0], r[1])] = groesse.get((r[0], r[1]), 0) + (r[2] or 0)
+    return sum(aktualisiere_rollups(db, p_id, typ) for p_id, typ in groesse)
+
+_ADDIERE_SQL = """
+    INSERT INTO messwerte_rollups VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+    ON CONFLICT (person_id, typ, stufe, periode) DO UPDATE SET
+        n=n+excluded.n,
+        wert_min=MIN(wert_min, excluded.wert_min), wert_max=MAX(wert_max, excluded.wert_max),
+        wert_summe=wert_summe+excluded.wert_summe,
+        wert2_n=wert2_n+excluded.wert2_n,
+        wert2_min=MIN(COALESCE(wert2_min, excluded.wert2_min), COALESCE(excluded.wert2_min, wert2_min)),
+        wert2_max=MAX(COALESCE(wert2_max, excluded.wert2_max), COALESCE(excluded.wert2_max, wert2_max)),
+        wert2_summe=wert2_summe+excluded.wert2_summe
+"""
+
+def _zahl(x):
+    return x if isinstance(x, (int, float)) else None
+
+def addiere_ids(db, von_id: int, bis_id: int) -> int:
+    """
+    Neue messwerte-Zeilen eines id-Bereichs in die Rollups addieren (ohne Commit)
+
+    Pro Zeile ein Upsert je Stufe auf den Bucket ihres Tages, der Datenstand
+    wird mitgezählt — aktualisiere_alle() rechnet danach nichts neu.
+    Returns: Anzahl addierter Zeilen
+    """
+    zeilen, neu = [], {}
+    for r in db.execute("SELECT id, person_id, typ, datum, wert, wert2 FROM messwerte "
+                        "WHERE id BETWEEN ? AND ? AND person_id IS NOT NULL ORDER BY id",
+                        (von_id, bis_id)):
+        key = (r[1], r[2])
+        n, _ = neu.get(key, (0, None))
+        neu[key] = (n + 1, r[0])
+        wert, wert2 = _zahl(r[4]), _zahl(r[5])
+        if wert is None or not isinstance(r[3], str) or _x(r[3]) is None:
+            continue
+        tag = r[3][:10]
+        for stufe in STUFEN:
+            zeilen.append((*key, stufe, _periode(tag, stufe), 1, wert, wert, wert,
+                           int(wert2 is not None), wert2, wert2, wert2 or 0.0))
+    db.executemany(_ADDIERE_SQL, zeilen)
+
+    # Stand fortschreiben (Anzahl + max. id von messwerte, messreihen unverändert)
+    for (p_id, typ), (n, max_id) in neu.items():
+        alt = db.execute("SELECT stand FROM messwerte_rollup_stand WHERE person_id=? AND typ=?",
+                         (p_id, typ)).fetchone()
+        anzahl, _, r_anzahl, r_max = alt[0].split(":") if alt else ("0", None, "0", "None")
+        db.execute("INSERT OR REPLACE INTO messwerte_rollup_stand VALUES (?,?,?)",
+                   (p_id, typ, f"{int(anzahl) + n}:{max_id}:{r_anzahl}:{r_max}"))
+    return len(zeilen) // len(STUFEN)
+
+# ── ABFRAGE ──────────────────────────────────────────────────────────────
+
+def verlauf(db, person_id: int, typ: str, von: str | None = None, bis: str | None = None,
+            max_points: int = 500) -> dict:
+    """
+    Zeitraum-Abfrage → spaltenweise Antwort für Charts
+
+      {"aufloesung": "roh"|"lttb"|"tag"|"woche"|"monat", "anzahl_roh": n,
+       "datum": [...], "wert": [...], "wert2": [...],
+       # nur bei Rollups: Hülle + Anzahl je Bucket
+       "min": [...], "max": [...], "wert2_min": [...], "wert2_max": [...], "n": [...]}
+    """
+    von, bis = von or "0001-01-01", bis or "9999-12-31"
+    max_points = max(max_points, 3)
+    n_roh = anzahl_roh(db, person_id, typ, von, bis)
+
+    if n_roh <= LTTB_LIMIT:
+        punkte = rohwerte(db, person_id, typ, von, bis)
+        aufloesung = "roh"
+        if len(punkte) > max_points:
+            idx = lttb([p[0] for p in punkte], [p[3] for p in punkte], max_points)
+            punkte = [punkte[i] for i in idx]
+            aufloesung = "lttb"
+        antwort = {"aufloesung": aufloesung, "anzahl_roh": n_roh,
+                   "datum": [p[1] for p in punkte], "wert": [p[3] for p in punkte],
+                   "wert2": [p[4] for p in punkte]}
+        if any(p[2] for p in punkte):
+            antwort["zeit"] = [p[2] for p in punkte]
+        return antwort
+
+    # Rollups pflegt der Write-Pfad (aktualisiere_alle) — hier nur lesen
+    for stufe in STUFEN:
+        n = db.execute("SELECT COUNT(*) FROM messwerte_rollups WHERE person_id=? AND typ=? "
+                       "AND stufe=? AND periode BETWEEN ? AND ?",
+                       (person_id, typ, stufe, _periode(von, stufe), bis)).fetchone()[0]
+        if n <= max_points or stufe == STUFEN[-1]:
+            break
+    rows = db.execute("""
+        SELECT periode, n, wert_min, wert_max, wert_summe, wert2_n, wert2_min, wert2_max, wert2_summe
+        FROM messwerte_rollups WHERE person_id=? AND typ=? AND stufe=? AND periode BETWEEN ? AND ?
+        ORDER BY periode""", (person_id, typ, stufe, _periode(von, stufe), bis)).fetchall()
+    if len(rows) > max_points:
+        # Selbst Monate sind zu viele (Jahrzehnte) → LTTB über die Monatsmittel
+        idx = lttb([_x(r[0]) for r in rows], [r[4] / r[1] for r in rows], max_points)
+        rows = [rows[i] for i in idx]
+    return {
+        "aufloesung": stufe, "anzahl_roh": n_roh,
+        "datum":     [r[0] for r in rows],
+        "wert":      [round(r[4] / r[1], 1) for r in rows],
+        "min":       [r[2] for r in rows],
+        "max":       [r[3] for r in rows],
+        "wert2":     [round(r[8] / r[5], 1) if r[5] else None for r in rows],
+        "wert2_min": [r[6] for r in rows],
+        "wert2_max": [r[7] for r in rows],
+        "n":         [r[1] for r in rows],
+    }
@@ -0,0 +1,49 @@
+"""
+Versionen — Änderungszähler pro Tabelle für ETags
+=================================================
+Version einer Tabelle = höchste vergebene id (sqlite_sequence, AUTOINCREMENT)
++ Anzahl UPDATE/DELETE (tabellen_version, per Trigger). Beide Teile steigen
+nur, jede Änderung erhöht die Summe — egal ob sie über die API, den
+Bulk-Import oder tools/apple_health_importer.py kommt. Inserts kosten so
+keinen Trigger (beim Bulk-Import von 200k Messwerten ~40% Laufzeit).
+
+Lese-Endpoints bilden daraus einen starken ETag. Passt If-None-Match,
+antwortet main.py mit 304, ohne die eigentliche Abfrage auszuführen. Die
+Version wird vor der Abfrage gelesen: eine gleichzeitige Änderung macht den
+ETag höchstens zu alt (nächster Request lädt neu), nie zu neu.
+"""
+
+TABELLEN = ("personen", "dokumente", "medikamente", "messwerte", "messreihen",
+            "ereignisse", "policen")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tabellen_version (
+    tabelle TEXT PRIMARY KEY, aenderungen INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+""" + "".join(
+    f"INSERT OR IGNORE INTO tabellen_version (tabelle) VALUES ('{t}');\n" +
+    "".join(f"CREATE TRIGGER IF NOT EXISTS trg_{t}_version_{op.lower()} AFTER {op} ON {t} BEGIN "
+            f"UPDATE tabellen_version SET aenderungen = aenderungen + 1 WHERE tabelle = '{t}'; END;\n"
+            for op in ("UPDATE", "DELETE"))
+    for t in TABELLEN)
+
+def versionen(db, tabellen) -> dict:
+    """{tabelle: version} — zwei Lookups in kleinen Tabellen, unabhängig von der Datenmenge"""
+    platz = ",".join("?" * len(tabellen))
+    rows = db.execute(f"""
+        SELECT v.tabelle, v.aenderungen + COALESCE(s.seq, 0)
+        FROM tabellen_version v LEFT JOIN sqlite_sequence s ON s.name = v.tabelle
+        WHERE v.tabelle IN ({platz})""", tuple(tabellen)).fetchall()
+    return {r[0]: r[1] for r in rows}
+
+def etag(db, tabellen, praefix: str = "") -> str:
+    """Starker ETag aus den Versionen, z.B. "1.1.0-personen.4-dokumente.17" """
+    v = versionen(db, tabellen)
+    return '"' + "-".join([praefix] * bool(praefix) + [f"{t}.{v.get(t, 0)}" for t in tabellen]) + '"'
+
+def passt(if_none_match: str | None, tag: str) -> bool:
+    """If-None-Match (Liste oder *) gegen den aktuellen ETag prüfen"""
+    if not if_none_match:
+        return False
+    kandidaten = [k.strip().removeprefix("W/") for k in if_none_match.split(",")]
+    return "*" in kandidaten or tag in kandidaten
@@ -0,0 +1,109 @@
+"""
+Zeitreihen-Speicher für hochfrequente Messwerte
+===============================================
+Minütlicher Puls oder SpO2 von der Watch würde in messwerte eine 10-Spalten-
+Zeile pro Sample erzeugen (inkl. Personenname, Einheit, Notiz als Text).
+Hier landet stattdessen eine Zeile pro Person + Typ + Tag + Notiz:
+
+  werte    BLOB  array('f')  — float32, little-endian
+  offsets  BLOB  array('i')  — Sekunden seit Mitternacht (Ortszeit), sortiert
+
+Lesen dekodiert per array.frombytes() direkt in Arrays; GET /api/messwerte
+mischt die Samples über messwerte_zeilen() transparent unter die normalen
+Messwerte.
+"""
+
+import sys
+from array import array
+
+# (typ, Kurzname) → geht in den Zeitreihen-Speicher statt nach messwerte
+REIHEN_TYPEN = {("puls", ""), ("laborwert", "SpO2")}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messreihen (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    person_id INTEGER NOT NULL, typ TEXT NOT NULL, datum TEXT NOT NULL,
+    notiz TEXT NOT NULL DEFAULT '', einheit TEXT,
+    anzahl INTEGER NOT NULL, werte BLOB NOT NULL, offsets BLOB NOT NULL,
+    UNIQUE (person_id, typ, datum, notiz)
+);
+CREATE INDEX IF NOT EXISTS idx_messreihen_datum ON messreihen(datum);
+"""
+
+_SWAP = sys.byteorder == "big"   # Speicherformat ist little-endian
+
+def packe(offsets, werte) -> tuple:
+    """Offsets + Werte → (offsets_blob, werte_blob)"""
+    o, w = array("i", offsets), array("f", werte)
+    if _SWAP: o.byteswap(); w.byteswap()
+    return o.tobytes(), w.tobytes()
+
+def entpacke(offsets_blob: bytes, werte_blob: bytes) -> tuple:
+    """(offsets_blob, werte_blob) → (array('i'), array('f'))"""
+    o, w = array("i"), array("f")
+    o.frombytes(offsets_blob)
+    w.frombytes(werte_blob)
+    if _SWAP: o.byteswap(); w.byteswap()
+    return o, w
+
+def schreibe_tag(db, person_id: int, typ: str, datum: str, notiz: str, einheit: str,
+                 offsets, werte) -> int:
+    """
+    Samples eines Tages speichern — vorhandene Reihe wird gemischt.
+
+    Gleicher Offset = gleiches Sample (z.B. erneuter Import desselben
+    Exports), der neue Wert gewinnt. Returns: Anzahl Samples danach.
+    """
+    row = db.execute("SELECT offsets, werte FROM messreihen WHERE person_id=? AND typ=? "
+                     "AND datum=? AND notiz=?", (person_id, typ, datum, notiz)).fetchone()
+    samples = dict(zip(*entpacke(row[0], row[1]))) if row else {}
+    samples.update(zip(offsets, werte))
+    neu_offsets = sorted(samples)
+    o_blob, w_blob = packe(neu_offsets, [samples[o] for o in neu_offsets])
+    db.execute("""
+        INSERT INTO messreihen (person_id, typ, datum, notiz, einheit, anzahl, werte, offsets)
+        VALUES (?,?,?,?,?,?,?,?)
+        ON CONFLICT (person_id, typ, datum, notiz)
+        DO UPDATE SET anzahl=excluded.anzahl, werte=excluded.werte, offsets=excluded.offsets
+    """, (person_id, typ, datum, notiz, einheit, len(neu_offsets), w_blob, o_blob))
+    return len(neu_offsets)
+
+def lese_tag(db, person_id: int, typ: str, datum: str, notiz: str = "") -> tuple:
+    """Eine Tages-Reihe → (array('i') offsets, array('f') werte), leer wenn nicht vorhanden"""
+    row = db.execute("SELECT offsets, werte FROM messreihen WHERE person_id=? AND typ=? "
+                     "AND datum=? AND notiz=?", (person_id, typ, datum, notiz)).fetchone()
+    return entpacke(row[0], row[1]) if row else (array("i"), array("f"))
+
+def uhrzeit(sekunden: int) -> str:
+    """Sekunden seit Mitternacht → HH:MM:SS"""
+    return f"{sekunden // 3600:02d}:{sekunden // 60 % 60:02d}:{sekunden % 60:02d}"
+
+def messwerte_zeilen(db, person: str | None = None, typ: str | None = None,
+                     limit: int = 30) -> list:
+    """
+    Die neuesten `limit` Samples im messwerte-Format (neueste zuerst).
+
+    id ist None (Samples sind keine eigenen Zeilen), dafür reihe_id + zeit.
+    """
+    q = """SELECT r.id, r.person_id, p.name AS person, r.typ, r.datum, r.notiz, r.einheit,
+                  r.offsets, r.werte
+           FROM messreihen r LEFT JOIN personen p ON p.id = r.person_id WHERE 1=1"""
+    params = []
+    if person: q += " AND p.name=?"; params.append(person)
+    if typ:    q += " AND r.typ=?"; params.append(typ)
+    q += " ORDER BY r.datum DESC"
+
+    zeilen = []
+    for r in db.execute(q, params):
+        # Mehrere Reihen am selben Tag (Puls + SpO2) → den Tag immer komplett nehmen
+        if len(zeilen) >= limit and r["datum"] < zeilen[-1]["datum"]:
+            break
+        offsets, werte = entpacke(r["offsets"], r["werte"])
+        for i in range(len(offsets) - 1, max(len(offsets) - limit, 0) - 1, -1):
+            zeilen.append({"id": None, "reihe_id": r["id"], "person_id": r["person_id"],
+                           "person": r["person"], "typ": r["typ"],
+                           "wert": round(werte[i], 1), "wert2": None,
+                           "einheit": r["einheit"], "datum": r["datum"],
+                           "zeit": uhrzeit(offsets[i]), "notiz": r["notiz"]})
+    zeilen.sort(key=lambda z: (z["datum"], z["zeit"]), reverse=True)
+    return zeilen[:limit]